@@ -0,0 +1,10 @@
+# gunicorn picks this file up on its own when it is started from the repo root (see Procfile and run.sh)
+
+
+def post_worker_init(_worker):
+    # only web workers keep the discovered tag and tag set ids fresh in the background; anything else that imports
+    # the app (tests, flask commands, the release phase) just looks them up the first time it needs them
+    # the import has to stay in here: importing the app at the top would load it (and open its connections) in the
+    # gunicorn master when this file is read, before the workers are forked
+    from server.util.tags import start_tag_discovery     # pylint: disable=import-outside-toplevel
+    start_tag_discovery()
@@ -1,2 +1,3 @@
 #!/bin/bash
 python -m scripts.cache_tag_sets.py
+flask warm-cache
@@ -18,7 +18,8 @@ from flask_executor import Executor
 
 from server.sessions import RedisSessionInterface
 from server.util.config import get_default_config, ConfigException
-from server.commands import sync_frontend_db
+from server.util import replay, mcclients, resilience, deadline
+from server.commands import sync_frontend_db, warm_cache
 from server.database import UserDatabase, AnalyticsDatabase
 
 SERVER_MODE_DEV = "dev"
@@ -62,9 +63,48 @@ except ConfigException as e:
     logger.info("no sentry logging")
 
 
+# optionally record or replay all upstream API calls, for offline benchmarking (never turn this on in production!)
+try:
+    api_replay_mode = config.get('API_REPLAY_MODE')
+    try:
+        api_replay_dir = config.get('API_REPLAY_DIR')
+    except ConfigException:
+        api_replay_dir = os.path.join(base_dir, 'api-fixtures')
+    try:
+        api_replay_latency = config.get('API_REPLAY_LATENCY')
+        api_replay_latency = api_replay_latency if api_replay_latency == 'recorded' else float(api_replay_latency)
+    except ConfigException:
+        api_replay_latency = 0
+    replay.install(api_replay_mode, api_replay_dir, api_replay_latency)
+except ConfigException:
+    pass    # the normal case - talk to the real APIs
+
 # Connect to MediaCloud
 TOOL_API_KEY = config.get('MEDIA_CLOUD_API_KEY')
 
+# all the Media Cloud clients share one pool of keep-alive connections, and user clients are reused across requests
+try:
+    mc_connections_per_host = int(config.get('MC_CONNECTIONS_PER_HOST'))
+except ConfigException:
+    mc_connections_per_host = mcclients.DEFAULT_CONNECTIONS_PER_HOST
+try:
+    mc_timeout_secs = int(config.get('MEDIA_CLOUD_TIMEOUT_SECS'))
+except ConfigException:
+    mc_timeout_secs = mediacloud.api.MediaCloud.TIMEOUT_SECS
+# every call goes through one resilience layer too, so a slow or failing API can't tie up all our workers
+mc_upstream = resilience.upstream('mediacloud', session=mcclients.shared_session(mc_connections_per_host),
+                                  timeout=(5, mc_timeout_secs), retry_if=resilience.media_cloud_retry_if)
+mcclients.share_connections(mediacloud.api, mc_upstream)
+try:
+    mc_client_pool_size = int(config.get('MC_CLIENT_POOL_SIZE'))
+except ConfigException:
+    mc_client_pool_size = mcclients.DEFAULT_POOL_SIZE
+try:
+    mc_api_url = config.get('MEDIA_CLOUD_API_URL')
+except ConfigException:
+    mc_api_url = None  # just use the default API url because a custom one is not defined
+mc_clients = mcclients.ClientPool(mc_client_pool_size, mc_api_url)
+
 mc = mediacloud.api.AdminMediaCloud(TOOL_API_KEY)
 try:
     mc.V2_API_URL = config.get('MEDIA_CLOUD_API_URL')
@@ -179,6 +219,7 @@ def create_app():
     my_app.session_interface = RedisSessionInterface(redis.StrictRedis.from_url(config.get('SESSION_REDIS_URL')))
 
     my_app.cli.add_command(sync_frontend_db)
+    my_app.cli.add_command(warm_cache)
 
     return my_app
 
@@ -195,6 +236,26 @@ login_manager.init_app(app)
 # using one shared executor pool for now - can revisit later if we need to
 executor = Executor(app)
 
+# give each request a time budget that all of its upstream calls share, so it fails with a clear error instead of
+# getting the whole worker killed by gunicorn's timeout
+try:
+    request_deadline_secs = float(config.get('REQUEST_DEADLINE_SECS'))
+except ConfigException:
+    request_deadline_secs = deadline.DEFAULT_BUDGET_SECS
+
+
+@app.before_request
+def start_request_deadline():
+    deadline.start(request_deadline_secs)
+
+
+@app.after_request
+def end_request_deadline(response):
+    # the budget covers building the response; streamed downloads can take as long as they need to send it
+    deadline.clear()
+    return response
+
+
 # set up all the views
 @app.route('/')
 def index():
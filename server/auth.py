@@ -4,8 +4,7 @@ import flask_login
 import mediacloud.api
 from flask import session
 
-from server import user_db, login_manager
-from server.util.config import get_default_config, ConfigException
+from server import user_db, login_manager, mc_clients
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +17,6 @@ ROLE_STORIES_API = 'stories-api'            # Access to the stories api
 ROLE_SEARCH = 'search'                      # Access to the /search pages
 ROLE_TM_READ_ONLY = 'tm-readonly'           # Topic mapper; excludes media and story editing
 
-# load the config helper
-config = get_default_config()
-
 
 # User class
 class User(flask_login.UserMixin):
@@ -145,12 +141,7 @@ def user_admin_mediacloud_client(user_mc_key=None):
     mc_key_to_use = user_mc_key
     if mc_key_to_use is None:
         mc_key_to_use = user_mediacloud_key()
-    user_mc = mediacloud.api.AdminMediaCloud(mc_key_to_use)
-    try:
-        user_mc.V2_API_URL = config.get('MEDIA_CLOUD_API_URL')
-    except ConfigException:
-        pass  # just use the default API url because a custom one is not defined
-    return user_mc
+    return mc_clients.get(mediacloud.api.AdminMediaCloud, mc_key_to_use)
 
 
 def user_mediacloud_client(user_mc_key=None):
@@ -159,9 +150,9 @@ def user_mediacloud_client(user_mc_key=None):
     mc_key_to_use = user_mc_key
     if mc_key_to_use is None:
         mc_key_to_use = user_mediacloud_key()
-    user_mc = mediacloud.api.MediaCloud(mc_key_to_use)
-    try:
-        user_mc.V2_API_URL = config.get('MEDIA_CLOUD_API_URL')
-    except ConfigException:
-        pass  # just use the default API url because a custom one is not defined
-    return user_mc
+    return mc_clients.get(mediacloud.api.MediaCloud, mc_key_to_use)
+
+
+def forget_mediacloud_clients(user_mc_key):
+    # Stop reusing the pooled clients for a key that is no longer valid (ie. after it has been reset)
+    mc_clients.discard(user_mc_key)
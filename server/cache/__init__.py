@@ -0,0 +1,114 @@
+import redis
+from dogpile.cache import register_backend
+
+from server import config
+from server.util.config import ConfigException
+from server.cache.dependencies import ids_in_query
+from server.cache.chunks import ChunkedStorage
+from server.cache.keys import keyword_safe_key_generator, key_stats
+from server.cache.metrics import MetricsProxy
+from server.cache.policies import EXPIRE_IMMUTABLE, EXPIRE_SNAPSHOT, EXPIRE_DEFAULT, EXPIRE_LIVE, EXPIRE_USER
+from server.cache.refresh import BackgroundRefresher
+from server.cache.region import WebToolsCacheRegion
+from server.cache.serializers import CacheValueSerializer
+from server.cache.tiered import LocalCacheProxy
+
+
+register_backend('webtools.redis', 'server.cache.backends', 'SerializingRedisBackend')
+
+
+def _config_int(key, default):
+    try:
+        return int(config.get(key))
+    except ConfigException:
+        return default
+
+
+def _config_str(key, default):
+    try:
+        return config.get(key)
+    except ConfigException:
+        return default
+
+
+# one pool shared by the dogpile backend and the local tier's invalidation messages
+redis_pool = redis.ConnectionPool.from_url(config.get('CACHE_REDIS_URL'))
+
+# small in-process tier in front of Redis for hot, small values (set CACHE_LOCAL_MAX_ITEMS=0 to turn it off)
+local_tier = LocalCacheProxy(
+    max_items=_config_int('CACHE_LOCAL_MAX_ITEMS', 2000),
+    max_bytes=_config_int('CACHE_LOCAL_MAX_BYTES', 64*1024*1024),
+    max_value_bytes=_config_int('CACHE_LOCAL_MAX_VALUE_BYTES', 256*1024),
+    ttl=_config_int('CACHE_LOCAL_TTL', 60),
+    connection_pool=redis_pool,
+)
+
+# compact encoding for what we store in Redis; it can still read values that were pickled by older releases
+serializer = CacheValueSerializer(
+    codec=_config_str('CACHE_SERIALIZER', 'json'),
+    compression=_config_str('CACHE_COMPRESSION', 'zlib'),
+    compress_threshold=_config_int('CACHE_COMPRESS_THRESHOLD_BYTES', 1024),
+)
+
+# values bigger than this get split into chunks in Redis (set CACHE_CHUNK_BYTES=0 to turn this off)
+chunking = ChunkedStorage(chunk_size=_config_int('CACHE_CHUNK_BYTES', 512*1024))
+
+# regenerates results that are past their `soft_ttl` on the executor pool, while callers get the stale value
+background_refresher = BackgroundRefresher()
+
+cache = WebToolsCacheRegion(function_key_generator=keyword_safe_key_generator,
+                            async_creation_runner=background_refresher)
+# how long each class of results lives in Redis (in seconds), see server/cache/policies.py
+for expiration_class in [EXPIRE_IMMUTABLE, EXPIRE_SNAPSHOT, EXPIRE_DEFAULT, EXPIRE_LIVE, EXPIRE_USER]:
+    cache.policies.ttls[expiration_class] = _config_int('CACHE_TTL_{}'.format(expiration_class.upper()),
+                                                        cache.policies.ttls[expiration_class])
+cache.dependencies.connect(redis_pool)
+# how long to remember errors from functions marked with `cache_errors`
+cache.negative.default_ttl = _config_int('CACHE_ERROR_TTL', cache.negative.default_ttl)
+cache.configure(
+    'webtools.redis',
+    arguments={
+        'connection_pool': redis_pool,
+        'serializer': serializer,
+        'expiration_policies': cache.policies,
+        'metrics': cache.metrics,
+        'chunking': chunking,
+        'distributed_lock': True,
+        # so a worker that dies in the middle of regenerating a value can't leave its key locked forever
+        'lock_timeout': _config_int('CACHE_LOCK_TIMEOUT', 60*10),
+        },
+    # the metrics proxy goes outside the local tier, so a hit from either tier counts as a hit
+    wrap=[MetricsProxy(cache.metrics), local_tier]
+)
+
+
+def cache_stats():
+    """
+    Hit/miss counters for each tier of the cache, plus key and value size info, as seen by this process.
+    """
+    stats = local_tier.stats()
+    stats['keys'] = key_stats.as_dict()
+    stats['serializer'] = serializer.stats()
+    stats['chunking'] = chunking.stats()
+    stats['expiration_classes'] = cache.policies.stats()
+    stats['background_refreshes'] = background_refresher.stats()
+    stats['single_flight'] = cache.single_flight.stats()
+    return stats
+
+
+def cache_namespace_stats():
+    """
+    Hits, misses, latency, value sizes and generation time for each cached function, as seen by this process.
+    """
+    return cache.metrics.as_dict()
+
+
+def cache_namespace_stats_prometheus():
+    return cache.metrics.as_prometheus()
+
+
+def cache_memory_by_expiration_class(sample_size=1000):
+    """
+    Sampled estimate of how much Redis memory each expiration class is using right now (slow - admin use only).
+    """
+    return cache.policies.memory_usage(redis.StrictRedis(connection_pool=redis_pool), sample_size)
@@ -0,0 +1,109 @@
+from dogpile.cache.api import NO_VALUE
+from dogpile.cache.backends.redis import RedisBackend
+
+from server.cache.chunks import ChunkedStorage, is_manifest, parse_manifest, chunk_keys
+from server.cache.negative import CachedError
+from server.cache.serializers import CacheValueSerializer
+
+
+class SerializingRedisBackend(RedisBackend):
+    """
+    The stock dogpile Redis backend, except values are written with a pluggable serializer instead of always being
+    pickled, and each key can get its own Redis TTL. Pass a `CacheValueSerializer` in as the `serializer` argument, and
+    an `ExpirationPolicies` as `expiration_policies` (otherwise every key gets `redis_expiration_time`). Pass a
+    `NamespaceMetrics` as `metrics` to track the size of what gets written, and a `ChunkedStorage` as `chunking` to
+    control how values that are too big to store in one piece get split up.
+    """
+
+    def __init__(self, arguments):
+        arguments = arguments.copy()
+        self.serializer = arguments.pop('serializer', None) or CacheValueSerializer()
+        self.policies = arguments.pop('expiration_policies', None)
+        self.metrics = arguments.pop('metrics', None)
+        self.chunking = arguments.pop('chunking', None) or ChunkedStorage()
+        super().__init__(arguments)
+
+    def _expiration_time(self, key, value):
+        if self.policies is None:
+            expiration_time = self.redis_expiration_time
+        else:
+            expiration_time = self.policies.ttl_for_key(key)
+        if isinstance(value.payload, CachedError):
+            # remembered errors only stick around for a short time
+            expiration_time = min(expiration_time, value.payload.ttl) if expiration_time else value.payload.ttl
+        return expiration_time
+
+    def _dumps(self, key, value):
+        data = self.serializer.dumps(value)
+        if self.policies is not None:
+            self.policies.record_write(key, len(data))
+        if self.metrics is not None:
+            self.metrics.record_size(key, len(data))
+        return data
+
+    def _store(self, pipe, key, value):
+        data = self._dumps(key, value)
+        expiration_time = self._expiration_time(key, value)
+        items = [(key, data)]
+        if self.chunking.needs_chunking(data):
+            manifest, chunks = self.chunking.split(key, data)
+            items = chunks + [(key, manifest)]   # manifest last, so it never points at chunks that aren't there yet
+        for item_key, item_data in items:
+            if expiration_time:
+                pipe.setex(item_key, expiration_time, item_data)
+            else:
+                pipe.set(item_key, item_data)
+
+    def _load_all(self, keys, raw_values):
+        # put any chunked values back together with one more round trip for all of their chunks
+        manifests = {i: parse_manifest(raw) for i, raw in enumerate(raw_values) if is_manifest(raw)}
+        if len(manifests) > 0:
+            raw_values = list(raw_values)
+            all_chunk_keys = {i: chunk_keys(keys[i], m) for i, m in manifests.items()}
+            pieces = self.client.mget([k for i in sorted(all_chunk_keys) for k in all_chunk_keys[i]])
+            offset = 0
+            for i in sorted(all_chunk_keys):
+                count = len(all_chunk_keys[i])
+                raw_values[i] = self.chunking.assemble(keys[i], manifests[i], pieces[offset:offset + count])
+                offset += count
+        return [self.serializer.loads(raw) if raw is not None else NO_VALUE for raw in raw_values]
+
+    def get_mutex(self, key):
+        if not self.distributed_lock:
+            return None
+        # not thread local, because a background refresh releases the lock on a pool thread instead of the one that
+        # took it (see `server.cache.refresh`); otherwise the release fails and the key stays locked until it times out
+        return self.client.lock('_lock{}'.format(key), self.lock_timeout, self.lock_sleep, thread_local=False)
+
+    def get(self, key):
+        return self._load_all([key], [self.client.get(key)])[0]
+
+    def get_multi(self, keys):
+        if not keys:
+            return []
+        return self._load_all(keys, self.client.mget(keys))
+
+    def set(self, key, value):
+        # a transaction, so readers never see a manifest without all its chunks
+        pipe = self.client.pipeline()
+        self._store(pipe, key, value)
+        pipe.execute()
+
+    def set_multi(self, mapping):
+        pipe = self.client.pipeline()
+        for key, value in mapping.items():
+            self._store(pipe, key, value)
+        pipe.execute()
+
+    def delete(self, key):
+        self.delete_multi([key])
+
+    def delete_multi(self, keys):
+        if not keys:
+            return
+        # clear out the chunks of any chunked values too, rather than leaving them around until they expire
+        to_delete = list(keys)
+        for key, raw in zip(keys, self.client.mget(keys)):
+            if is_manifest(raw):
+                to_delete += chunk_keys(key, parse_manifest(raw))
+        self.client.delete(*to_delete)
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# stored at the real key in place of a big value, followed by a small json manifest listing its chunks
+MANIFEST_MAGIC = b'WT#'
+
+
+class ChunkedStorage:
+    """
+    Splits serialized values bigger than `chunk_size` into chunks stored under their own keys, with a small manifest
+    at the real key saying how to put them back together. The chunk keys include a digest of the whole value, so a
+    reader can never mix up chunks from two different writes, and the digest is checked again on the way back out.
+    """
+
+    def __init__(self, chunk_size=512*1024):
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self.chunked_writes = 0
+        self.chunked_reads = 0
+        self.chunks_written = 0
+        self.integrity_failures = 0
+
+    def needs_chunking(self, data):
+        return 0 < self.chunk_size < len(data)
+
+    def split(self, key, data):
+        """
+        :return: the manifest to store at `key`, and a list of (chunk key, chunk data) to store alongside it
+        """
+        digest = hashlib.sha1(data).hexdigest()
+        pieces = [data[i:i + self.chunk_size] for i in range(0, len(data), self.chunk_size)]
+        manifest = {'digest': digest, 'size': len(data), 'chunks': len(pieces)}
+        chunks = list(zip(chunk_keys(key, manifest), pieces))
+        with self._lock:
+            self.chunked_writes += 1
+            self.chunks_written += len(pieces)
+        return MANIFEST_MAGIC + json.dumps(manifest).encode('utf-8'), chunks
+
+    def assemble(self, key, manifest, pieces):
+        """
+        :return: the original data, or None if any chunk is missing or it doesn't match what was written
+        """
+        if any(p is None for p in pieces):
+            data = None     # ie. one chunk was evicted before the others
+        else:
+            data = b''.join(pieces)
+            if (len(data) != manifest['size']) or (hashlib.sha1(data).hexdigest() != manifest['digest']):
+                data = None
+        with self._lock:
+            if data is None:
+                self.integrity_failures += 1
+            else:
+                self.chunked_reads += 1
+        if data is None:
+            logger.warning("Chunked cache value for {} failed its integrity check; treating it as a miss".format(key))
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                'chunk_size': self.chunk_size,
+                'chunked_writes': self.chunked_writes,
+                'chunks_written': self.chunks_written,
+                'chunked_reads': self.chunked_reads,
+                'integrity_failures': self.integrity_failures,
+            }
+
+
+def is_manifest(data):
+    return data is not None and data[:len(MANIFEST_MAGIC)] == MANIFEST_MAGIC
+
+
+def parse_manifest(data):
+    return json.loads(data[len(MANIFEST_MAGIC):].decode('utf-8'))
+
+
+def chunk_keys(key, manifest):
+    # keep the function namespace at the front, so chunks get the same TTL and show up under the same stats
+    return ['{}|chunk:{}:{}'.format(key, manifest['digest'][:16], i) for i in range(manifest['chunks'])]
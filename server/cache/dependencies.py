@@ -0,0 +1,142 @@
+import inspect
+import logging
+import re
+import time
+from functools import wraps
+
+import redis
+
+from server.cache.keys import namespace_of_key
+
+logger = logging.getLogger(__name__)
+
+# the kinds of things a cached result can depend on; these match the argument names we use throughout the code
+ENTITY_TYPES = ['tags_id', 'media_id', 'topics_id', 'snapshots_id']
+
+# these are sorted sets of key -> when it expires (the older 'web-tools:cache:depends' plain sets just age out)
+DEPENDENCY_SET_PREFIX = 'web-tools:cache:dependents'
+
+# keep the sets around a little longer than the longest lived cached value, so they can't lose track of a live key
+DEPENDENCY_SET_TTL = 60*60*24*31
+
+
+def dependency_set_key(entity_type, entity_id):
+    return '{}:{}:{}'.format(DEPENDENCY_SET_PREFIX, entity_type, entity_id)
+
+
+def ids_in_query(arg_name, solr_field):
+    """
+    For use in `depends_on`: pull the ids out of clauses like "media_id:1234", "media_id:(1 OR 2)" or
+    "media_id:(1 2)" in a solr query argument.
+    """
+    pattern = re.compile(r'\b{}:\(?(\d+(?:\s+(?:OR\s+)?\d+)*)\)?'.format(re.escape(solr_field)))
+
+    def extract(arguments):
+        query = arguments.get(arg_name)
+        if not isinstance(query, str):
+            return []
+        ids = []
+        for match in pattern.findall(query):
+            ids += re.findall(r'\d+', match)
+        return ids
+    return extract
+
+
+def _as_id_list(value):
+    if value is None or value == '':
+        return []
+    if isinstance(value, (list, tuple, set)):
+        return [v for v in value if v is not None and v != '']
+    return [value]
+
+
+class DependencyIndex:
+    """
+    Keeps track of which cached keys depend on which entities (collections, sources, topics, snapshots), by adding
+    each key to a Redis sorted set per entity when its value is generated. That way one call can invalidate everything
+    we have cached about a collection, no matter which function or user generated it. Each key is scored by when it
+    expires (pass in `ttl_for_key` to say how long that is), so keys that have expired on their own can be dropped
+    from the set instead of piling up in it.
+    """
+
+    def __init__(self, ttl_for_key=None):
+        self._namespaces = {}   # function namespace -> (signature, {entity type: argument name or callable})
+        self._ttl_for_key = ttl_for_key or (lambda key: DEPENDENCY_SET_TTL)
+        self.client = None
+
+    def connect(self, connection_pool):
+        self.client = redis.StrictRedis(connection_pool=connection_pool)
+
+    def register(self, namespace, fn, depends_on):
+        if isinstance(depends_on, (list, tuple)):
+            depends_on = {entity_type: entity_type for entity_type in depends_on}
+        for entity_type in depends_on:
+            if entity_type not in ENTITY_TYPES:
+                raise ValueError("Unknown cache dependency '{}'".format(entity_type))
+        self._namespaces[namespace] = (inspect.signature(fn), dict(depends_on))
+
+    def _entities_for_call(self, key, args, kwargs):
+        signature, depends_on = self._namespaces[namespace_of_key(key)]
+        bound = signature.bind(*args, **kwargs)
+        arguments = {}
+        for name, value in bound.arguments.items():
+            if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD:
+                arguments.update(value)     # ie. the snapshots_id in a topic call's **kwargs
+            else:
+                arguments[name] = value
+        entities = []
+        for entity_type, source in depends_on.items():
+            ids = source(arguments) if callable(source) else _as_id_list(arguments.get(source))
+            entities += [(entity_type, entity_id) for entity_id in ids]
+        return entities
+
+    def _record(self, key, entities):
+        now = time.time()
+        expires = now + self._ttl_for_key(key)
+        pipe = self.client.pipeline(transaction=False)
+        for entity_type, entity_id in entities:
+            set_key = dependency_set_key(entity_type, entity_id)
+            pipe.zadd(set_key, {key: expires})
+            pipe.zremrangebyscore(set_key, '-inf', now)     # forget keys that have expired since we added them
+            pipe.expire(set_key, DEPENDENCY_SET_TTL)
+        pipe.execute()
+
+    def tracking_creator(self, key, creator):
+        """
+        Wrap a dogpile creator function so that once the value is generated we remember which entities it depends on.
+        """
+        if (self.client is None) or (namespace_of_key(key) not in self._namespaces):
+            return creator
+
+        @wraps(creator)
+        def wrapper(*args, **kwargs):
+            value = creator(*args, **kwargs)
+            try:
+                entities = self._entities_for_call(key, args, kwargs)
+                if len(entities) > 0:
+                    self._record(key, entities)
+            except Exception as e:
+                # the worst case here is a stale value that lives until its normal TTL, so don't fail the request
+                logger.warning("Couldn't record cache dependencies for {}".format(key))
+                logger.exception(e)
+            return value
+        return wrapper
+
+    def pop_dependent_keys(self, entity_type, entity_ids):
+        """
+        Return (and forget) every key that depends on any of these entities and hasn't expired yet.
+        """
+        if entity_type not in ENTITY_TYPES:
+            raise ValueError("Unknown cache dependency '{}'".format(entity_type))
+        set_keys = [dependency_set_key(entity_type, entity_id) for entity_id in _as_id_list(entity_ids)]
+        if (self.client is None) or (len(set_keys) == 0):
+            return []
+        pipe = self.client.pipeline()   # transaction, so nothing added in between a read and the delete gets lost
+        for set_key in set_keys:
+            pipe.zrangebyscore(set_key, time.time(), '+inf')
+        pipe.delete(*set_keys)
+        results = pipe.execute()
+        keys = set()
+        for members in results[:-1]:
+            keys.update([k.decode('utf-8') if isinstance(k, bytes) else k for k in members])
+        return sorted(keys)
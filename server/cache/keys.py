@@ -0,0 +1,120 @@
+import hashlib
+import inspect
+import threading
+
+# any single argument that renders longer than this gets replaced by a digest in the cache key (big solr queries with
+# thousands of media_id clauses, long lists of ids, etc.)
+MAX_KEY_ARG_LENGTH = 128
+
+SELF_ARG_NAMES = ('self', 'cls')
+
+
+class KeyStats:
+    """
+    Running totals about the keys we generate, so we can keep an eye on how big they are.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.keys = 0
+        self.total_bytes = 0
+        self.max_bytes = 0
+        self.digested_args = 0
+
+    def record(self, key, digested_args):
+        size = len(key)
+        with self._lock:
+            self.keys += 1
+            self.total_bytes += size
+            self.max_bytes = max(self.max_bytes, size)
+            self.digested_args += digested_args
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'keys': self.keys,
+                'avg_bytes': float(self.total_bytes) / self.keys if self.keys > 0 else 0,
+                'max_bytes': self.max_bytes,
+                'digested_args': self.digested_args,
+            }
+
+
+key_stats = KeyStats()
+
+
+def _is_empty(value):
+    return (value is None) or (value == '') or (isinstance(value, (list, tuple, set, dict)) and len(value) == 0)
+
+
+def canonical_value(value):
+    """
+    Render an argument as a string that doesn't depend on dict ordering, and that treats None and empty values
+    (None, '', [], {}) as the same thing.
+    """
+    if _is_empty(value):
+        return ''
+    if isinstance(value, dict):
+        return '{' + ','.join(['{}:{}'.format(k, canonical_value(value[k])) for k in sorted(value, key=str)]) + '}'
+    if isinstance(value, (set, frozenset)):
+        return '{' + ','.join(sorted([canonical_value(v) for v in value])) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ','.join([canonical_value(v) for v in value]) + ']'
+    return '{}'.format(value)
+
+
+def _digest_if_long(value_str):
+    if len(value_str) <= MAX_KEY_ARG_LENGTH:
+        return value_str, 0
+    return 'sha1:' + hashlib.sha1(value_str.encode('utf-8')).hexdigest(), 1
+
+
+def function_namespace(fn):
+    """
+    The part of every key that identifies the cached function (ie. "server.views.apicache:_cached_tag").
+    """
+    return '%s:%s' % (fn.__module__, fn.__name__)
+
+
+def namespace_of_key(key):
+    # keys always start with the function namespace, followed by a '|'
+    return key.split('|', 1)[0]
+
+
+def keyword_safe_key_generator(namespace, fn):
+    """
+    Can't use the default dogpile.cache one because it doesn't respect keyworded args. This one binds the call to the
+    function's signature first, so the same logical call always maps to the same key no matter if arguments were
+    passed by position or by keyword, in what order, or left to their defaults.
+    """
+    if namespace is None:
+        namespace = function_namespace(fn)
+    else:
+        namespace = '%s|%s' % (function_namespace(fn), namespace)
+
+    signature = inspect.signature(fn)
+    params = signature.parameters
+
+    def generate_key(*fn_args, **kw):
+        bound = signature.bind(*fn_args, **kw)
+        bound.apply_defaults()
+        parts = []
+        digested = 0
+        for name, value in bound.arguments.items():
+            if name in SELF_ARG_NAMES:
+                continue
+            kind = params[name].kind
+            if kind == inspect.Parameter.VAR_KEYWORD:
+                # passing an empty keyword arg through to the API client is the same as not passing it
+                items = sorted([(k, v) for k, v in value.items() if not _is_empty(v)])
+            elif kind == inspect.Parameter.VAR_POSITIONAL:
+                items = [("{}{}".format(name, idx), v) for idx, v in enumerate(value)]
+            else:
+                items = [(name, value)]
+            for arg_name, arg_value in items:
+                value_str, was_digested = _digest_if_long(canonical_value(arg_value))
+                digested += was_digested
+                parts.append("{}={}".format(arg_name, value_str))
+        key = namespace + "|" + " ".join(parts)
+        key_stats.record(key, digested)
+        return key
+    return generate_key
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# the hit, miss, eviction and expiration counters for the stats page are plain attributes
+class LRUCache:  # pylint: disable=too-many-instance-attributes
+    """
+    A small thread-safe, in-process LRU store for serialized cache values. Entries are bounded by count, by total
+    size in bytes, and by a per-entry time-to-live. Values are expected to be bytes so callers always get back a fresh
+    copy when they deserialize (just like they would from Redis) and can't mutate a shared object by accident.
+    """
+
+    def __init__(self, max_items, max_bytes, ttl):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at < now:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        size = len(value)
+        if size > self.max_bytes:
+            return False
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value)
+            self._size += size
+            while (len(self._entries) > self.max_items) or (self._size > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+        return True
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        # caller must hold the lock
+        _expires_at, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._entries),
+                'bytes': self._size,
+                'max_items': self.max_items,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
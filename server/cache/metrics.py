@@ -0,0 +1,155 @@
+import threading
+import time
+from functools import wraps
+
+from dogpile.cache.api import NO_VALUE
+from dogpile.cache.proxy import ProxyBackend
+
+from server.cache.keys import namespace_of_key
+
+COUNTERS = ['hits', 'misses', 'get_seconds', 'sets', 'set_seconds', 'bytes_written', 'max_value_bytes',
+            'generations', 'generation_seconds', 'generation_errors', 'coalesced', 'errors_cached',
+            'errors_suppressed']
+
+PROMETHEUS_PREFIX = 'webtools_cache_'
+
+
+class NamespaceMetrics:
+    """
+    Running counters for each cached function namespace (ie. "server.views.apicache:_cached_tag"), so we can tell which
+    caches pay off and which just take up memory. These are per-process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._namespaces = {}
+
+    def _counts(self, key):
+        namespace = namespace_of_key(key)
+        if namespace not in self._namespaces:
+            self._namespaces[namespace] = {c: 0 for c in COUNTERS}
+        return self._namespaces[namespace]
+
+    def record_get(self, key, hit, seconds):
+        with self._lock:
+            counts = self._counts(key)
+            counts['hits' if hit else 'misses'] += 1
+            counts['get_seconds'] += seconds
+
+    def record_set(self, key, seconds):
+        with self._lock:
+            counts = self._counts(key)
+            counts['sets'] += 1
+            counts['set_seconds'] += seconds
+
+    def record_size(self, key, size):
+        with self._lock:
+            counts = self._counts(key)
+            counts['bytes_written'] += size
+            counts['max_value_bytes'] = max(counts['max_value_bytes'], size)
+
+    def record_generation(self, key, seconds, failed=False):
+        with self._lock:
+            counts = self._counts(key)
+            counts['generations'] += 1
+            counts['generation_seconds'] += seconds
+            if failed:
+                counts['generation_errors'] += 1
+
+    def record_coalesced(self, key):
+        with self._lock:
+            self._counts(key)['coalesced'] += 1
+
+    def record_error_cached(self, key):
+        with self._lock:
+            self._counts(key)['errors_cached'] += 1
+
+    def record_error_suppressed(self, key):
+        with self._lock:
+            self._counts(key)['errors_suppressed'] += 1
+
+    def timed_creator(self, key, creator):
+        """
+        Wrap a dogpile creator function so we know how long it takes to generate the value for this key.
+        """
+        @wraps(creator)
+        def wrapper(*args, **kwargs):
+            start = time.time()
+            try:
+                value = creator(*args, **kwargs)
+            except Exception:
+                self.record_generation(key, time.time() - start, failed=True)
+                raise
+            self.record_generation(key, time.time() - start)
+            return value
+        return wrapper
+
+    def as_dict(self):
+        with self._lock:
+            results = {}
+            for namespace, counts in self._namespaces.items():
+                info = dict(counts)
+                gets = counts['hits'] + counts['misses']
+                info['hit_ratio'] = float(counts['hits']) / gets if gets > 0 else 0
+                info['avg_get_ms'] = 1000 * counts['get_seconds'] / gets if gets > 0 else 0
+                info['avg_value_bytes'] = float(counts['bytes_written']) / counts['sets'] if counts['sets'] > 0 else 0
+                info['avg_generation_ms'] = 1000 * counts['generation_seconds'] / counts['generations'] \
+                    if counts['generations'] > 0 else 0
+                results[namespace] = info
+            return results
+
+    def as_prometheus(self):
+        """
+        The same counters in the Prometheus text exposition format, with the namespace as a label.
+        """
+        with self._lock:
+            snapshot = {ns: dict(counts) for ns, counts in self._namespaces.items()}
+        lines = []
+        for counter in COUNTERS:
+            metric = PROMETHEUS_PREFIX + counter
+            lines.append('# TYPE {} {}'.format(metric, 'gauge' if counter == 'max_value_bytes' else 'counter'))
+            for namespace in sorted(snapshot):
+                lines.append('{}{{namespace="{}"}} {}'.format(metric, _escape_label(namespace),
+                                                               snapshot[namespace][counter]))
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsProxy(ProxyBackend):
+    """
+    Outermost wrapper on the cache backend, timing every lookup and write and counting hits and misses per namespace.
+    A hit here means the value came from either tier (local or Redis).
+    """
+
+    def __init__(self, metrics):
+        super().__init__()
+        self.metrics = metrics
+
+    def get(self, key):
+        start = time.time()
+        value = self.proxied.get(key)
+        self.metrics.record_get(key, value is not NO_VALUE, time.time() - start)
+        return value
+
+    def get_multi(self, keys):
+        start = time.time()
+        values = self.proxied.get_multi(keys)
+        seconds = (time.time() - start) / len(keys) if keys else 0
+        for key, value in zip(keys, values):
+            self.metrics.record_get(key, value is not NO_VALUE, seconds)
+        return values
+
+    def set(self, key, value):
+        start = time.time()
+        self.proxied.set(key, value)
+        self.metrics.record_set(key, time.time() - start)
+
+    def set_multi(self, mapping):
+        start = time.time()
+        self.proxied.set_multi(mapping)
+        seconds = (time.time() - start) / len(mapping) if mapping else 0
+        for key in mapping:
+            self.metrics.record_set(key, seconds)
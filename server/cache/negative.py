@@ -0,0 +1,63 @@
+import logging
+from functools import wraps
+
+from server.cache.keys import namespace_of_key
+
+logger = logging.getLogger(__name__)
+
+# how long (in seconds) to remember that a call failed, by default
+DEFAULT_ERROR_TTL = 60
+
+
+class CachedError:
+    """
+    What we store in the cache in place of a result when the call failed with one of the errors a function said it
+    wants cached. The exception itself is kept so it can be re-raised (attributes like `status_code` included).
+    """
+
+    def __init__(self, error, ttl):
+        self.error = error
+        self.ttl = ttl
+
+
+class NegativeCache:
+    """
+    Lets a cached function remember for a short time that a call failed with a known error (ie. an MCException
+    because the topic has no timespans yet), so we don't hit the failing back-end again on every page view.
+    """
+
+    def __init__(self, metrics, default_ttl=DEFAULT_ERROR_TTL):
+        self.metrics = metrics
+        self.default_ttl = default_ttl
+        self._namespaces = {}   # function namespace -> (tuple of error classes, ttl or None for the default)
+
+    def register(self, namespace, error_classes, ttl=None):
+        self._namespaces[namespace] = (tuple(error_classes), ttl)
+
+    def caching_creator(self, key, creator, fresh_errors):
+        """
+        Wrap a dogpile creator function so any of the registered errors get returned (and so cached) as a CachedError
+        instead of being raised. Each one created is added to `fresh_errors`, so we can tell them from cached ones.
+        """
+        if namespace_of_key(key) not in self._namespaces:
+            return creator
+        error_classes, ttl = self._namespaces[namespace_of_key(key)]
+
+        @wraps(creator)
+        def wrapper(*args, **kwargs):
+            try:
+                return creator(*args, **kwargs)
+            except error_classes as e:
+                marker = CachedError(e, ttl or self.default_ttl)
+                fresh_errors.append(marker)
+                self.metrics.record_error_cached(key)
+                return marker
+        return wrapper
+
+    def raise_if_error(self, key, value, fresh_errors):
+        if isinstance(value, CachedError):
+            if len(fresh_errors) == 0:
+                # we didn't call the back-end this time, we just remembered it failed recently
+                self.metrics.record_error_suppressed(key)
+            raise value.error
+        return value
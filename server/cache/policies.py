@@ -0,0 +1,84 @@
+import logging
+import threading
+
+from server.cache.keys import namespace_of_key
+
+logger = logging.getLogger(__name__)
+
+# How long cached results should live, based on how likely they are to change. Pass one of these in to
+# `cache.cache_on_arguments(expiration_class=...)`; anything not marked uses EXPIRE_DEFAULT.
+EXPIRE_IMMUTABLE = 'immutable'  # never changes once it exists (ie. a generated map file, a word2vec model lookup)
+EXPIRE_SNAPSHOT = 'snapshot'    # fixed for a topic snapshot/timespan (ie. paging through a timespan's stories)
+EXPIRE_DEFAULT = 'default'      # the historical 3 day cache
+EXPIRE_LIVE = 'live'            # depends on "now" or on recent ingest (ie. "stories in the last month" counts)
+EXPIRE_USER = 'user'            # keyed by a user's API key, so rarely reused by anyone else
+
+DEFAULT_TTLS = {
+    EXPIRE_IMMUTABLE: 60*60*24*30,  # 30 days
+    EXPIRE_SNAPSHOT: 60*60*24*7,    # 7 days
+    EXPIRE_DEFAULT: 60*60*24*3,     # 3 days
+    EXPIRE_LIVE: 60*60*4,           # 4 hours
+    EXPIRE_USER: 60*60*24,          # 1 day
+}
+
+
+class ExpirationPolicies:
+    """
+    Maps each cached function to an expiration class, so the backend can pick the right Redis TTL for each key. Also
+    keeps track of how much each class is writing, so we can see where our Redis memory goes.
+    """
+
+    def __init__(self, ttls=None):
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self._namespaces = {}   # function namespace -> expiration class
+        self._lock = threading.Lock()
+        self._writes = {c: {'values': 0, 'bytes': 0} for c in self.ttls}
+
+    def assign(self, namespace, expiration_class):
+        if expiration_class not in self.ttls:
+            raise ValueError("Unknown cache expiration class '{}'".format(expiration_class))
+        self._namespaces[namespace] = expiration_class
+
+    def class_for_key(self, key):
+        return self._namespaces.get(namespace_of_key(key), EXPIRE_DEFAULT)
+
+    def ttl_for_key(self, key):
+        return self.ttls[self.class_for_key(key)]
+
+    def record_write(self, key, size):
+        with self._lock:
+            counts = self._writes[self.class_for_key(key)]
+            counts['values'] += 1
+            counts['bytes'] += size
+
+    def stats(self):
+        with self._lock:
+            return {c: {'ttl': self.ttls[c], 'values_written': w['values'], 'bytes_written': w['bytes']}
+                    for c, w in self._writes.items()}
+
+    def memory_usage(self, client, sample_size=1000):
+        """
+        Estimate how much Redis memory each expiration class is holding right now, by sampling keys with SCAN and
+        asking Redis for the MEMORY USAGE of each one. This talks to Redis a lot, so only use it for admin reporting.
+        """
+        usage = {c: {'sampled_keys': 0, 'sampled_bytes': 0} for c in self.ttls}
+        sampled = 0
+        for raw_key in client.scan_iter(count=500):
+            if sampled >= sample_size:
+                break
+            key = raw_key.decode('utf-8', 'replace') if isinstance(raw_key, bytes) else raw_key
+            if key.startswith('_lock'):
+                continue
+            size = client.memory_usage(raw_key) or 0
+            counts = usage[self.class_for_key(key)]
+            counts['sampled_keys'] += 1
+            counts['sampled_bytes'] += size
+            sampled += 1
+        # scale the sample up to the whole keyspace
+        total_keys = client.dbsize()
+        scale = float(total_keys) / sampled if sampled > 0 else 0
+        for counts in usage.values():
+            counts['estimated_keys'] = int(counts['sampled_keys'] * scale)
+            counts['estimated_bytes'] = int(counts['sampled_bytes'] * scale)
+        return usage
@@ -0,0 +1,81 @@
+import logging
+import threading
+
+from server.cache.negative import CachedError
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """
+    A dogpile `async_creation_runner`: when a value is past its soft TTL (the `expiration_time` on the cached function)
+    dogpile hands us the creation lock, and the stale value is returned to the caller right away while we regenerate
+    it on the shared executor pool. Because dogpile only calls this once it holds the (distributed) lock for the key,
+    there is only ever one refresh running per key. The lock is released from the pool thread when the refresh is
+    done, which is why the Redis backend hands out locks that aren't tied to one thread (see `server.cache.backends`).
+    """
+
+    def __init__(self, pool=None):
+        """
+        :param pool: something with a `submit` method to run refreshes on (defaults to the shared `server.executor`)
+        """
+        self._pool = pool
+        self._lock = threading.Lock()
+        self.started = 0
+        self.succeeded = 0
+        self.failed = 0
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def _submit(self, fn):
+        pool = self._pool
+        if pool is None:
+            from server import executor     # pylint: disable=import-outside-toplevel
+            pool = executor
+        return pool.submit(fn)
+
+    def __call__(self, region, key, creator, mutex):
+        def refresh():
+            try:
+                value = creator()
+                if isinstance(value, CachedError):
+                    # the refresh failed with an error the function remembers (see `cache_errors`); keep serving the
+                    # stale value instead of replacing it with the error
+                    self._count('failed')
+                    logger.warning("Background cache refresh failed for {}: {}".format(key, value.error))
+                else:
+                    region.set(key, value)
+                    self._count('succeeded')
+            except Exception as e:
+                # the stale value stays in place, so the next caller past the soft TTL will just try again
+                self._count('failed')
+                logger.warning("Background cache refresh failed for {}".format(key))
+                logger.exception(e)
+            finally:
+                _release(mutex)
+        self._count('started')
+        try:
+            self._submit(refresh)
+        except Exception as e:
+            self._count('failed')
+            logger.exception(e)
+            _release(mutex)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'started': self.started,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+            }
+
+
+def _release(mutex):
+    try:
+        mutex.release()
+    except Exception as e:
+        # ie. the redis lock timed out while we were regenerating; nobody can refresh this key until it expires
+        logger.error("Couldn't release cache lock: {}".format(e))
+        raise
@@ -0,0 +1,103 @@
+from dogpile.cache.api import NO_VALUE
+from dogpile.cache.region import CacheRegion
+
+from server.cache.dependencies import DependencyIndex
+from server.cache.keys import function_namespace
+from server.cache.metrics import NamespaceMetrics
+from server.cache.negative import NegativeCache, CachedError
+from server.cache.policies import ExpirationPolicies
+from server.cache.singleflight import SingleFlight
+
+
+class WebToolsCacheRegion(CacheRegion):
+    """
+    A dogpile CacheRegion with a few extra options on `cache_on_arguments` for how we want each function cached.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.policies = ExpirationPolicies()
+        self.metrics = NamespaceMetrics()
+        self.dependencies = DependencyIndex(self.policies.ttl_for_key)
+        self.single_flight = SingleFlight(on_coalesced=self.metrics.record_coalesced)
+        self.negative = NegativeCache(self.metrics)
+
+    def get_or_create(self, key, creator, expiration_time=None, should_cache_fn=None, creator_args=None):
+        # time how long it takes to generate each value, cache known errors, and remember what it depends on (both
+        # inline and background refreshes go through here)
+        fresh_errors = []
+        creator = self.metrics.timed_creator(key, creator)
+        creator = self.negative.caching_creator(key, creator, fresh_errors)
+        creator = self.dependencies.tracking_creator(key, creator)
+        # identical calls running at the same time in this process share one lookup
+        get_or_create = super().get_or_create
+        value = self.single_flight.do(key, lambda: get_or_create(key, creator, expiration_time=expiration_time,
+                                                                 should_cache_fn=should_cache_fn,
+                                                                 creator_args=creator_args))
+        return self.negative.raise_if_error(key, value, fresh_errors)
+
+    def invalidate_dependents(self, **entities):
+        """
+        Delete every cached value that depends on any of these entities, for all users, ie.
+        `cache.invalidate_dependents(tags_id=collection_id, media_id=[1, 2])`. Returns how many keys were deleted.
+        """
+        keys = []
+        for entity_type, entity_ids in entities.items():
+            keys += self.dependencies.pop_dependent_keys(entity_type, entity_ids)
+        keys = sorted(set(keys))
+        if len(keys) > 0:
+            self.delete_multi(keys)
+        return len(keys)
+
+    # same positional arguments as dogpile's, the keyword-only ones after them are our additions
+    def cache_on_arguments(self, namespace=None, expiration_time=None, should_cache_fn=None, to_str=str,  # pylint: disable=arguments-differ
+                           function_key_generator=None, *, expiration_class=None, soft_ttl=None, depends_on=None,
+                           cache_errors=None, error_ttl=None):
+        """
+        Same as the dogpile decorator, plus:
+        :param expiration_class: one of the `server.cache.policies.EXPIRE_*` constants, which controls how long
+        results live in Redis (defaults to EXPIRE_DEFAULT)
+        :param soft_ttl: seconds after which a cached result is considered stale; stale results are still returned
+        right away, but get regenerated in the background (see `server.cache.refresh`). Should be shorter than the
+        expiration class TTL, otherwise the value is gone from Redis before it ever goes stale.
+        :param depends_on: which entities the result depends on, so `invalidate_dependents` can clear it; either a list
+        of argument names that are also entity types (ie. `['tags_id']`), or a dict of entity type to argument name or
+        to a function that gets the ids from the call's arguments (see `server.cache.dependencies`)
+        :param cache_errors: a list of exception classes that should be remembered for a short time when the function
+        raises them, so calls with the same arguments re-raise right away instead of hitting the back-end again
+        :param error_ttl: how long (in seconds) to remember those errors for (defaults to `CACHE_ERROR_TTL`)
+        """
+        if soft_ttl is not None:
+            expiration_time = soft_ttl
+        dogpile_decorator = super().cache_on_arguments(namespace=namespace, expiration_time=expiration_time,
+                                                       should_cache_fn=should_cache_fn, to_str=to_str,
+                                                       function_key_generator=function_key_generator)
+
+        def decorator(fn):
+            if expiration_class is not None:
+                self.policies.assign(function_namespace(fn), expiration_class)
+            if depends_on is not None:
+                self.dependencies.register(function_namespace(fn), fn, depends_on)
+            if cache_errors is not None:
+                self.negative.register(function_namespace(fn), cache_errors, error_ttl)
+            decorated = dogpile_decorator(fn)
+            decorated.cache_key = (function_key_generator or self.function_key_generator)(namespace, fn)
+            decorated.soft_ttl = soft_ttl
+            return decorated
+        return decorator
+
+    def get_cached_each(self, cached_fn, calls):
+        """
+        Look up many calls to a function decorated with `cache_on_arguments` at once, with one multi-get (so one Redis
+        MGET for everything not in the local tier). Nothing is generated here; the caller decides how to fill in the
+        misses (ie. by calling `cached_fn` for each of them, so they get cached like normal).
+        :param calls: a list of tuples of positional arguments, one per call
+        :return: the cached values, in the same order as `calls`, with `NO_VALUE` for each miss (and for each call that
+        recently failed with a cached error, so the caller's regular call re-raises it for just that one)
+        """
+        if len(calls) == 0:
+            return []
+        keys = [cached_fn.cache_key(*args) for args in calls]
+        # anything past its soft TTL counts as a miss here, so the caller's regular call returns it and refreshes it
+        values = self.get_multi(keys, expiration_time=getattr(cached_fn, 'soft_ttl', None))
+        return [NO_VALUE if isinstance(value, CachedError) else value for value in values]
@@ -0,0 +1,145 @@
+import json
+import pickle
+import threading
+import zlib
+
+from dogpile.cache.api import CachedValue
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Everything we write starts with this header: MAGIC + one byte for the codec + one byte for the compression.
+# Values written before this existed are plain pickles (which always start with b'\x80'), so we can still read them.
+MAGIC = b'WT'
+
+CODEC_PICKLE = b'p'
+CODEC_JSON = b'j'
+CODEC_MSGPACK = b'm'
+
+COMPRESSION_NONE = b'-'
+COMPRESSION_ZLIB = b'z'
+COMPRESSION_ZSTD = b's'
+
+CODECS = {'pickle': CODEC_PICKLE, 'json': CODEC_JSON, 'msgpack': CODEC_MSGPACK}
+COMPRESSIONS = {'none': COMPRESSION_NONE, 'zlib': COMPRESSION_ZLIB, 'zstd': COMPRESSION_ZSTD}
+
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _is_plain_data(value, allow_bytes=False):
+    """
+    Would this value come back exactly the same after a trip through json (or msgpack)? That means only dicts with
+    string keys, lists, and scalars - no tuples, sets, dates, or int-keyed dicts that would silently change type.
+    """
+    to_check = [value]
+    while to_check:
+        item = to_check.pop()
+        if isinstance(item, _JSON_SCALARS):
+            continue
+        if allow_bytes and isinstance(item, bytes):
+            continue
+        if type(item) is list:  # pylint: disable=unidiomatic-typecheck
+            to_check.extend(item)
+        elif type(item) is dict:  # pylint: disable=unidiomatic-typecheck
+            for k, v in item.items():
+                if not isinstance(k, str):
+                    return False
+                to_check.append(v)
+        else:
+            return False
+    return True
+
+
+# the codec settings and the counters for the stats page are plain attributes
+class CacheValueSerializer:  # pylint: disable=too-many-instance-attributes
+    """
+    Turns dogpile CachedValues into compact bytes for the Redis backend. The payload is encoded with the configured
+    codec (json or msgpack) when it is plain data, and falls back to pickle when it isn't. Anything bigger than
+    `compress_threshold` bytes is compressed.
+    """
+
+    def __init__(self, codec='json', compression='zlib', compress_threshold=1024, level=3):
+        if codec not in CODECS:
+            raise ValueError("Unknown cache serializer codec '{}'".format(codec))
+        if compression not in COMPRESSIONS:
+            raise ValueError("Unknown cache serializer compression '{}'".format(compression))
+        if (codec == 'msgpack') and (msgpack is None):
+            raise ValueError("The msgpack cache codec requires the msgpack package")
+        if (compression == 'zstd') and (zstandard is None):
+            raise ValueError("zstd cache compression requires the zstandard package")
+        self.codec = CODECS[codec]
+        self.compression = COMPRESSIONS[compression]
+        self.compress_threshold = compress_threshold
+        self.level = level
+        self._lock = threading.Lock()
+        self.values_written = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.pickle_fallbacks = 0
+
+    def dumps(self, value):
+        codec, encoded = self._encode([value.payload, value.metadata])
+        compression = COMPRESSION_NONE
+        data = encoded
+        if (self.compression != COMPRESSION_NONE) and (len(encoded) > self.compress_threshold):
+            compression = self.compression
+            data = self._compress(encoded)
+        with self._lock:
+            self.values_written += 1
+            self.raw_bytes += len(encoded)
+            self.stored_bytes += len(data)
+            if codec != self.codec:
+                self.pickle_fallbacks += 1
+        return MAGIC + codec + compression + data
+
+    def loads(self, data):
+        if data[:2] != MAGIC:
+            return pickle.loads(data)   # written before we had this serializer
+        codec = data[2:3]
+        compression = data[3:4]
+        encoded = self._decompress(compression, data[4:])
+        if codec == CODEC_JSON:
+            payload, metadata = json.loads(encoded.decode('utf-8'))
+        elif codec == CODEC_MSGPACK:
+            payload, metadata = msgpack.unpackb(encoded, raw=False)
+        else:
+            payload, metadata = pickle.loads(encoded)
+        return CachedValue(payload, metadata)
+
+    def _encode(self, value):
+        if (self.codec == CODEC_JSON) and _is_plain_data(value):
+            return CODEC_JSON, json.dumps(value, separators=(',', ':')).encode('utf-8')
+        if (self.codec == CODEC_MSGPACK) and _is_plain_data(value, allow_bytes=True):
+            return CODEC_MSGPACK, msgpack.packb(value, use_bin_type=True)
+        return CODEC_PICKLE, pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+    def _compress(self, data):
+        if self.compression == COMPRESSION_ZSTD:
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, self.level)
+
+    @classmethod
+    def _decompress(cls, compression, data):
+        if compression == COMPRESSION_ZLIB:
+            return zlib.decompress(data)
+        if compression == COMPRESSION_ZSTD:
+            if zstandard is None:
+                raise ValueError("Found a zstd compressed cache value, but the zstandard package isn't installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def stats(self):
+        with self._lock:
+            return {
+                'values_written': self.values_written,
+                'raw_bytes': self.raw_bytes,
+                'stored_bytes': self.stored_bytes,
+                'compression_ratio': float(self.raw_bytes) / self.stored_bytes if self.stored_bytes > 0 else 0,
+                'pickle_fallbacks': self.pickle_fallbacks,
+            }
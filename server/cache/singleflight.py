@@ -0,0 +1,99 @@
+import pickle
+import threading
+
+
+class InterruptedLookupError(Exception):
+    """
+    What callers waiting on a shared lookup get if the caller doing it was interrupted (ie. by a gevent timeout).
+    """
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.thread_id = threading.get_ident()
+        self.waiters = 0
+        self.data = None        # pickled result, so each waiter gets its own copy to mutate
+        self.value = None       # only used if the result can't be pickled
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Makes concurrent callers in this process asking for the same key share one lookup. The first caller does the work
+    (checking the cache, and generating the value if needed); everyone else who asks for that key while it is running
+    just waits for that result instead of piling up on the Redis lock or the upstream API.
+    """
+
+    def __init__(self, on_coalesced=None):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._on_coalesced = on_coalesced
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            # a creator asking for its own key again would otherwise wait on itself forever
+            reentrant = (call is not None) and (call.thread_id == threading.get_ident())
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+                self.leaders += 1
+            elif not reentrant:
+                call.waiters += 1
+                self.coalesced += 1
+        if reentrant:
+            return fn()
+        if is_leader:
+            return self._lead(key, call, fn)
+        if self._on_coalesced is not None:
+            self._on_coalesced(key)
+        return self._wait(call)
+
+    def _lead(self, key, call, fn):
+        # whatever happens (including a gevent.Timeout or GreenletExit, which aren't Exceptions), the key has to be
+        # released and the waiters woken up, otherwise everyone asking for it later blocks forever
+        try:
+            value = fn()
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            if waiters > 0:
+                try:
+                    call.data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                except Exception:   # pylint: disable=broad-except
+                    call.value = value
+            return value
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException as e:
+            # the waiters weren't interrupted themselves, so they just see this lookup as failed
+            call.error = InterruptedLookupError("The lookup for {} was interrupted ({})".format(key, repr(e)))
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    @staticmethod
+    def _wait(call):
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        if call.data is not None:
+            return pickle.loads(call.data)
+        return call.value
+
+    def stats(self):
+        with self._lock:
+            return {
+                'leaders': self.leaders,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls),
+            }
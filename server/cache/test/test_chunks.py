@@ -0,0 +1,50 @@
+import os
+import unittest
+
+from server.cache.chunks import ChunkedStorage, is_manifest, parse_manifest, chunk_keys
+
+KEY = 'server.util.tags:cached_media_with_tag|tags_id=58722749'
+
+
+class ChunkedStorageTest(unittest.TestCase):
+
+    def setUp(self):
+        self.chunking = ChunkedStorage(chunk_size=1000)
+        self.data = os.urandom(3500)
+
+    def testSmallValuesAreNotChunked(self):
+        assert not self.chunking.needs_chunking(b'x' * 1000)
+        assert self.chunking.needs_chunking(self.data)
+        assert not ChunkedStorage(chunk_size=0).needs_chunking(self.data)
+
+    def testRoundTrip(self):
+        manifest_data, chunks = self.chunking.split(KEY, self.data)
+        assert is_manifest(manifest_data)
+        assert not is_manifest(b'WTj-{}')
+        manifest = parse_manifest(manifest_data)
+        assert manifest['chunks'] == 4
+        assert [k for k, _ in chunks] == chunk_keys(KEY, manifest)
+        assert chunks[0][0].startswith(KEY + '|chunk:')
+        assert self.chunking.assemble(KEY, manifest, [c for _, c in chunks]) == self.data
+
+    def testMissingChunk(self):
+        manifest_data, chunks = self.chunking.split(KEY, self.data)
+        pieces = [c for _, c in chunks]
+        pieces[2] = None
+        assert self.chunking.assemble(KEY, parse_manifest(manifest_data), pieces) is None
+        assert self.chunking.stats()['integrity_failures'] == 1
+
+    def testCorruptChunk(self):
+        manifest_data, chunks = self.chunking.split(KEY, self.data)
+        pieces = [c for _, c in chunks]
+        pieces[1] = b'\0' * len(pieces[1])
+        assert self.chunking.assemble(KEY, parse_manifest(manifest_data), pieces) is None
+
+    def testDifferentValuesGetDifferentChunkKeys(self):
+        _, chunks1 = self.chunking.split(KEY, self.data)
+        _, chunks2 = self.chunking.split(KEY, os.urandom(3500))
+        assert chunks1[0][0] != chunks2[0][0]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+# pylint: disable=protected-access,unused-argument
+
+import unittest
+
+from server.cache.dependencies import DependencyIndex, ids_in_query, dependency_set_key
+
+
+def _topic_story_count(user_mc_key, topics_id, **kwargs):
+    return 0
+
+
+def _source_story_count(query):
+    return 0
+
+
+NAMESPACE = 'server.views.topics.apicache:_topic_story_count'
+
+
+class _RecordingPipeline:
+
+    def __init__(self, results=None):
+        self.calls = []
+        self.results = results or []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, ) + args)
+
+    def execute(self):
+        return self.results
+
+
+class _RecordingClient:
+
+    def __init__(self, results=None):
+        self.pipe = _RecordingPipeline(results)
+
+    def pipeline(self, transaction=True):
+        return self.pipe
+
+
+class DependencyIndexTest(unittest.TestCase):
+
+    def testIdsInQuery(self):
+        extract = ids_in_query('q', 'media_id')
+        assert extract({'q': 'media_id:1234'}) == ['1234']
+        assert extract({'q': '(media_id:(1 OR 2 OR 3)) AND tags_id_media:9'}) == ['1', '2', '3']
+        assert extract({'q': 'media_id:(1 2 3) OR tags_id_media:(9)'}) == ['1', '2', '3']     # ie. from media_picker
+        assert extract({'q': 'tags_id_media:9'}) == []
+        assert extract({'q': None}) == []
+
+    def testEntitiesFromArgsAndKwargs(self):
+        index = DependencyIndex()
+        index.register(NAMESPACE, _topic_story_count, ['topics_id', 'snapshots_id'])
+        entities = index._entities_for_call(NAMESPACE + '|x', ('abc', 12), {'snapshots_id': 34, 'q': 'obama'})
+        assert sorted(entities) == [('snapshots_id', 34), ('topics_id', 12)]
+        entities = index._entities_for_call(NAMESPACE + '|x', ('abc',), {'topics_id': 12})
+        assert entities == [('topics_id', 12)]
+
+    def testEntitiesFromQuery(self):
+        index = DependencyIndex()
+        namespace = 'server.views.sources.apicache:_source_story_count'
+        index.register(namespace, _source_story_count, {'tags_id': ids_in_query('query', 'tags_id_media')})
+        assert index._entities_for_call(namespace + '|x', ('tags_id_media:(5 OR 6)',), {}) == \
+            [('tags_id', '5'), ('tags_id', '6')]
+
+    def testUnknownEntity(self):
+        index = DependencyIndex()
+        self.assertRaises(ValueError, index.register, NAMESPACE, _topic_story_count, ['stories_id'])
+
+    def testNotTrackedWithoutRedis(self):
+        index = DependencyIndex()
+        index.register(NAMESPACE, _topic_story_count, ['topics_id'])
+        def creator():
+            return 1
+        assert index.tracking_creator(NAMESPACE + '|x', creator) is creator
+
+    def testRecordScoresKeysByExpiry(self):
+        index = DependencyIndex(lambda key: 60)
+        index.client = _RecordingClient()
+        index._record('k', [('tags_id', 9)])
+        calls = index.client.pipe.calls
+        assert [call[0] for call in calls] == ['zadd', 'zremrangebyscore', 'expire']
+        assert calls[0][1:] == (dependency_set_key('tags_id', 9), {'k': calls[1][3] + 60})
+        assert calls[1][2] == '-inf'    # keys that have expired get dropped
+
+    def testPopOnlyReadsLiveKeys(self):
+        index = DependencyIndex()
+        index.client = _RecordingClient(results=[[b'a', b'b'], [b'b'], 2])
+        assert index.pop_dependent_keys('tags_id', [1, 2]) == ['a', 'b']
+        assert [call[0] for call in index.client.pipe.calls] == ['zrangebyscore', 'zrangebyscore', 'delete']
+        assert index.client.pipe.calls[0][3] == '+inf'
+
+    def testSetKey(self):
+        assert dependency_set_key('tags_id', 9) == 'web-tools:cache:dependents:tags_id:9'
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+# pylint: disable=unused-argument
+
+import unittest
+
+from server.cache.keys import keyword_safe_key_generator, MAX_KEY_ARG_LENGTH
+
+
+def _story_count(q, fq, **kwargs):
+    return None
+
+
+def _split_story_counts(q='*', fq=''):
+    return None
+
+
+class KeyGeneratorTest(unittest.TestCase):
+
+    def testKeywordOrderDoesNotMatter(self):
+        generate_key = keyword_safe_key_generator(None, _story_count)
+        key1 = generate_key('obama', None, split=True, http_method='POST')
+        key2 = generate_key(fq=None, q='obama', http_method='POST', split=True)
+        assert key1 == key2
+
+    def testEmptyValuesAreNormalized(self):
+        generate_key = keyword_safe_key_generator(None, _story_count)
+        assert generate_key('obama', None) == generate_key('obama', '')
+        assert generate_key('obama', None) == generate_key('obama', None, split=None)
+
+    def testDefaultsAreApplied(self):
+        generate_key = keyword_safe_key_generator(None, _split_story_counts)
+        assert generate_key() == generate_key('*', None)
+        assert generate_key('obama') != generate_key('trump')
+
+    def testLongArgumentsAreDigested(self):
+        generate_key = keyword_safe_key_generator(None, _story_count)
+        long_query = " OR ".join(["media_id:{}".format(i) for i in range(5000)])
+        key = generate_key(long_query, None)
+        assert len(key) < 2 * MAX_KEY_ARG_LENGTH
+        assert 'sha1:' in key
+        assert key == generate_key(long_query, '')
+        assert key != generate_key(long_query + " OR media_id:1", None)
+
+    def testNamespace(self):
+        generate_key = keyword_safe_key_generator(None, _story_count)
+        assert generate_key('obama', None).startswith('{}:_story_count|'.format(__name__))
+
+
+if __name__ == "__main__":
+    unittest.main()
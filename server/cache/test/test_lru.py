@@ -0,0 +1,56 @@
+import time
+import unittest
+
+from server.cache.lru import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+
+    def testGetAndSet(self):
+        lru = LRUCache(10, 1024, 60)
+        assert lru.get('a') is None
+        lru.set('a', b'123')
+        assert lru.get('a') == b'123'
+        stats = lru.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['bytes'] == 3
+
+    def testEvictsLeastRecentlyUsed(self):
+        lru = LRUCache(2, 1024, 60)
+        lru.set('a', b'1')
+        lru.set('b', b'2')
+        lru.get('a')    # now b is the oldest
+        lru.set('c', b'3')
+        assert lru.get('b') is None
+        assert lru.get('a') == b'1'
+        assert lru.get('c') == b'3'
+        assert lru.stats()['evictions'] == 1
+
+    def testEvictsBySize(self):
+        lru = LRUCache(10, 5, 60)
+        lru.set('a', b'123')
+        lru.set('b', b'456')
+        assert lru.get('a') is None
+        assert lru.stats()['bytes'] == 3
+        assert lru.set('c', b'too big') is False
+
+    def testExpires(self):
+        lru = LRUCache(10, 1024, 0.01)
+        lru.set('a', b'1')
+        time.sleep(0.02)
+        assert lru.get('a') is None
+        assert lru.stats()['expirations'] == 1
+        assert len(lru) == 0
+
+    def testDiscard(self):
+        lru = LRUCache(10, 1024, 60)
+        lru.set('a', b'1')
+        lru.discard('a')
+        lru.discard('not-there')
+        assert lru.get('a') is None
+        assert lru.stats()['bytes'] == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from server.cache.metrics import NamespaceMetrics
+
+TAG_KEY = 'server.views.apicache:_cached_tag|tags_id=1'
+MEDIA_KEY = 'server.views.apicache:_cached_media|media_id=1'
+
+
+class NamespaceMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = NamespaceMetrics()
+
+    def testHitRatio(self):
+        self.metrics.record_get(TAG_KEY, True, 0.001)
+        self.metrics.record_get(TAG_KEY, True, 0.001)
+        self.metrics.record_get(TAG_KEY, False, 0.002)
+        self.metrics.record_get(MEDIA_KEY, False, 0.002)
+        stats = self.metrics.as_dict()
+        assert stats['server.views.apicache:_cached_tag']['hits'] == 2
+        assert stats['server.views.apicache:_cached_tag']['misses'] == 1
+        assert abs(stats['server.views.apicache:_cached_tag']['hit_ratio'] - 2.0/3) < 0.001
+        assert stats['server.views.apicache:_cached_media']['hit_ratio'] == 0
+
+    def testValueSizes(self):
+        self.metrics.record_set(TAG_KEY, 0.001)
+        self.metrics.record_size(TAG_KEY, 100)
+        self.metrics.record_set(TAG_KEY, 0.001)
+        self.metrics.record_size(TAG_KEY, 300)
+        stats = self.metrics.as_dict()['server.views.apicache:_cached_tag']
+        assert stats['bytes_written'] == 400
+        assert stats['max_value_bytes'] == 300
+        assert stats['avg_value_bytes'] == 200
+
+    def testTimedCreator(self):
+        def fail():
+            raise RuntimeError("upstream is down")
+        assert self.metrics.timed_creator(TAG_KEY, lambda x: x + 1)(1) == 2
+        self.assertRaises(RuntimeError, self.metrics.timed_creator(TAG_KEY, fail))
+        stats = self.metrics.as_dict()['server.views.apicache:_cached_tag']
+        assert stats['generations'] == 2
+        assert stats['generation_errors'] == 1
+
+    def testPrometheus(self):
+        self.metrics.record_get(TAG_KEY, True, 0.001)
+        text = self.metrics.as_prometheus()
+        assert '# TYPE webtools_cache_hits counter' in text
+        assert 'webtools_cache_hits{namespace="server.views.apicache:_cached_tag"} 1' in text
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import pickle
+import unittest
+
+from server.cache.metrics import NamespaceMetrics
+from server.cache.negative import NegativeCache, CachedError
+
+NAMESPACE = 'server.views.sources.source:_cached_media_source_health'
+KEY = NAMESPACE + '|_user_mc_key=abc media_id=1'
+
+
+class UpstreamError(Exception):
+
+    def __init__(self, message, status_code=0):
+        Exception.__init__(self, message)
+        self.status_code = status_code
+
+
+class NegativeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = NamespaceMetrics()
+        self.negative = NegativeCache(self.metrics, default_ttl=30)
+        self.negative.register(NAMESPACE, [UpstreamError])
+
+    def _failing(self):
+        raise UpstreamError("no health yet", 404)
+
+    def testKnownErrorIsCached(self):
+        fresh = []
+        marker = self.negative.caching_creator(KEY, self._failing, fresh)()
+        assert isinstance(marker, CachedError)
+        assert marker.ttl == 30
+        assert len(fresh) == 1
+        # the first call still raises the original error
+        self.assertRaises(UpstreamError, self.negative.raise_if_error, KEY, marker, fresh)
+        assert self.metrics.as_dict()[NAMESPACE]['errors_cached'] == 1
+        assert self.metrics.as_dict()[NAMESPACE]['errors_suppressed'] == 0
+
+    def testCachedErrorIsReRaised(self):
+        marker = self.negative.caching_creator(KEY, self._failing, [])()
+        # as if it came back out of redis
+        marker = pickle.loads(pickle.dumps(marker))
+        try:
+            self.negative.raise_if_error(KEY, marker, [])
+            assert False
+        except UpstreamError as e:
+            assert e.status_code == 404
+        assert self.metrics.as_dict()[NAMESPACE]['errors_suppressed'] == 1
+
+    def testOtherErrorsAreNotCached(self):
+        def broken():
+            raise ValueError("bug")
+        self.assertRaises(ValueError, self.negative.caching_creator(KEY, broken, []))
+
+    def testOtherFunctionsAreUntouched(self):
+        def creator():
+            return 1
+        assert self.negative.caching_creator('server.views.apicache:_cached_tag|tags_id=1', creator, []) is creator
+        assert self.negative.raise_if_error(KEY, {'count': 1}, []) == {'count': 1}
+
+
+if __name__ == "__main__":
+    unittest.main()
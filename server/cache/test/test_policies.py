@@ -0,0 +1,35 @@
+import unittest
+
+from server.cache.policies import ExpirationPolicies, EXPIRE_DEFAULT, EXPIRE_IMMUTABLE, EXPIRE_LIVE
+
+
+class ExpirationPoliciesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.policies = ExpirationPolicies(ttls={EXPIRE_LIVE: 60})
+        self.policies.assign('server.views.topics.apicache:_cached_topic_media_map', EXPIRE_IMMUTABLE)
+        self.policies.assign('server.views.sources.apicache:_cached_timeperiod_story_count', EXPIRE_LIVE)
+
+    def testClassForKey(self):
+        key = 'server.views.topics.apicache:_cached_topic_media_map|user_mc_key=abc topics_id=1'
+        assert self.policies.class_for_key(key) == EXPIRE_IMMUTABLE
+        key = 'server.views.apicache:_cached_tag|tags_id=1'
+        assert self.policies.class_for_key(key) == EXPIRE_DEFAULT
+
+    def testTtlForKey(self):
+        key = 'server.views.sources.apicache:_cached_timeperiod_story_count|q=* time_period=x'
+        assert self.policies.ttl_for_key(key) == 60
+
+    def testUnknownClass(self):
+        self.assertRaises(ValueError, self.policies.assign, 'server.views.apicache:_cached_tag', 'forever')
+
+    def testRecordWrite(self):
+        self.policies.record_write('server.views.topics.apicache:_cached_topic_media_map|x', 100)
+        stats = self.policies.stats()
+        assert stats[EXPIRE_IMMUTABLE]['values_written'] == 1
+        assert stats[EXPIRE_IMMUTABLE]['bytes_written'] == 100
+        assert stats[EXPIRE_DEFAULT]['values_written'] == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+
+from server.cache import redis_pool
+from server.cache.keys import keyword_safe_key_generator
+from server.cache.refresh import BackgroundRefresher
+from server.cache.region import WebToolsCacheRegion
+
+
+class BackgroundRefresherTest(unittest.TestCase):
+    """
+    Runs real refreshes against the configured Redis, with the same distributed lock the app uses.
+    """
+
+    def setUp(self):
+        self.client = redis.StrictRedis(connection_pool=redis_pool)
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.refresher = BackgroundRefresher(pool=self.pool)
+        self.region = WebToolsCacheRegion(function_key_generator=keyword_safe_key_generator,
+                                          async_creation_runner=self.refresher)
+        self.region.dependencies.connect(redis_pool)
+        self.region.configure('webtools.redis', arguments={
+            'connection_pool': redis_pool,
+            'distributed_lock': True,
+            'lock_timeout': 60*10,
+        })
+        self.results = [{'version': 1}, {'version': 2}]
+
+        @self.region.cache_on_arguments(namespace='test-refresh', soft_ttl=1, depends_on=['tags_id'],
+                                        cache_errors=[KeyError])
+        def cached_collection(tags_id):
+            result = self.results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return dict(result, tags_id=tags_id)
+        self.cached_collection = cached_collection
+        self.key = cached_collection.cache_key(123)
+        self._clean_up()
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+        self._clean_up()
+
+    def _clean_up(self):
+        self.region.invalidate_dependents(tags_id=123)
+        self.client.delete(self.key, '_lock{}'.format(self.key))
+
+    def _refresh_stale_value(self):
+        time.sleep(1.1)     # past the soft TTL
+        value = self.cached_collection(123)
+        self.pool.submit(lambda: None).result()     # the pool only has one thread, so the refresh is done after this
+        return value
+
+    def testRefreshReleasesLock(self):
+        assert self.cached_collection(123)['version'] == 1
+        assert self._refresh_stale_value()['version'] == 1    # the stale value comes back right away
+        assert self.refresher.stats() == {'started': 1, 'succeeded': 1, 'failed': 0}
+        assert not self.client.exists('_lock{}'.format(self.key))
+        assert self.cached_collection(123)['version'] == 2
+
+    def testFailedRefreshKeepsStaleValue(self):
+        self.results = [{'version': 1}, KeyError(123), {'version': 3}]
+        self.cached_collection(123)
+        self._refresh_stale_value()
+        assert self.refresher.stats() == {'started': 1, 'succeeded': 0, 'failed': 1}
+        assert not self.client.exists('_lock{}'.format(self.key))
+        assert self._refresh_stale_value()['version'] == 1   # not replaced with the error
+        assert self.cached_collection(123)['version'] == 3   # and the next refresh tries again
+
+    def testReadAfterInvalidationDoesNotWaitOnLock(self):
+        self.results = [{'version': 1}, {'version': 2}, {'version': 3}]
+        self.cached_collection(123)
+        self._refresh_stale_value()
+        assert self.region.invalidate_dependents(tags_id=123) == 1
+        # a lock left behind by the refresh would make this read wait for it to time out
+        assert not self.client.exists('_lock{}'.format(self.key))
+        started = time.time()
+        assert self.cached_collection(123)['version'] == 3
+        assert time.time() - started < 5
+
+
+if __name__ == "__main__":
+    unittest.main()
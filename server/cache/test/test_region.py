@@ -0,0 +1,52 @@
+import unittest
+
+from dogpile.cache.api import NO_VALUE
+
+from server.cache.keys import keyword_safe_key_generator
+from server.cache.region import WebToolsCacheRegion
+
+
+class WebToolsCacheRegionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.region = WebToolsCacheRegion(function_key_generator=keyword_safe_key_generator)
+        self.region.configure('dogpile.cache.memory')
+        self.calls = []
+
+        @self.region.cache_on_arguments()
+        def cached_media(mc_api_key, media_id):     # pylint: disable=unused-argument
+            self.calls.append(media_id)
+            return {'media_id': media_id}
+        self.cached_media = cached_media
+
+    def testCacheKeyMatchesDecoratedFunction(self):
+        self.cached_media('abc', 1)
+        assert self.region.get(self.cached_media.cache_key('abc', 1)) == {'media_id': 1}
+        assert self.cached_media.cache_key('abc', media_id=1) == self.cached_media.cache_key('abc', 1)
+
+    def testGetCachedEach(self):
+        self.cached_media('abc', 1)
+        self.cached_media('abc', 3)
+        values = self.region.get_cached_each(self.cached_media, [('abc', 1), ('abc', 2), ('abc', 3)])
+        assert values == [{'media_id': 1}, NO_VALUE, {'media_id': 3}]
+        assert self.calls == [1, 3]     # looking things up never generates them
+        assert self.region.get_cached_each(self.cached_media, []) == []
+
+    def testGetCachedEachLeavesCachedErrorsToTheCaller(self):
+        calls = []
+
+        @self.region.cache_on_arguments(cache_errors=[KeyError])
+        def cached_source(media_id):
+            calls.append(media_id)
+            if media_id == 2:
+                raise KeyError(media_id)
+            return {'media_id': media_id}
+        cached_source(1)
+        self.assertRaises(KeyError, cached_source, 2)
+        assert self.region.get_cached_each(cached_source, [(1, ), (2, )]) == [{'media_id': 1}, NO_VALUE]
+        self.assertRaises(KeyError, cached_source, 2)
+        assert calls == [1, 2]      # the error was remembered, not looked up again
+
+
+if __name__ == "__main__":
+    unittest.main()
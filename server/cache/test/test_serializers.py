@@ -0,0 +1,44 @@
+import pickle
+import unittest
+
+from dogpile.cache.api import CachedValue
+
+from server.cache.serializers import CacheValueSerializer
+
+
+class CacheValueSerializerTest(unittest.TestCase):
+
+    def _round_trip(self, serializer, payload):
+        data = serializer.dumps(CachedValue(payload, {'ct': 1.5, 'v': 1}))
+        value = serializer.loads(data)
+        assert value.payload == payload
+        assert value.metadata == {'ct': 1.5, 'v': 1}
+        return data
+
+    def testJsonRoundTrip(self):
+        serializer = CacheValueSerializer(codec='json', compression='none')
+        data = self._round_trip(serializer, {'media': [{'media_id': 1, 'name': 'NYT'}], 'count': 3})
+        assert data[:4] == b'WTj-'
+
+    def testCompressesBigValues(self):
+        serializer = CacheValueSerializer(codec='json', compression='zlib', compress_threshold=100)
+        payload = [{'media_id': i, 'name': 'source {}'.format(i)} for i in range(1000)]
+        data = self._round_trip(serializer, payload)
+        assert data[:4] == b'WTjz'
+        assert serializer.stats()['compression_ratio'] > 1
+
+    def testFallsBackToPickle(self):
+        serializer = CacheValueSerializer(codec='json', compression='none')
+        payload = {'counts': (1, 2), 'by_id': {1: 'a'}}   # tuples and int keys don't survive json
+        data = self._round_trip(serializer, payload)
+        assert data[:4] == b'WTp-'
+        assert serializer.stats()['pickle_fallbacks'] == 1
+
+    def testReadsLegacyPickles(self):
+        serializer = CacheValueSerializer()
+        legacy = pickle.dumps(CachedValue({'count': 3}, {'ct': 1.5, 'v': 1}), pickle.HIGHEST_PROTOCOL)
+        assert serializer.loads(legacy).payload == {'count': 3}
+
+
+if __name__ == "__main__":
+    unittest.main()
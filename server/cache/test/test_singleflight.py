@@ -0,0 +1,104 @@
+import threading
+import time
+import unittest
+
+from server.cache.singleflight import SingleFlight, InterruptedLookupError
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def testCoalescesConcurrentCalls(self):
+        single_flight = SingleFlight()
+        calls = []
+
+        def slow_lookup():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'count': 42}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(single_flight.do('key', slow_lookup)))
+                   for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(calls) == 1
+        assert results == [{'count': 42}] * 5
+        # everyone gets their own copy, so one caller changing it doesn't affect the others
+        assert len(set([id(r) for r in results])) == 5
+        assert single_flight.stats()['coalesced'] == 4
+        assert single_flight.stats()['in_flight'] == 0
+
+    def testSharesErrors(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+
+        def failing_lookup():
+            started.set()
+            time.sleep(0.1)
+            raise RuntimeError("upstream is down")
+
+        errors = []
+
+        def call():
+            try:
+                single_flight.do('key', failing_lookup)
+            except RuntimeError as e:
+                errors.append(e)
+        leader = threading.Thread(target=call)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=call)
+        follower.start()
+        leader.join()
+        follower.join()
+        assert len(errors) == 2
+
+    def testInterruptedLeaderReleasesWaiters(self):
+        single_flight = SingleFlight()
+        started = threading.Event()
+
+        def interrupted_lookup():
+            started.set()
+            time.sleep(0.1)
+            raise KeyboardInterrupt()
+
+        errors = []
+
+        def lead():
+            try:
+                single_flight.do('key', interrupted_lookup)
+            except KeyboardInterrupt as e:
+                errors.append(e)
+
+        def follow():
+            try:
+                single_flight.do('key', interrupted_lookup)
+            except InterruptedLookupError as e:
+                errors.append(e)
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=follow)
+        follower.start()
+        leader.join()
+        follower.join(2)
+        assert not follower.is_alive()
+        assert [type(e) for e in errors] == [KeyboardInterrupt, InterruptedLookupError]
+        assert single_flight.stats()['in_flight'] == 0
+        assert single_flight.do('key', lambda: 1) == 1
+
+    def testReentrantCall(self):
+        single_flight = SingleFlight()
+        assert single_flight.do('key', lambda: single_flight.do('key', lambda: 3)) == 3
+
+    def testSequentialCallsRunAgain(self):
+        single_flight = SingleFlight()
+        assert single_flight.do('key', lambda: 1) == 1
+        assert single_flight.do('key', lambda: 2) == 2
+        assert single_flight.stats()['coalesced'] == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import time
+import unittest
+
+import redis
+from dogpile.cache.api import NO_VALUE, CachedValue
+from dogpile.cache.backends.memory import MemoryBackend
+
+from server.cache import redis_pool
+from server.cache.tiered import LocalCacheProxy, INVALIDATION_CHANNEL
+
+
+def _value(payload):
+    return CachedValue(payload, {'ct': time.time(), 'v': 1})
+
+
+class LocalCacheProxyTest(unittest.TestCase):
+    """
+    Two proxies in front of one shared backend stand in for two workers; their invalidation messages go through the
+    configured Redis.
+    """
+
+    def setUp(self):
+        self.client = redis.StrictRedis(connection_pool=redis_pool)
+        listeners = self._listener_count()
+        shared = MemoryBackend({})
+        self.worker_a = LocalCacheProxy(max_items=10, connection_pool=redis_pool).wrap(shared)
+        self.worker_b = LocalCacheProxy(max_items=10, connection_pool=redis_pool).wrap(shared)
+        # both workers read the value, so each has a local copy and has started listening
+        self.worker_a.set('key', _value(1))
+        assert self.worker_b.get('key').payload == 1
+        self._wait_for(lambda: self._listener_count() >= listeners + 2)
+
+    def _listener_count(self):
+        return dict(self.client.pubsub_numsub(INVALIDATION_CHANNEL))[INVALIDATION_CHANNEL.encode('utf-8')]
+
+    @staticmethod
+    def _wait_for(condition, timeout=5):
+        started = time.time()
+        while not condition():
+            assert time.time() - started < timeout
+            time.sleep(0.01)
+
+    def testSetInvalidatesOtherWorkers(self):
+        self.worker_a.set('key', _value(2))
+        self._wait_for(lambda: self.worker_b.local.get('key') is None)
+        assert self.worker_b.get('key').payload == 2
+        assert self.worker_a.local.get('key') is not None    # its own copy is the new value, so it keeps it
+
+    def testDeleteInvalidatesOtherWorkers(self):
+        self.worker_a.delete('key')
+        self._wait_for(lambda: self.worker_b.local.get('key') is None)
+        assert self.worker_b.get('key') is NO_VALUE
+
+    def testRemoteCounts(self):
+        self.worker_b.get_multi(['key', 'other'])
+        assert self.worker_b.stats()['remote'] == {'hits': 1, 'misses': 1}     # 'key' came from its local copy
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import logging
+import pickle
+import threading
+import uuid
+
+import redis
+from dogpile.cache.api import NO_VALUE
+from dogpile.cache.proxy import ProxyBackend
+
+from server.cache.lru import LRUCache
+from server.cache.negative import CachedError
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'web-tools:cache:invalidate'
+
+
+# the per-tier counters for the stats page and the pub/sub listener state are plain attributes
+class LocalCacheProxy(ProxyBackend):  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps a small in-process LRU copy of recently used values in front of the shared (Redis) backend, so hot lookups
+    (tags, tag sets, platform info...) don't pay a network round trip every time. Only values that serialize to less
+    than `max_value_bytes` are held locally, and each entry lives at most `ttl` seconds.
+
+    Sets and deletes go to both tiers, and are broadcast to every other worker over Redis pub/sub so they drop their
+    local copy. That way `.invalidate()` on a cached function clears the value everywhere, not just in the process that
+    called it, and once one worker has refreshed a stale value (see `server.cache.refresh`) the others read the new one
+    from Redis instead of each seeing their own stale copy and refreshing it again.
+    """
+
+    def __init__(self, max_items=2000, max_bytes=64*1024*1024, max_value_bytes=256*1024, ttl=60,
+                 connection_pool=None):
+        super().__init__()
+        self.local = LRUCache(max_items, max_bytes, ttl)
+        self.max_value_bytes = max_value_bytes
+        self._lock = threading.Lock()
+        self.remote_hits = 0
+        self.remote_misses = 0
+        self._connection_pool = connection_pool
+        self._client = None
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        self._id = uuid.uuid4().hex     # so we can ignore the invalidation messages we sent ourselves
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def _local_get(self, key):
+        raw = self.local.get(key)
+        if raw is None:
+            return NO_VALUE
+        return pickle.loads(raw)
+
+    def _local_set(self, key, value):
+        if (value is NO_VALUE) or (self.local.max_items <= 0):
+            return
+        raw = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(raw) <= self.max_value_bytes:
+            self._ensure_listening()
+            ttl = None
+            if isinstance(value.payload, CachedError):
+                ttl = min(self.local.ttl, value.payload.ttl)   # don't remember errors here longer than in Redis
+            self.local.set(key, raw, ttl)
+
+    def get(self, key):
+        value = self._local_get(key)
+        if value is not NO_VALUE:
+            return value
+        value = self.proxied.get(key)
+        if value is NO_VALUE:
+            self._count('remote_misses')
+        else:
+            self._count('remote_hits')
+            self._local_set(key, value)
+        return value
+
+    def get_multi(self, keys):
+        values = [self._local_get(key) for key in keys]
+        missing = [idx for idx, value in enumerate(values) if value is NO_VALUE]
+        if len(missing) > 0:
+            remote_values = self.proxied.get_multi([keys[idx] for idx in missing])
+            for idx, value in zip(missing, remote_values):
+                values[idx] = value
+                if value is NO_VALUE:
+                    self._count('remote_misses')
+                else:
+                    self._count('remote_hits')
+                    self._local_set(keys[idx], value)
+        return values
+
+    def set(self, key, value):
+        self.proxied.set(key, value)
+        self._local_set(key, value)
+        self._broadcast_invalidation([key])
+
+    def set_multi(self, mapping):
+        self.proxied.set_multi(mapping)
+        for key, value in mapping.items():
+            self._local_set(key, value)
+        self._broadcast_invalidation(list(mapping.keys()))
+
+    def delete(self, key):
+        self.local.discard(key)
+        self.proxied.delete(key)
+        self._broadcast_invalidation([key])
+
+    def delete_multi(self, keys):
+        for key in keys:
+            self.local.discard(key)
+        self.proxied.delete_multi(keys)
+        self._broadcast_invalidation(keys)
+
+    def stats(self):
+        with self._lock:
+            remote = {
+                'hits': self.remote_hits,
+                'misses': self.remote_misses,
+            }
+        return {
+            'local': self.local.stats(),
+            'remote': remote,
+        }
+
+    def _redis(self):
+        if self._client is None and self._connection_pool is not None:
+            self._client = redis.StrictRedis(connection_pool=self._connection_pool)
+        return self._client
+
+    def _broadcast_invalidation(self, keys):
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            for key in keys:
+                client.publish(INVALIDATION_CHANNEL, "{} {}".format(self._id, key))
+        except Exception as e:
+            # the local copies will expire on their own soon enough, so don't fail the request over this
+            logger.warning("Couldn't broadcast cache invalidation: {}".format(e))
+
+    def _ensure_listening(self):
+        # lazily start one listener per process, so workers forked after import each get their own
+        if (self._listener is not None) or (self._redis() is None):
+            return
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen_for_invalidations, daemon=True,
+                                                  name='cache-invalidation-listener')
+                self._listener.start()
+
+    def _listen_for_invalidations(self):
+        try:
+            pubsub = self._redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            for message in pubsub.listen():
+                data = message['data']
+                if isinstance(data, bytes):
+                    data = data.decode('utf-8')
+                sender, key = data.split(" ", 1)
+                if sender != self._id:
+                    self.local.discard(key)
+        except Exception as e:
+            # without the listener we can't trust local copies to be invalidated, so stop using them
+            logger.error("Cache invalidation listener stopped, dropping local cache tier: {}".format(e))
+            self.max_value_bytes = -1
+            self.local.clear()
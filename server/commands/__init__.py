@@ -1,8 +1,15 @@
 # pylint: disable=import-outside-toplevel
 
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import click
+from flask import current_app
 from flask.cli import with_appcontext
 
+logger = logging.getLogger(__name__)
 
 def _fetch_backend_emails():
     from server import mc
@@ -46,3 +53,101 @@ def sync_frontend_db(test):
         print("Successfully deleted users")
     else:
         print("No users to delete")
+
+
+WARMUP_TARGETS = ['discoverers', 'featured_collections', 'metadata_tag_sets', 'metadata_defaults']
+
+# what `warm-cache` fills in if you don't give it a manifest
+DEFAULT_WARMUP_MANIFEST = {
+    'targets': WARMUP_TARGETS,
+    'tag_sets': [],     # extra tag sets to page through, by tag_sets_id
+}
+
+
+def _warmup_tasks(manifest):
+    """
+    Turn the manifest into a list of (name, function) tasks that can run in parallel. This needs the discoverers to
+    have run already, because it asks them for the metadata tag set ids.
+    """
+    from server import TOOL_API_KEY
+    from server.util.tags import TagSetDiscoverer, tags_in_tag_set
+    from server.views.media_picker import featured_collection_list
+    from server.views.metadata import get_metadata_defaults
+    from server.views.sources.apicache import featured_collections
+    targets = manifest.get('targets', [])
+    for target in targets:
+        if target not in WARMUP_TARGETS:
+            logger.warning("Unknown warm-cache target '{}', it won't warm anything".format(target))
+    tasks = []
+    if 'featured_collections' in targets:
+        # the sources and media picker pages each cache their own copy of the list
+        tasks.append(('featured_collections', featured_collections))
+        tasks.append(('featured_collection_list', featured_collection_list))
+    tag_sets_ids = list(manifest.get('tag_sets', []))
+    if 'metadata_tag_sets' in targets:
+        tag_sets_ids = TagSetDiscoverer().media_metadata_sets() + tag_sets_ids
+    for tag_sets_id in tag_sets_ids:
+        tasks.append(('tag_set:{}'.format(tag_sets_id),
+                      lambda tsid=tag_sets_id: tags_in_tag_set(TOOL_API_KEY, tsid)))
+    if 'metadata_defaults' in targets:
+        for tag_sets_id in TagSetDiscoverer().media_metadata_sets():
+            tasks.append(('metadata_defaults:{}'.format(tag_sets_id),
+                          lambda tsid=tag_sets_id: get_metadata_defaults(tsid)))
+    return tasks
+
+
+def _timed(app, name, fn):
+    start = time.time()
+    with app.app_context():
+        try:
+            fn()
+            return name, time.time() - start, None
+        except Exception as e:
+            return name, time.time() - start, e
+
+
+@click.command("warm-cache")
+@click.option('--manifest', required=False, type=click.Path(exists=True, dir_okay=False), default=None,
+              help="JSON file listing the `targets` (and extra `tag_sets`) to warm. Defaults to all the targets.")
+@click.option('--concurrency', required=False, type=int, default=4,
+              help="How many cache-filling requests to make at the same time.")
+@with_appcontext
+def warm_cache(manifest, concurrency):
+    """
+    Fill the cache with the featured collections, tag set discovery and metadata tag sets that almost every user needs,
+    so the first users after a deploy or a Redis flush don't have to wait for them. Meant to run in the release phase.
+    """
+    if manifest is None:
+        warmup_manifest = DEFAULT_WARMUP_MANIFEST
+    else:
+        with open(manifest) as f:
+            warmup_manifest = json.load(f)
+    app = current_app._get_current_object()   # pylint: disable=protected-access
+    overall_start = time.time()
+    results = []
+    if 'discoverers' in warmup_manifest.get('targets', []):
+        # everything else depends on these, so they go first
+        from server.util.tags import TAG_DISCOVERY_SNAPSHOT, refresh_tag_discovery
+        if TAG_DISCOVERY_SNAPSHOT is not None:
+            logger.warning("Tag discovery is saved to a local file ({}), so warming it won't help workers on other "
+                           "hosts".format(TAG_DISCOVERY_SNAPSHOT))
+        results.append(_timed(app, 'tag_discovery', refresh_tag_discovery))
+    try:
+        tasks = _warmup_tasks(warmup_manifest)
+    except Exception as e:
+        # ie. tag set discovery failed, so we don't know which metadata tag sets to warm
+        print("Couldn't figure out what to warm: {}".format(e))
+        tasks = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [pool.submit(_timed, app, name, fn) for name, fn in tasks]
+        for future in as_completed(futures):
+            results.append(future.result())
+    failures = 0
+    for name, seconds, error in results:
+        if error is None:
+            print("  {:<30} {:>8.2f} secs".format(name, seconds))
+        else:
+            failures += 1
+            print("  {:<30} {:>8.2f} secs  FAILED: {}".format(name, seconds, error))
+    print("Warmed {} of {} caches in {:.2f} secs (concurrency {})".format(
+        len(results) - failures, len(results), time.time() - overall_start, concurrency))
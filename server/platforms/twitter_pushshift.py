@@ -1,5 +1,4 @@
 import datetime as dt
-import requests
 import json
 import collections
 from typing import List, Dict
@@ -7,6 +6,7 @@ import logging
 
 from server.platforms.provider import ContentProvider, MC_DATE_FORMAT
 from server.cache import cache
+from server.util.resilience import upstream
 
 PS_TWITTER_SEARCH_URL = 'https://twitter-es.pushshift.io/twitter_verified/_search'
 
@@ -123,7 +123,7 @@ class TwitterPushshiftProvider(ContentProvider):
             q['query']['match'] = {'text': query}
         if 'aggs' in kwargs:
             q['aggs'] = kwargs['aggs']
-        r = requests.get(PS_TWITTER_SEARCH_URL, headers=headers, data=json.dumps(q))
+        r = upstream('pushshift-twitter').get(PS_TWITTER_SEARCH_URL, headers=headers, data=json.dumps(q))
         return r.json()
 
     @classmethod
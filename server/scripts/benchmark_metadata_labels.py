@@ -0,0 +1,77 @@
+"""
+A micro-benchmark of turning source metadata tags into CSV labels, which happens for every metadata field of every
+source in a collection download. Compares the old way (asking `TagSetDiscoverer` for each tag set id on every call)
+against the precomputed tag_sets_id => label function lookup. Uses made up sources, so it doesn't call the API once the
+tag sets have been discovered.
+  python -m server.scripts.benchmark_metadata_labels [number of sources]
+"""
+import logging
+import sys
+import timeit
+
+from server.util.csv import media_list_for_download
+from server.util.tags import TagSetDiscoverer, label_for_metadata_tag, metadata_labelers
+from server.views.sources import SOURCE_LIST_CSV_EDIT_PROPS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE_COUNT = 10000
+REPEAT = 5
+
+
+def _label_with_discoverer_lookups(tag):
+    # how `label_for_metadata_tag` used to work, for comparison
+    label = None
+    tag_sets_id = tag['tag_sets_id']
+    if tag_sets_id == TagSetDiscoverer().media_pub_country_set:
+        label = tag['tag'][-3:]
+    elif tag_sets_id == TagSetDiscoverer().media_pub_state_set:
+        label = tag['tag'][4:]
+    elif tag_sets_id == TagSetDiscoverer().media_primary_language_set:
+        label = tag['tag']
+    elif tag_sets_id == TagSetDiscoverer().media_subject_country_set:
+        label = tag['tag']
+    elif tag_sets_id == TagSetDiscoverer().media_type_set:
+        label = tag['tag']
+    return label
+
+
+def _fake_sources(count):
+    discoverer = TagSetDiscoverer()
+    metadata_tags = {
+        'pub_country': {'tag_sets_id': discoverer.media_pub_country_set, 'tag': 'pub_USA'},
+        'pub_state': {'tag_sets_id': discoverer.media_pub_state_set, 'tag': 'pub_US-MA'},
+        'language': {'tag_sets_id': discoverer.media_primary_language_set, 'tag': 'en'},
+        'about_country': {'tag_sets_id': discoverer.media_subject_country_set, 'tag': 'USA'},
+        'media_type': {'tag_sets_id': discoverer.media_type_set, 'tag': 'digital_native'},
+    }
+    return [{'media_id': media_id, 'name': 'source {}'.format(media_id), 'url': 'https://example.com',
+             'metadata': dict(metadata_tags)} for media_id in range(count)]
+
+
+def _best_of(fn):
+    return min(timeit.repeat(fn, number=1, repeat=REPEAT))
+
+
+def _label_with_precomputed_labelers(tags):
+    labelers = metadata_labelers()
+    return [label_for_metadata_tag(t, labelers) for t in tags]
+
+
+def run(source_count):
+    sources = _fake_sources(source_count)
+    tags = [tag for source in sources for tag in source['metadata'].values()]
+    results = {
+        'discoverer lookups per tag': _best_of(lambda: [_label_with_discoverer_lookups(t) for t in tags]),
+        'label_for_metadata_tag': _best_of(lambda: [label_for_metadata_tag(t) for t in tags]),
+        'precomputed labelers': _best_of(lambda: _label_with_precomputed_labelers(tags)),
+        'media_list_for_download': _best_of(lambda: media_list_for_download(sources, SOURCE_LIST_CSV_EDIT_PROPS)),
+    }
+    logger.info("Labelling {} metadata tags on {} sources (best of {}):".format(len(tags), source_count, REPEAT))
+    for name, secs in results.items():
+        logger.info("  {:<28} {:8.1f} ms".format(name, secs * 1000))
+    return results
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SOURCE_COUNT)
@@ -1,8 +1,8 @@
-import requests
 from typing import List, Dict
 
 from server import config
-from server.cache import cache
+from server.cache import cache, EXPIRE_IMMUTABLE
+from server.util.resilience import upstream
 
 
 CORENLP_URL = config.get('CORENLP_URL')
@@ -15,10 +15,11 @@ def quotes_from_text(text: str) -> List[Dict]:
     return quotes
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_IMMUTABLE)
 def _fetch_annotations(text: str) -> Dict:
     url = 'http://' + CORENLP_URL + '/?properties={"annotators":"tokenize,ssplit,pos,lemma,ner,depparse,coref,quote","outputFormat":"json"}'
-    r = requests.post(url, data=text.encode('utf-8'))
+    # annotating is a POST, so it is never retried; this still gets a timeout, the request deadline and a breaker
+    r = upstream('corenlp', retries=0).post(url, data=text.encode('utf-8'))
     return r.json()
 
 
@@ -3,7 +3,7 @@ import datetime
 import flask
 from typing import List
 
-from server.util.tags import label_for_metadata_tag
+from server.util.tags import label_for_metadata_tag, metadata_labelers
 
 SOURCE_LIST_CSV_METADATA_PROPS = ['pub_country', 'pub_state', 'language', 'about_country', 'media_type']
 
@@ -80,7 +80,30 @@ def stream_response(data, dict_keys, filename, column_names=None, as_attachment=
                               mimetype='text/csv; charset=utf-8', headers=headers)
 
 
+def stream_rows_response(rows, dict_keys, filename, column_names=None, as_attachment=True):
+    """Stream rows to the user as a csv while they are still being computed.
+    Keyword arguments:
+    rows -- an iterator of dicts, which is consumed as the response is sent (with the request context still around)
+    dict_keys -- the keys in each dict to build the csv out of (order is preserved)
+    filename -- a string to append to the automatically generated filename for identifaction
+    column_names -- (optional) column names to use, defaults to dict_keys if not specified
+    """
+    if column_names is None:
+        column_names = dict_keys
+
+    def stream_as_csv():
+        yield ','.join(column_names) + '\n'
+        for dict_row in rows:
+            yield ','.join(dict2row(dict_keys, dict_row)) + '\n'
+    headers = {}
+    if as_attachment:
+        headers["Content-Disposition"] = "attachment;filename="+safe_filename(filename)
+    return flask.Response(flask.stream_with_context(stream_as_csv()),
+                          mimetype='text/csv; charset=utf-8', headers=headers)
+
+
 def media_list_for_download(media_list, column_names):
+    labelers = metadata_labelers()  # look this up once, rather than for every field of every source
     for src in media_list:
         if 'editor_notes' in column_names and 'editor_notes' not in src:
             src['editor_notes'] = ''
@@ -101,7 +124,7 @@ def media_list_for_download(media_list, column_names):
             src['metadata'] = ''
         else:
             for name, tag in src['metadata'].items():
-                src[name] = label_for_metadata_tag(tag) if tag is not None else None
+                src[name] = label_for_metadata_tag(tag, labelers) if tag is not None else None
     return media_list
 
 
@@ -0,0 +1,81 @@
+"""
+A time budget for each web request. One explorer or topic endpoint can chain a lot of upstream calls, and each of them
+used to wait out its own full timeout, so a slow upstream could keep a request going until gunicorn killed the whole
+worker. Instead, each request gets a deadline when it starts, and every upstream call and parallel fan-out caps its own
+timeout to whatever is left of it. Once the budget is spent, calls fail right away with a `DeadlineExceededError`,
+which the views report back as a clear "took too long" error.
+"""
+import concurrent.futures
+import contextvars
+import time
+
+import requests
+
+# a bit under the `--timeout 500` gunicorn runs with, so we get to send back an error before the worker is killed
+DEFAULT_BUDGET_SECS = 480
+
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+class DeadlineExceededError(requests.exceptions.Timeout, concurrent.futures.TimeoutError):
+    """
+    Raised instead of starting (or waiting on) anything else once the current request has used up its time budget.
+    It is a timeout as far as both `requests` and `concurrent.futures` callers are concerned.
+    """
+
+
+def start(budget_secs):
+    """
+    Give the current request (ie. greenlet or thread) `budget_secs` seconds from now; `None` means no limit.
+    """
+    _deadline.set(None if budget_secs is None else time.monotonic() + budget_secs)
+
+
+def clear():
+    _deadline.set(None)
+
+
+def remaining():
+    """
+    :return: seconds left in the current request's budget (never negative), or `None` if there isn't one
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check():
+    """
+    Raise `DeadlineExceededError` if the current request has no time left.
+    """
+    if remaining() == 0:
+        raise DeadlineExceededError("Ran out of time to finish this request")
+
+
+def cap_timeout(timeout):
+    """
+    Shrink a `requests`-style timeout (seconds, or a (connect, read) tuple) to fit in what's left of the budget.
+    :return: the timeout to use; raises `DeadlineExceededError` if there is no time left at all
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    check()
+    if timeout is None:
+        return left
+    if isinstance(timeout, tuple):
+        return tuple(left if t is None else min(t, left) for t in timeout)
+    return min(timeout, left)
+
+
+def carry(fn):
+    """
+    Wrap `fn` so that it runs with the current request's deadline when it is called on another thread (ie. by an
+    executor pool, which doesn't bring context variables along on its own).
+    """
+    context = contextvars.copy_context()
+
+    def with_deadline(*args, **kwargs):
+        return context.copy().run(fn, *args, **kwargs)
+    return with_deadline
@@ -0,0 +1,103 @@
+"""
+Run a handful of independent upstream calls (ie. a query count and its baseline count) at the same time instead of
+one after the other, on the app's shared executor pool.
+"""
+import concurrent.futures
+import time
+from collections import deque
+
+from flask import has_request_context
+
+from server.util import deadline
+
+
+# for work that happens outside of a request (ie. while streaming a download, or on a background thread), where the
+# flask executor can't run anything because it has no request context to copy over
+_contextless_pool = concurrent.futures.ThreadPoolExecutor(max_workers=20, thread_name_prefix='fan-out')
+
+
+def _shared_pool():
+    if not has_request_context():
+        return _contextless_pool
+    from server import executor     # pylint: disable=import-outside-toplevel
+    return executor
+
+
+def _deadline(timeout):
+    # the sooner of `timeout` from now and the end of the current request's budget
+    left = deadline.remaining()
+    if (timeout is None) or ((left is not None) and (left < timeout)):
+        timeout = left
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def _remaining(ends_at):
+    if ends_at is None:
+        return None
+    remaining = ends_at - time.monotonic()
+    if remaining <= 0:
+        raise deadline.DeadlineExceededError("Ran out of time waiting for parallel calls")
+    return remaining
+
+
+def fan_out(*calls, timeout=None, pool=None):
+    """
+    Call each of the zero-argument `calls` concurrently and return their results in the same order. The first one runs
+    right here on the calling thread; the rest go to the pool. If the pool is too busy to have started one by the time
+    we need its result, we take it back and run it ourselves, so calling this from a pool thread can't deadlock.
+    :param timeout: seconds to wait for all of them, after which `concurrent.futures.TimeoutError` is raised (it never
+    waits past the current request's deadline either, and the calls on other threads share that deadline)
+    :param pool: something with a `submit` method (defaults to the shared `server.executor`, which copies the current
+    app and request context over to the worker thread; outside of a request a plain thread pool is used instead)
+    :return: a list of the results; if any call raises, the first error (in call order) is re-raised and the calls
+    that haven't started yet are cancelled
+    """
+    if len(calls) < 2:
+        return [call() for call in calls]
+    ends_at = _deadline(timeout)
+    pool = pool or _shared_pool()
+    futures = [pool.submit(deadline.carry(call)) for call in calls[1:]]
+    try:
+        results = [calls[0]()]
+        for call, future in zip(calls[1:], futures):
+            if future.cancel():
+                _remaining(ends_at)
+                results.append(call())
+            else:
+                results.append(future.result(timeout=_remaining(ends_at)))
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return results
+
+
+def map_in_order(fn, items, max_workers=4, timeout=None, pool=None):
+    """
+    Like `map(fn, items)`, but with up to `max_workers` of the calls running at once on the pool. Results are yielded
+    in the same order as `items`, each one as soon as it (and everything before it) is done, so callers can stream
+    them out. Like `fan_out`, calls the pool hasn't gotten to yet are taken back and run on the calling thread.
+    :param timeout: seconds to wait for all of them, after which `concurrent.futures.TimeoutError` is raised (capped
+    to the current request's deadline, as with `fan_out`)
+    :return: a generator of the results; the first error is re-raised, and closing it early cancels what's left
+    """
+    items = list(items)
+    ends_at = _deadline(timeout)
+    pool = pool or _shared_pool()
+    with_deadline = deadline.carry(fn)
+    in_flight = deque()     # (item, future) in the order they have to come back out
+    next_index = 0
+    try:
+        while (len(in_flight) > 0) or (next_index < len(items)):
+            while (len(in_flight) < max(1, max_workers)) and (next_index < len(items)):
+                in_flight.append((items[next_index], pool.submit(with_deadline, items[next_index])))
+                next_index += 1
+            item, future = in_flight.popleft()
+            if future.cancel():
+                _remaining(ends_at)
+                yield fn(item)
+            else:
+                yield future.result(timeout=_remaining(ends_at))
+    finally:
+        for _, future in in_flight:
+            future.cancel()
@@ -0,0 +1,119 @@
+"""
+Reusable Media Cloud API clients. Building a new client per call is cheap, but the `mediacloud` package sends every
+request through the module-level `requests.get/post/put` helpers, each of which makes (and throws away) its own
+session - so every API call paid for a fresh TCP connect and TLS handshake. Here we keep a bounded, per-API-key pool of
+clients, and point the `mediacloud` package at one shared, keep-alive `requests.Session` instead.
+"""
+import logging
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 256             # distinct (client class, api key) pairs to keep around
+DEFAULT_CONNECTIONS_PER_HOST = 32   # idle keep-alive connections to hold open to each upstream host
+
+
+class SessionRequests:
+    """
+    Stands in for the `requests` module inside a client library, sending its `get/post/put` calls through one shared
+    session (and so one connection pool) instead of a new one each time. Everything else falls through to `requests`.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.session.post(url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.session.put(url, data=data, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+def shared_session(connections_per_host=DEFAULT_CONNECTIONS_PER_HOST, pool_hosts=10):
+    """
+    A session that keeps up to `connections_per_host` connections alive to each of `pool_hosts` hosts. It blocks
+    rather than opening extra throwaway connections when they are all busy, so we never hammer the API with connects.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=connections_per_host, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def share_connections(client_module, session):
+    """
+    Make every client in `client_module` (ie. `mediacloud.api`) talk through `session` (or anything with the same
+    `get/post/put` methods, like a `server.util.resilience.Upstream`).
+    """
+    client_module.requests = SessionRequests(session)
+
+
+class ClientPool:
+    """
+    A thread-safe, least-recently-used pool of API clients, keyed by client class and API key. Clients don't hold any
+    per-request state, so the same one can be handed out to any number of threads at once.
+    """
+
+    def __init__(self, max_size=DEFAULT_POOL_SIZE, api_url=None):
+        self.max_size = max_size
+        self.api_url = api_url
+        self._lock = threading.Lock()
+        self._clients = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _create(self, client_class, api_key):
+        client = client_class(api_key)
+        if self.api_url is not None:
+            client.V2_API_URL = self.api_url
+        return client
+
+    def get(self, client_class, api_key):
+        pool_key = (client_class, api_key)
+        with self._lock:
+            client = self._clients.get(pool_key)
+            if client is not None:
+                self._clients.move_to_end(pool_key)
+                self.hits += 1
+                return client
+            self.misses += 1
+        client = self._create(client_class, api_key)   # outside the lock; if two threads race, the last one wins
+        with self._lock:
+            self._clients[pool_key] = client
+            self._clients.move_to_end(pool_key)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+                self.evictions += 1
+        return client
+
+    def discard(self, api_key):
+        """
+        Drop every client for this key (ie. when a user's key is reset).
+        """
+        with self._lock:
+            for pool_key in [k for k in self._clients if k[1] == api_key]:
+                del self._clients[pool_key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._clients),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'reuse_ratio': float(self.hits) / lookups if lookups > 0 else 0,
+            }
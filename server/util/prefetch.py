@@ -0,0 +1,69 @@
+"""
+Overlap fetching pages of results from the API with writing them out. Big CSV downloads page through hundreds of
+thousands of stories; without this the network sits idle while we build CSV rows, and vice versa.
+"""
+import contextvars
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# how many pages to fetch ahead of the one being written out, by default
+DEFAULT_READ_AHEAD = 2
+
+_DONE = object()
+
+
+class _Failure:
+
+    def __init__(self, error):
+        self.error = error
+
+
+def read_ahead(pages, depth=DEFAULT_READ_AHEAD):
+    """
+    Iterate over `pages` (ie. a generator that calls the API for each page) on a background thread, staying up to
+    `depth` pages ahead of the caller. The background thread waits whenever it gets that far ahead, so at most
+    `depth` + 1 pages are in memory at once. Errors from fetching are re-raised in the caller, in order. If the caller
+    stops early (ie. the user cancelled the download) the background thread stops fetching too.
+    Note that `pages` runs on another thread, so it can't rely on the flask request context. Context variables (ie. the
+    request's `server.util.deadline`) are copied over to it though.
+    """
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass    # the caller is still busy with earlier pages
+        return False
+
+    def fetch():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(_DONE)
+        except Exception as e:     # pylint: disable=broad-except
+            put(_Failure(e))
+        finally:
+            close = getattr(pages, 'close', None)
+            if close is not None:
+                close()
+
+    fetcher = threading.Thread(target=contextvars.copy_context().run, args=(fetch, ), name='read-ahead', daemon=True)
+    fetcher.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
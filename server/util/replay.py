@@ -0,0 +1,197 @@
+"""
+Record/replay of upstream HTTP APIs (Media Cloud, Pushshift, YouTube...), so hot endpoints can be benchmarked and
+profiled reproducibly without a network. Everything those clients do goes through `requests`, so we hook in at
+`HTTPAdapter.send`: in "record" mode every response is saved to a fixture directory, keyed by a canonical version of
+the request, and in "replay" mode those saved responses are served back (with injected latency) instead.
+"""
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+# query params and form fields that hold credentials; they are left out of the fixture key and the saved url
+SECRET_PARAMS = ['key', 'api_key', 'apikey', 'access_token', 'token', 'password']
+
+# we save the decoded body, so these no longer describe it
+SKIPPED_RESPONSE_HEADERS = ['content-encoding', 'content-length', 'transfer-encoding', 'set-cookie']
+
+
+class ReplayMissError(requests.exceptions.RequestException):
+    """
+    Raised in replay mode when there is no recorded response for a request. It isn't a network error on purpose, so
+    it isn't retried or counted against the upstream's circuit breaker (see `server.util.resilience`).
+    """
+
+
+def _without_secrets(pairs):
+    return sorted([(k, v) for k, v in pairs if k.lower() not in SECRET_PARAMS])
+
+
+def canonical_url(url):
+    parts = urlsplit(url)
+    query = urlencode(_without_secrets(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path, query, ''))
+
+
+def _canonical_body(request):
+    body = request.body
+    if body is None:
+        return ''
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    content_type = request.headers.get('Content-Type', '')
+    if 'json' in content_type:
+        try:
+            return json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            return body
+    if 'x-www-form-urlencoded' in content_type:
+        return urlencode(_without_secrets(parse_qsl(body, keep_blank_values=True)))
+    return body
+
+
+def canonical_request(request):
+    """
+    The same logical request always renders the same way here, no matter the param order or whose API key it used.
+    """
+    return "{} {}\n{}".format(request.method.upper(), canonical_url(request.url), _canonical_body(request))
+
+
+class ApiRecorder:
+
+    def __init__(self, mode, fixture_dir, latency=0):
+        """
+        :param mode: MODE_RECORD or MODE_REPLAY
+        :param fixture_dir: where the recorded responses live
+        :param latency: seconds to wait before serving each replayed response, or 'recorded' to wait as long as the
+        original response took
+        """
+        if mode not in [MODE_RECORD, MODE_REPLAY]:
+            raise ValueError("Unknown API replay mode '{}'".format(mode))
+        self.mode = mode
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    def fixture_path(self, request):
+        digest = hashlib.sha1(canonical_request(request).encode('utf-8')).hexdigest()
+        return os.path.join(self.fixture_dir, urlsplit(request.url).netloc.lower(), digest + '.json')
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def record(self, request, response):
+        content = response.content
+        try:
+            body = {'text': content.decode('utf-8')}
+        except UnicodeDecodeError:
+            body = {'content_base64': base64.b64encode(content).decode('ascii')}
+        fixture = {
+            'request': canonical_request(request),
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in SKIPPED_RESPONSE_HEADERS},
+            'encoding': response.encoding,
+            'elapsed': response.elapsed.total_seconds(),
+        }
+        fixture.update(body)
+        path = self.fixture_path(request)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        with open(tmp_path, 'w') as f:
+            json.dump(fixture, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)  # so a concurrent replay never reads a half-written file
+        self._count('recorded')
+
+    def replay(self, adapter, request):
+        path = self.fixture_path(request)
+        if not os.path.isfile(path):
+            self._count('misses')
+            raise ReplayMissError("No recorded response for {}".format(canonical_request(request)), request=request)
+        with open(path) as f:
+            fixture = json.load(f)
+        delay = fixture.get('elapsed', 0) if self.latency == 'recorded' else self.latency
+        if delay:
+            time.sleep(delay)
+        if 'text' in fixture:
+            content = fixture['text'].encode('utf-8')
+        else:
+            content = base64.b64decode(fixture['content_base64'])
+        response = requests.Response()
+        response.status_code = fixture['status_code']
+        response.reason = fixture.get('reason')
+        response.headers = CaseInsensitiveDict(fixture.get('headers', {}))
+        response.encoding = fixture.get('encoding')
+        response.url = request.url
+        response.request = request
+        response.connection = adapter
+        response.raw = io.BytesIO(content)
+        response._content = content             # pylint: disable=protected-access
+        response._content_consumed = True       # pylint: disable=protected-access
+        self._count('replayed')
+        return response
+
+    def wrap(self, send):
+        def replaying_send(adapter, request, *args, **kwargs):
+            if self.mode == MODE_REPLAY:
+                return self.replay(adapter, request)
+            response = send(adapter, request, *args, **kwargs)
+            try:
+                self.record(request, response)
+            except Exception as e:
+                logger.warning("Couldn't record response for {}".format(request.url))
+                logger.exception(e)
+            return response
+        return replaying_send
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'recorded': self.recorded,
+                'replayed': self.replayed,
+                'misses': self.misses,
+            }
+
+
+recorder = None
+_original_send = None
+
+
+def install(mode, fixture_dir, latency=0):
+    """
+    Start recording or replaying every HTTP call made with `requests` in this process.
+    """
+    global recorder, _original_send     # pylint: disable=global-statement
+    uninstall()
+    recorder = ApiRecorder(mode, fixture_dir, latency)
+    _original_send = HTTPAdapter.send
+    HTTPAdapter.send = recorder.wrap(_original_send)
+    logger.warning("API calls are being {}ed (fixtures in {})".format(mode, fixture_dir))
+    return recorder
+
+
+def uninstall():
+    global recorder, _original_send     # pylint: disable=global-statement
+    if _original_send is not None:
+        HTTPAdapter.send = _original_send
+    recorder = None
+    _original_send = None
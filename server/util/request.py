@@ -1,9 +1,14 @@
+import concurrent.futures
 import logging
 import os
 from functools import wraps
 from flask import jsonify, request
 
 from mediacloud.error import MCException
+from requests.exceptions import Timeout
+
+from server.util.deadline import DeadlineExceededError
+from server.util.resilience import UpstreamUnavailableError
 
 logger = logging.getLogger(__name__)
 
@@ -99,6 +104,17 @@ def api_error_handler(func):
         except MCException as e:
             logger.exception(e)
             return json_error_response(e.message, e.status_code)
+        except UpstreamUnavailableError as e:
+            # failing fast because the upstream is down; no need for a stack trace each time
+            logger.warning(str(e))
+            return json_error_response(str(e), 503)
+        except DeadlineExceededError as e:
+            # the request used up its whole time budget; stop here rather than keep the worker tied up
+            logger.warning(str(e))
+            return json_error_response("This is taking too long to finish, please try again later", 504)
+        except (Timeout, concurrent.futures.TimeoutError) as e:
+            logger.exception(e)
+            return json_error_response("The server we depend on took too long to respond", 504)
     return wrapper
 
 
@@ -0,0 +1,279 @@
+"""
+Keep workers available when an upstream service (Media Cloud, Pushshift, YouTube...) slows down or fails. Every call
+to an upstream goes through an `Upstream`, which gives it a timeout, retries idempotent calls that fail in a way that
+is worth retrying (with jittered exponential backoff), and trips a circuit breaker after repeated failures, so that
+while the service is down we fail fast instead of tying up a worker waiting on each call.
+"""
+import logging
+import random
+import re
+import threading
+import time
+
+import requests
+
+from server.util import deadline
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = 'closed'         # all good, calls go through
+STATE_OPEN = 'open'             # upstream is failing, calls fail right away
+STATE_HALF_OPEN = 'half_open'   # cooling off period is over, one trial call is let through to check on it
+
+IDEMPOTENT_METHODS = ['GET', 'HEAD', 'OPTIONS']
+
+# responses that are worth trying again after a short wait
+RETRYABLE_STATUS_CODES = [429, 502, 503, 504]
+
+PROMETHEUS_PREFIX = 'webtools_upstream_'
+
+
+class UpstreamUnavailableError(requests.exceptions.ConnectionError):
+    """
+    Raised without calling the upstream at all, because its circuit breaker is open.
+    """
+
+
+# the counters for the stats page are plain attributes
+class CircuitBreaker:  # pylint: disable=too-many-instance-attributes
+    """
+    Opens after `failure_threshold` failures in a row, stays open for `reset_timeout` seconds, and then lets a single
+    trial call through; if that works it closes again, otherwise it stays open for another `reset_timeout`. Only not
+    being able to connect and 5xx responses count as failures (see `Upstream`).
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = STATE_CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+        self.fast_fails = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if (self._state == STATE_OPEN) and (self._clock() - self._opened_at >= self.reset_timeout):
+            self._state = STATE_HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self):
+        """
+        :return: True if a call should go ahead right now
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == STATE_CLOSED:
+                return True
+            if (state == STATE_HALF_OPEN) and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.fast_fails += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = STATE_CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_ignored(self):
+        # a call finished in a way that doesn't tell us if the upstream is healthy, so let the next one decide
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            state = self._current_state()
+            if (state == STATE_HALF_OPEN) or \
+                    ((state == STATE_CLOSED) and (self._consecutive_failures >= self.failure_threshold)):
+                self._state = STATE_OPEN
+                self._opened_at = self._clock()
+                self._trial_in_flight = False
+                self.times_opened += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._consecutive_failures,
+                'times_opened': self.times_opened,
+                'fast_fails': self.fast_fails,
+            }
+
+
+# the retry settings and the counters for the stats page are plain attributes
+class Upstream:  # pylint: disable=too-many-instance-attributes
+    """
+    A resilient stand-in for a `requests.Session` when talking to one upstream service: it has the same `get`, `post`,
+    `put` and `request` methods, so it can be dropped in wherever a session (or the `requests` module) is used.
+    """
+
+    def __init__(self, name, session=None, *, timeout=(5, 30), retries=2, backoff=0.5, max_backoff=8,
+                 breaker=None, retry_if=None, sleep=time.sleep):
+        """
+        :param timeout: seconds to wait for (connecting, reading) on each attempt; this replaces any timeout the
+        caller passed in, so each upstream gets one consistent limit (cut down to whatever is left of the current
+        request's `server.util.deadline` budget)
+        :param retries: how many more times to try an idempotent call after the first attempt can't connect or gets a
+        "service unavailable" type of response (calls that time out waiting for a response are not retried)
+        :param backoff: base seconds to wait before a retry; doubles on each retry, and the actual wait is a random
+        amount up to that (so a burst of failed calls don't all retry at the same moment)
+        :param retry_if: optionally, a function of (method, url) that says if a call is safe to retry; by default only
+        GET, HEAD and OPTIONS calls are
+        """
+        self.name = name
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_if = retry_if
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.retried = 0
+
+    def _count(self, attr):
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def _is_idempotent(self, method, url):
+        if self.retry_if is not None:
+            return self.retry_if(method, url)
+        return method.upper() in IDEMPOTENT_METHODS
+
+    def _backoff_seconds(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def request(self, method, url, **kwargs):
+        timeout = self.timeout if self.timeout is not None else kwargs.get('timeout')
+        attempts = 1 + (self.retries if self._is_idempotent(method, url) else 0)
+        response = None
+        for attempt in range(attempts):
+            kwargs['timeout'] = deadline.cap_timeout(timeout)  # fails fast once the request is out of time
+            if not self.breaker.allow():
+                raise UpstreamUnavailableError("{} is unavailable right now".format(self.name))
+            self._count('calls')
+            try:
+                response = self._attempt(method, url, kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # includes timing out while connecting, which is quick and cheap to retry
+                if attempt == attempts - 1:
+                    raise
+                logger.warning("{} call failed, will retry: {}".format(self.name, e))
+            else:
+                if (response.status_code not in RETRYABLE_STATUS_CODES) or (attempt == attempts - 1):
+                    return response     # let the caller deal with any error response like it always has
+                logger.warning("{} returned {}, will retry".format(self.name, response.status_code))
+            self._count('retried')
+            wait = self._backoff_seconds(attempt)
+            left = deadline.remaining()
+            self._sleep(wait if left is None else min(wait, left))
+        return response
+
+    def _attempt(self, method, url, kwargs):
+        """
+        Make one call and tell the breaker how it went. Only not being able to connect and 5xx responses say the
+        upstream is in trouble. Timing out waiting for a response usually means one slow query (and the breaker is
+        shared by every endpoint of the upstream), and anything else is most likely a bad request on our end.
+        """
+        settle = self.breaker.record_ignored
+        try:
+            response = self.session.request(method, url, **kwargs)
+            if response.status_code >= 500:
+                self._count('failures')
+                settle = self.breaker.record_failure
+            else:
+                settle = self.breaker.record_success    # even a 4xx means the service is up and answering
+            return response
+        except requests.exceptions.ConnectionError:
+            self._count('failures')
+            settle = self.breaker.record_failure
+            raise
+        except requests.exceptions.Timeout:
+            # retrying would just tie the worker up for that long again, so this isn't retried either
+            self._count('timeouts')
+            raise
+        finally:
+            # even if the call was interrupted (ie. by a gevent timeout), so a half-open breaker isn't left waiting
+            # forever on a trial call that never finishes
+            settle()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, data=None, json=None, **kwargs):
+        return self.request('POST', url, data=data, json=json, **kwargs)
+
+    def put(self, url, data=None, **kwargs):
+        return self.request('PUT', url, data=data, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            info = {
+                'calls': self.calls,
+                'failures': self.failures,
+                'timeouts': self.timeouts,
+                'retried': self.retried,
+            }
+        info.update(self.breaker.stats())
+        return info
+
+
+# Media Cloud sends long read-only queries as POSTs (ie. story counts); those are safe to retry, unlike its writes
+MEDIA_CLOUD_READ_PATH = re.compile(r'/api/v2/(?:[a-z0-9_]+/)*(?:count|list|field_count|word_matrix|sample|single)/?$')
+
+
+def media_cloud_retry_if(method, url):
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    return (method.upper() == 'POST') and (MEDIA_CLOUD_READ_PATH.search(url.split('?')[0]) is not None)
+
+
+_upstreams = {}
+_upstreams_lock = threading.Lock()
+
+
+def upstream(name, **settings):
+    """
+    The shared `Upstream` for this service, created with `settings` the first time it is asked for.
+    """
+    with _upstreams_lock:
+        if name not in _upstreams:
+            _upstreams[name] = Upstream(name, **settings)
+        return _upstreams[name]
+
+
+def upstream_stats():
+    with _upstreams_lock:
+        current = dict(_upstreams)
+    return {name: u.stats() for name, u in sorted(current.items())}
+
+
+def upstream_stats_prometheus():
+    """
+    The breaker state and counters for each upstream, in the Prometheus text exposition format.
+    """
+    stats = upstream_stats()
+    lines = ['# TYPE {}circuit_open gauge'.format(PROMETHEUS_PREFIX)]
+    for name, info in stats.items():
+        lines.append('{}circuit_open{{upstream="{}"}} {}'.format(PROMETHEUS_PREFIX, name,
+                                                                  1 if info['state'] == STATE_OPEN else 0))
+    for counter in ['calls', 'failures', 'timeouts', 'retried', 'fast_fails', 'times_opened']:
+        lines.append('# TYPE {}{} counter'.format(PROMETHEUS_PREFIX, counter))
+        for name, info in stats.items():
+            lines.append('{}{}{{upstream="{}"}} {}'.format(PROMETHEUS_PREFIX, counter, name, info[counter]))
+    return '\n'.join(lines) + '\n'
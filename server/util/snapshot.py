@@ -0,0 +1,120 @@
+"""
+Small, versioned JSON snapshots, for things that are slow to work out but rarely change (ie. which tag sets hold
+what) so each worker can load them when it starts up instead of asking the API again. They live in a file (writes are
+atomic, so workers on the same host can share one) or in a Redis key (shared by every host).
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class VersionedSnapshot:
+    """
+    One JSON file holding `data` plus the `version` of its format and when it was saved. Anything written with another
+    version, that doesn't pass `validate`, or that can't be read at all is treated as if there was no snapshot.
+    """
+
+    def __init__(self, path, version, validate=None):
+        """
+        :param validate: optionally, a function that raises ValueError if the data doesn't look right
+        """
+        self.path = path
+        self.version = version
+        self.validate = validate
+
+    def load(self):
+        """
+        :return: (data, seconds since epoch it was saved at), or (None, None) if there isn't a usable snapshot
+        """
+        try:
+            contents = self._read()
+            if contents is None:
+                return None, None
+            if contents.get('version') != self.version:
+                logger.info("Ignoring snapshot {} from version {}".format(self.path, contents.get('version')))
+                return None, None
+            self.check(contents['data'])
+            return contents['data'], contents['saved_at']
+        except (ValueError, KeyError, TypeError, AttributeError, OSError) as e:
+            logger.warning("Ignoring unusable snapshot {}: {}".format(self.path, e))
+            return None, None
+
+    def check(self, data):
+        """
+        Raise a ValueError if `data` doesn't pass `validate`.
+        """
+        if self.validate is not None:
+            self.validate(data)
+
+    def save(self, data):
+        self.check(data)
+        contents = {'version': self.version, 'saved_at': time.time(), 'data': data}
+        self._write(contents)
+        return contents['saved_at']
+
+    def _read(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write(self, contents):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.snapshot-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(contents, f)
+            os.replace(temp_path, self.path)     # so nobody ever reads a half-written file
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+class RedisSnapshot(VersionedSnapshot):
+    """
+    The same thing kept in one Redis key (the `path`) instead of a file, so it is shared by the workers on every host
+    (ie. all the Heroku dynos), not just the ones on one machine. Redis errors are raised as OSErrors, like a file that
+    can't be read or written would be.
+    """
+
+    def __init__(self, client, key, version, validate=None):
+        super().__init__(key, version, validate)
+        self.client = client
+
+    def _read(self):
+        try:
+            raw = self.client.get(self.path)
+        except redis.RedisError as e:
+            raise OSError("Couldn't read {} from Redis: {}".format(self.path, e)) from e
+        return None if raw is None else json.loads(raw)
+
+    def _write(self, contents):
+        try:
+            self.client.set(self.path, json.dumps(contents))
+        except redis.RedisError as e:
+            raise OSError("Couldn't write {} to Redis: {}".format(self.path, e)) from e
+
+
+def run_every(interval_secs, fn, name):
+    """
+    Call `fn` right away and then every `interval_secs` seconds, on a background daemon thread, logging (rather than
+    stopping on) any errors.
+    """
+    def loop():
+        while True:
+            try:
+                fn()
+            except Exception as e:     # pylint: disable=broad-except
+                logger.exception(e)
+            time.sleep(interval_secs)
+    thread = threading.Thread(target=loop, name=name, daemon=True)
+    thread.start()
+    return thread
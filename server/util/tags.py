@@ -1,17 +1,22 @@
 # pylint: disable=too-many-instance-attributes
 
+import bisect
 import logging
 import os
-from operator import itemgetter
 import json
 import codecs
+import threading
+import time
 from typing import List, Dict
 
+import redis
+
 from server import base_dir, TOOL_API_KEY
 from server.auth import user_mediacloud_client
-from server.cache import cache
+from server.cache import cache, redis_pool, EXPIRE_LIVE
 from server.util.stringutil import snake_to_camel
-from server.util.config import get_default_config
+from server.util.config import get_default_config, ConfigException
+from server.util.snapshot import VersionedSnapshot, RedisSnapshot, run_every
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +44,24 @@ def _load_media_collection_config():
 class TagSetDiscoverer:
     class __TagSetDiscoverer:
         def __init__(self):
-            self._discover()
+            tag_sets = _discovery.data()['tag_sets']
+            self._nyt_themes_set = tag_sets['nyt_themes_set']
+            self._nyt_themes_versions_set = tag_sets['nyt_themes_versions_set']
+            self._cliff_versions_set = tag_sets['cliff_versions_set']
+            self._cliff_places_set = tag_sets['cliff_places_set']
+            self._cliff_people_set = tag_sets['cliff_people_set']
+            self._cliff_orgs_set = tag_sets['cliff_orgs_set']
+            self._media_pub_country_set = tag_sets['media_pub_country_set']
+            self._media_pub_state_set = tag_sets['media_pub_state_set']
+            self._media_primary_language_set = tag_sets['media_primary_language_set']
+            self._media_subject_country_set = tag_sets['media_subject_country_set']
+            self._media_type_set = tag_sets['media_type_set']
+            self._collections_set = tag_sets['collections_set']
+            self._geo_collections_set = tag_sets['geo_collections_set']
+            self._partisan_2019_collections_set = tag_sets['partisan_2019_collections_set']
+            self._partisan_2016_collections_set = tag_sets['partisan_2016_collections_set']
+            self._extractor_versions_set = tag_sets['extractor_versions_set']
+            self._date_guess_methods_set = tag_sets['date_guess_methods_set']
 
         def as_dict(self):
             current_state = {}
@@ -56,35 +78,6 @@ class TagSetDiscoverer:
             current_state['collectionSets'] = self.collection_sets()
             return current_state
 
-        def _discover_by_name(self, tag_sets, tag_set_name):
-            tag_set = [ts for ts in tag_sets if ts['name'] == tag_set_name][0]
-            return tag_set['tag_sets_id']
-
-        def _discover(self):
-            try:
-                tag_sets = _cached_tag_set_list(rows=500)
-                self._nyt_themes_set = self._discover_by_name(tag_sets, 'nyt_labels')
-                self._nyt_themes_versions_set = self._discover_by_name(tag_sets, 'nyt_labels_version')
-                self._cliff_versions_set = self._discover_by_name(tag_sets, 'geocoder_version')
-                self._cliff_places_set = self._discover_by_name(tag_sets, 'mc-geocoder@media.mit.edu')
-                self._cliff_people_set = self._discover_by_name(tag_sets, 'cliff_people')
-                self._cliff_orgs_set = self._discover_by_name(tag_sets, 'cliff_organizations')
-                self._media_pub_country_set = self._discover_by_name(tag_sets, 'pub_country')
-                self._media_pub_state_set = self._discover_by_name(tag_sets, 'pub_state')
-                self._media_primary_language_set = self._discover_by_name(tag_sets, 'primary_language')
-                self._media_subject_country_set = self._discover_by_name(tag_sets, 'subject_country')
-                self._media_type_set = self._discover_by_name(tag_sets, 'media_format')
-                self._collections_set = self._discover_by_name(tag_sets, 'collection')
-                self._geo_collections_set = self._discover_by_name(tag_sets, 'geographic_collection')
-                self._partisan_2019_collections_set = self._discover_by_name(tag_sets, 'twitter_partisanship')
-                self._partisan_2016_collections_set = self._discover_by_name(tag_sets, 'retweet_partisanship_2016_count_10')
-                self._extractor_versions_set = self._discover_by_name(tag_sets, 'extractor_version')
-                self._date_guess_methods_set = self._discover_by_name(tag_sets, 'date_guess_method')
-            except Exception as e:
-                logger.error("Couldn't find a required tag set. See /doc/required-tags.md for more info on all the "
-                             "tag-sets the back-end should expose")
-                logger.exception(e)
-
         @property
         def nyt_themes_set(self):
             return self._nyt_themes_set
@@ -177,6 +170,10 @@ class TagSetDiscoverer:
         if not TagSetDiscoverer.instance:
             TagSetDiscoverer.instance = TagSetDiscoverer.__TagSetDiscoverer()
 
+    @classmethod
+    def reload(cls):
+        cls.instance = cls.__TagSetDiscoverer()
+
     def __getattr__(self, name):
         return getattr(self.instance, name)
 
@@ -184,7 +181,16 @@ class TagSetDiscoverer:
 class TagDiscoverer:
     class __TagDiscoverer:
         def __init__(self):
-            self._discover()
+            tags = _discovery.data()['tags']
+            self._is_spidered_story_tag = tags['is_spidered_story_tag']
+            self._is_undateable_story_tag = tags['is_undateable_story_tag']
+            self._nyt_themes_version_tags = tags['nyt_themes_version_tags']
+            self._cliff_version_tags = tags['cliff_version_tags']
+            # load up the list of tag sets that should be treated as ones that hold collections of media sources
+            collection_config = _load_media_collection_config()
+            self._default_collection_tag = collection_config['defaultCollection']['tagsId']
+            featured_tag_lists = [t['tags'] for t in collection_config['featuredCollections']['entries']]
+            self._featured_collection_tags = [t for t_list in featured_tag_lists for t in t_list]
 
         def as_dict(self):
             current_state = {}
@@ -192,34 +198,6 @@ class TagDiscoverer:
                 current_state[snake_to_camel(prop[1:])] = value
             return current_state
 
-        def _from_tag_and_set_names(self, tag_sets, tag_set_name, tag_name):
-            tag_set = [ts for ts in tag_sets if ts['name'] == tag_set_name][0]
-            tags_in_set = _cached_tag_list(tag_sets_id=tag_set['tag_sets_id'])
-            tag = [t for t in tags_in_set if t['tag'] == tag_name][0]
-            return tag['tags_id']
-
-        def _all_from_set_name(self, tag_sets, tag_set_name):
-            tag_set = [ts for ts in tag_sets if ts['name'] == tag_set_name][0]
-            tags = tags_in_tag_set(TOOL_API_KEY, tag_set['tag_sets_id'])
-            return [t['tags_id'] for t in tags]
-
-        def _discover(self):
-            try:
-                tag_sets = _cached_tag_set_list(rows=500)
-                self._is_spidered_story_tag = self._from_tag_and_set_names(tag_sets, 'spidered', 'spidered')
-                self._is_undateable_story_tag = self._from_tag_and_set_names(tag_sets, 'date_invalid', 'undateable')
-                self._nyt_themes_version_tags = self._all_from_set_name(tag_sets, 'nyt_labels_version')
-                self._cliff_version_tags = self._all_from_set_name(tag_sets, 'geocoder_version')
-                # load up the list of tag sets that should be treated as ones that hold collections of media sources
-                collection_config = _load_media_collection_config()
-                self._default_collection_tag = collection_config['defaultCollection']['tagsId']
-                featured_tag_lists = [t['tags'] for t in collection_config['featuredCollections']['entries']]
-                self._featured_collection_tags = [t for t_list in featured_tag_lists for t in t_list]
-            except Exception as e:
-                logger.error("Couldn't find a required tag. See /doc/required-tags.md for more info on all the tags "
-                             "the back-end should expose")
-                logger.exception(e)
-
         @property
         def is_spidered_story_tag(self):
             return self._is_spidered_story_tag
@@ -250,6 +228,10 @@ class TagDiscoverer:
         if not TagDiscoverer.instance:
             TagDiscoverer.instance = TagDiscoverer.__TagDiscoverer()
 
+    @classmethod
+    def reload(cls):
+        cls.instance = cls.__TagDiscoverer()
+
     def __getattr__(self, name):
         return getattr(self.instance, name)
 
@@ -257,6 +239,192 @@ class TagDiscoverer:
 # load the config helper
 config = get_default_config()
 
+# which tag set each `TagSetDiscoverer` property holds the id of (see /doc/required-tags.md)
+DISCOVERED_TAG_SETS = {
+    'nyt_themes_set': 'nyt_labels',
+    'nyt_themes_versions_set': 'nyt_labels_version',
+    'cliff_versions_set': 'geocoder_version',
+    'cliff_places_set': 'mc-geocoder@media.mit.edu',
+    'cliff_people_set': 'cliff_people',
+    'cliff_orgs_set': 'cliff_organizations',
+    'media_pub_country_set': 'pub_country',
+    'media_pub_state_set': 'pub_state',
+    'media_primary_language_set': 'primary_language',
+    'media_subject_country_set': 'subject_country',
+    'media_type_set': 'media_format',
+    'collections_set': 'collection',
+    'geo_collections_set': 'geographic_collection',
+    'partisan_2019_collections_set': 'twitter_partisanship',
+    'partisan_2016_collections_set': 'retweet_partisanship_2016_count_10',
+    'extractor_versions_set': 'extractor_version',
+    'date_guess_methods_set': 'date_guess_method',
+}
+# which (tag set name, tag name) each `TagDiscoverer` property holds the id of
+DISCOVERED_TAGS = {
+    'is_spidered_story_tag': ('spidered', 'spidered'),
+    'is_undateable_story_tag': ('date_invalid', 'undateable'),
+}
+# which tag set each `TagDiscoverer` property holds the ids of all the tags in
+DISCOVERED_TAG_LISTS = {
+    'nyt_themes_version_tags': 'nyt_labels_version',
+    'cliff_version_tags': 'geocoder_version',
+}
+
+# bump this whenever what gets discovered changes, so old snapshots are ignored
+TAG_DISCOVERY_VERSION = 1
+
+# by default the snapshot lives in Redis, so every dyno shares it; set this to a file path to keep it on local disk
+try:
+    TAG_DISCOVERY_SNAPSHOT = config.get('TAG_DISCOVERY_SNAPSHOT')
+except ConfigException:
+    TAG_DISCOVERY_SNAPSHOT = None
+TAG_DISCOVERY_SNAPSHOT_KEY = 'web-tools:tag-discovery'
+try:
+    TAG_DISCOVERY_REFRESH_SECS = int(config.get('TAG_DISCOVERY_REFRESH_SECS'))
+except ConfigException:
+    TAG_DISCOVERY_REFRESH_SECS = 60 * 60 * 6
+
+
+def _discover_tags_and_tag_sets():
+    """
+    Ask the API for the ids of all the tag sets and tags the app depends on. Raises an error if any are missing, rather
+    than returning a partial answer.
+    """
+    tool_mc = user_mediacloud_client(TOOL_API_KEY)
+    tag_sets_ids = {ts['name']: ts['tag_sets_id'] for ts in tool_mc.tagSetList(rows=500)}
+
+    def tag_sets_id_for(tag_set_name):
+        if tag_set_name not in tag_sets_ids:
+            raise ValueError("Couldn't find the '{}' tag set".format(tag_set_name))
+        return tag_sets_ids[tag_set_name]
+
+    def tags_id_for(tag_set_name, tag_name):
+        matching = [t for t in _all_tags_in_tag_set(TOOL_API_KEY, tag_sets_id_for(tag_set_name))
+                    if t['tag'] == tag_name]
+        if len(matching) == 0:
+            raise ValueError("Couldn't find the '{}' tag in the '{}' tag set".format(tag_name, tag_set_name))
+        return matching[0]['tags_id']
+
+    tags = {prop: tags_id_for(*names) for prop, names in DISCOVERED_TAGS.items()}
+    for prop, tag_set_name in DISCOVERED_TAG_LISTS.items():
+        tags[prop] = [t['tags_id'] for t in _all_tags_in_tag_set(TOOL_API_KEY, tag_sets_id_for(tag_set_name))]
+    return {
+        'api_url': user_mediacloud_client(TOOL_API_KEY).V2_API_URL,
+        'tag_sets': {prop: tag_sets_id_for(name) for prop, name in DISCOVERED_TAG_SETS.items()},
+        'tags': tags,
+    }
+
+
+def validate_discovery(data):
+    """
+    Raise a ValueError unless `data` has an id for every tag set and tag we need, from the API we're talking to now.
+    """
+    if data['api_url'] != user_mediacloud_client(TOOL_API_KEY).V2_API_URL:
+        raise ValueError("discovered on another Media Cloud server ({})".format(data['api_url']))
+    for prop in DISCOVERED_TAG_SETS:
+        if not isinstance(data['tag_sets'].get(prop), int):
+            raise ValueError("missing the {} tag set".format(prop))
+    for prop in DISCOVERED_TAGS:
+        if not isinstance(data['tags'].get(prop), int):
+            raise ValueError("missing the {} tag".format(prop))
+    for prop in DISCOVERED_TAG_LISTS:
+        tags_ids = data['tags'].get(prop)
+        if (not isinstance(tags_ids, list)) or (len(tags_ids) == 0) or \
+                not all(isinstance(tags_id, int) for tags_id in tags_ids):
+            raise ValueError("missing the {} tags".format(prop))
+
+
+class TagDiscovery:
+    """
+    Holds the ids the discoverers hand out. They come from a snapshot when there is a recent one (so a new worker has
+    them right away), and otherwise from asking the API, after which the snapshot is rewritten for everyone else.
+    `refresh` is called on a schedule in the background (see `start_tag_discovery`), so requests don't wait on this.
+    """
+
+    def __init__(self, snapshot, refresh_secs, discover=_discover_tags_and_tag_sets):
+        self.snapshot = snapshot
+        self.refresh_secs = refresh_secs
+        self._discover = discover
+        self._lock = threading.Lock()
+        self._data = None
+        self._saved_at = None
+        self._metadata_labelers = {}
+
+    def data(self):
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    data, saved_at = self.snapshot.load()
+                    if data is None:
+                        data, saved_at = self._discover_and_save()
+                    self._use(data, saved_at)
+        return self._data
+
+    def metadata_labelers(self):
+        self.data()
+        return self._metadata_labelers
+
+    def refresh(self):
+        """
+        Pick up a newer snapshot if another worker wrote one, or rediscover everything if the snapshot is too old.
+        If discovery fails we keep what we had. The lock is only taken to swap the new ids in, so requests keep using
+        the old ones while this talks to the API.
+        """
+        data, saved_at = self.snapshot.load()
+        if (data is None) or (time.time() - saved_at >= self.refresh_secs):
+            data, saved_at = self._discover_and_save()
+        with self._lock:
+            if saved_at != self._saved_at:
+                self._use(data, saved_at)
+
+    def _discover_and_save(self):
+        try:
+            data = self._discover()
+            self.snapshot.check(data)
+        except Exception:
+            logger.error("Couldn't find a required tag set or tag. See /doc/required-tags.md for more info on all the "
+                         "tags and tag-sets the back-end should expose")
+            raise
+        try:
+            saved_at = self.snapshot.save(data)
+        except OSError as e:
+            logger.warning("Couldn't save the tag discovery snapshot: {}".format(e))
+            saved_at = time.time()
+        return data, saved_at
+
+    def _use(self, data, saved_at):
+        self._metadata_labelers = compile_metadata_labelers(data['tag_sets'])
+        self._data = data
+        self._saved_at = saved_at
+        for discoverer in [TagSetDiscoverer, TagDiscoverer]:
+            if discoverer.instance is not None:
+                discoverer.reload()     # swap in a new one with the new ids
+
+
+if TAG_DISCOVERY_SNAPSHOT is None:
+    _snapshot = RedisSnapshot(redis.StrictRedis(connection_pool=redis_pool), TAG_DISCOVERY_SNAPSHOT_KEY,
+                              TAG_DISCOVERY_VERSION, validate_discovery)
+else:
+    _snapshot = VersionedSnapshot(TAG_DISCOVERY_SNAPSHOT, TAG_DISCOVERY_VERSION, validate_discovery)
+_discovery = TagDiscovery(_snapshot, TAG_DISCOVERY_REFRESH_SECS)
+
+
+def start_tag_discovery():
+    """
+    Load the discovered tag and tag set ids when a web worker starts, and keep them fresh in the background from then
+    on. Called from gunicorn's `post_worker_init` hook (see gunicorn.conf.py), not on import, so tests and flask
+    commands don't start calling the API in the background.
+    """
+    return run_every(min(TAG_DISCOVERY_REFRESH_SECS, 60 * 10), _discovery.refresh, 'tag-discovery')
+
+
+def refresh_tag_discovery():
+    """
+    Load the discovered ids now, rediscovering them first if the snapshot is missing or too old (ie. from
+    `flask warm-cache`, so the web workers find a fresh snapshot when they start).
+    """
+    _discovery.refresh()
+
 
 def processed_for_themes_query_clause():
     """
@@ -292,20 +460,51 @@ def is_bad_theme(tag_text: str):
     return tag_text in BAD_NYT_THEME_TAGS
 
 
-def label_for_metadata_tag(tag):
-    label = None
-    tag_sets_id = tag['tag_sets_id']
-    if tag_sets_id == TagSetDiscoverer().media_pub_country_set:
-        label = tag['tag'][-3:]
-    elif tag_sets_id == TagSetDiscoverer().media_pub_state_set:
-        label = tag['tag'][4:]
-    elif tag_sets_id == TagSetDiscoverer().media_primary_language_set:
-        label = tag['tag']
-    elif tag_sets_id == TagSetDiscoverer().media_subject_country_set:
-        label = tag['tag']
-    elif tag_sets_id == TagSetDiscoverer().media_type_set:
-        label = tag['tag']
-    return label
+def _pub_country_label(tag):
+    return tag['tag'][-3:]  # ie. "pub_USA" => "USA"
+
+
+def _pub_state_label(tag):
+    return tag['tag'][4:]   # ie. "pub_US-MA" => "US-MA"
+
+
+def _tag_name_label(tag):
+    return tag['tag']
+
+
+# how to get the label for a tag in each of the media metadata tag sets (keyed by `TagSetDiscoverer` property)
+METADATA_LABELERS = {
+    'media_pub_country_set': _pub_country_label,
+    'media_pub_state_set': _pub_state_label,
+    'media_primary_language_set': _tag_name_label,
+    'media_subject_country_set': _tag_name_label,
+    'media_type_set': _tag_name_label,
+}
+
+
+def compile_metadata_labelers(tag_sets):
+    """
+    :param tag_sets: the discovered tag set ids, keyed by `TagSetDiscoverer` property
+    :return: a dict from tag_sets_id to the function that gets the label for a tag in that set
+    """
+    return {tag_sets[prop]: labeler for prop, labeler in METADATA_LABELERS.items() if prop in tag_sets}
+
+
+def metadata_labelers():
+    """
+    The tag_sets_id => label function lookup for media metadata tags, built once each time the tag sets are
+    discovered. Grab this once before going through a long list of sources (see `label_for_metadata_tag`).
+    """
+    return _discovery.metadata_labelers()
+
+
+def label_for_metadata_tag(tag, labelers=None):
+    """
+    :param labelers: the result of `metadata_labelers()`, if you already have it handy
+    :return: the label for a media metadata tag, or None if it isn't in one of the metadata tag sets
+    """
+    labeler = (labelers or metadata_labelers()).get(tag['tag_sets_id'])
+    return labeler(tag) if labeler is not None else None
 
 
 static_tag_set_cache_dir = os.path.join(base_dir, 'server', 'static', 'data')
@@ -315,42 +514,96 @@ def tags_in_tag_set(mc_api_key, tag_sets_id):
     return tag_set_with_tags(mc_api_key, tag_sets_id, False, True)['tags']
 
 
-def tag_set_with_tags(mc_api_key, tag_sets_id, only_public_tags=False, use_file_cache=False):
-    # don't need to cache here, because either you are reading from a file, or each page is cached
-    local_mc = user_mediacloud_client(mc_api_key)
+def tag_set_with_tags(mc_api_key, tag_sets_id, only_public_tags=False,   # pylint: disable=unused-argument
+                      use_file_cache=False):
+    # don't need to cache here, because either you are reading from a file, or the whole list of tags is cached
+    # (for everyone, because the tags in a tag set don't depend on who is asking; mc_api_key is only kept for callers)
     if use_file_cache:
         file_name = "tags_in_{}.json".format(tag_sets_id)
         file_path = os.path.join(static_tag_set_cache_dir, file_name)
         if os.path.isfile(file_path):
             return cached_tag_set_file(file_path)   # more caching!
     tag_set = _cached_tag_set(tag_sets_id)
-    # page through tags
-    more_tags = True
-    all_tags = []
-    last_tags_id = 0
-    while more_tags:
-        tags = _cached_tag_page(mc_api_key, tag_set['tag_sets_id'], last_tags_id, 500, only_public_tags)
-        all_tags = all_tags + tags
-        if len(tags) > 0:
-            last_tags_id = tags[-1]['tags_id']
-        more_tags = len(tags) != 0
-    # double check the show_on_media because that controls public or not
-    tag_list = [t for t in all_tags if (only_public_tags is False) or
-                (t['show_on_media'] == 1 or t['show_on_media'] is True)]
-    # sort by label (or tag if no label exists)
-    for t in tag_list:
-        t['sort_key'] = t['label'].lower() if t['label'] else t['tag'].lower()
-    tag_list = sorted(tag_list, key=itemgetter('sort_key'))
-    for t in tag_list:
-        del t['sort_key']
-    tag_set['tags'] = tag_list
+    tag_set['tags'] = tag_set_index(tag_set['tag_sets_id'], only_public_tags)['tags']
     tag_set['name'] = tag_set['label']
     return tag_set
 
 
+def tag_set_index(tag_sets_id, only_public_tags=False):
+    """
+    All the tags in a tag set (or just the public ones), already sorted by label (or tag if there is no label), along
+    with indexes into that list: `positions_by_id` (keyed by tags_id, as a string) and `positions_by_tag` (keyed by tag
+    name).
+    """
+    return _cached_tag_set_index(int(tag_sets_id), only_public_tags)
+
+
+def tag_in_tag_set(tag_sets_id, tags_id):
+    """
+    :return: the tag with this id from the tag set, or None if it isn't in there
+    """
+    index = tag_set_index(tag_sets_id)
+    position = index['positions_by_id'].get(str(tags_id))
+    return None if position is None else index['tags'][position]
+
+
+def tag_in_tag_set_by_name(tag_sets_id, tag_name):
+    """
+    :return: the tag with this name (ie. "pub_USA") from the tag set, or None if it isn't in there
+    """
+    index = tag_set_index(tag_sets_id)
+    position = index['positions_by_tag'].get(tag_name)
+    return None if position is None else index['tags'][position]
+
+
+def _is_public_tag(tag):
+    # show_on_media is what controls if a tag is public or not
+    return tag['show_on_media'] == 1 or tag['show_on_media'] is True
+
+
+def _tag_sort_key(tag):
+    return tag['label'].lower() if tag['label'] else tag['tag'].lower()
+
+
 @cache.cache_on_arguments()
-def _cached_tag_page(mc_api_key, tag_sets_id, last_tags_id, rows, public_only):
-    # user agnositic here because the list of tags in a collection only changes for users based on public_only
+def _cached_tag_set_index(tag_sets_id, public_only):
+    """
+    Pages through the whole tag set once and sorts it once, so the list (and lookups by id or name) are all served from
+    this one cached value. It is shared by every user, like `_cached_tag_set`, so it is fetched with the tool key. Big
+    tag sets get stored in chunks - see server/cache/chunks.py.
+    """
+    return build_tag_set_index(_all_tags_in_tag_set(TOOL_API_KEY, tag_sets_id, public_only), public_only)
+
+
+def _all_tags_in_tag_set(mc_api_key, tag_sets_id, public_only=False):
+    all_tags = []
+    last_tags_id = 0
+    while True:
+        tags = _tag_page(mc_api_key, tag_sets_id, last_tags_id, 500, public_only)
+        if len(tags) == 0:
+            break
+        all_tags.extend(tags)
+        last_tags_id = tags[-1]['tags_id']
+    return all_tags
+
+
+def build_tag_set_index(tags, only_public_tags=False):
+    """
+    Sort a list of tags and index it (see `tag_set_index`). Keys are strings so it can be cached as plain json.
+    :param only_public_tags: the tags came from asking the API for public ones only; double check them against
+    show_on_media, because that is what controls public or not on our side
+    """
+    if only_public_tags:
+        tags = [t for t in tags if _is_public_tag(t)]
+    tags = sorted(tags, key=_tag_sort_key)
+    return {
+        'tags': tags,
+        'positions_by_id': {str(t['tags_id']): i for i, t in enumerate(tags)},
+        'positions_by_tag': {t['tag']: i for i, t in enumerate(tags)},
+    }
+
+
+def _tag_page(mc_api_key, tag_sets_id, last_tags_id, rows, public_only):
     local_mc = user_mediacloud_client(mc_api_key)
     tag_list = local_mc.tagList(tag_sets_id=tag_sets_id, last_tags_id=last_tags_id, rows=rows, public_only=public_only)
     return tag_list
@@ -381,28 +634,114 @@ def paged_media_with_tag(tags_id, user_mc_key, cached=False) -> List[Dict]:
 
 
 def media_with_tag(tags_id, cached=False) -> List[Dict]:
-    more_media = True
+    if cached:
+        index = collection_membership(tags_id)
+        return [index['media'][str(media_id)] for media_id in index['order']]
+    return _media_with_tag(tags_id)
+
+
+def media_with_tag_slice(tags_id, offset=0, limit=None) -> Dict:
+    """
+    One page of the sources in a collection, sorted by name, straight from the membership index.
+    :return: a dict with the `total` number of sources in the collection and the `media` in this slice
+    """
+    index = collection_membership(tags_id)
+    order = index['order'][offset:] if limit is None else index['order'][offset:offset + limit]
+    return {
+        'total': len(index['order']),
+        'media': [index['media'][str(media_id)] for media_id in order],
+    }
+
+
+def collection_membership(tags_id) -> Dict:
+    """
+    The sources in a collection, as an index of `media` (keyed by media_id, as a string), their `order` sorted by name,
+    and the `last_media_id` seen. Brand new sources are picked up within a few minutes by asking for just the ones after
+    `last_media_id` (media ids only go up), which is a small, short lived cache. Anything else that changes outside of
+    this app (existing sources added to or removed from the collection) is picked up when the full index gets rebuilt in
+    the background, which happens when it is read more than 10 minutes after it was built. Both are cleared right away
+    when a collection is edited here, because they depend on its tags_id.
+    Ok to be a cross-user cache here
+    """
+    index = _cached_collection_membership(tags_id)
+    newer_media = _cached_collection_members_after(tags_id, index['last_media_id'])
+    if len(newer_media) > 0:
+        index = add_to_membership_index(index, newer_media)
+    return index
+
+
+@cache.cache_on_arguments(soft_ttl=60*10, depends_on=['tags_id'])
+def _cached_collection_membership(tags_id) -> Dict:
+    """
+    The whole index is cached as one value (big collections get stored in chunks - see server/cache/chunks.py), so
+    reading it back is one round trip instead of one per page of 100 sources.
+    """
+    return build_membership_index(_media_with_tag_pages(tags_id, 0))
+
+
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE, soft_ttl=60*5, depends_on=['tags_id'])
+def _cached_collection_members_after(tags_id, last_media_id) -> List[Dict]:
+    return _media_with_tag_pages(tags_id, last_media_id)
+
+
+def _media_sort_key(media):
+    return media['name'].lower()
+
+
+def build_membership_index(media_list) -> Dict:
+    """
+    Index a list of sources (see `collection_membership`). Keys are strings so it can be cached as plain json.
+    """
+    return add_to_membership_index({'media': {}, 'order': [], 'last_media_id': 0}, media_list)
+
+
+def add_to_membership_index(index, media_list) -> Dict:
+    """
+    Add (or update) sources in a membership index, keeping it sorted by name. Returns a new index, and leaves `index`
+    as it was.
+    """
+    media = dict(index['media'])
+    changed_ids = set()
+    for m in media_list:
+        media[str(m['media_id'])] = m
+        changed_ids.add(m['media_id'])
+    order = [media_id for media_id in index['order'] if media_id not in changed_ids]
+    if len(changed_ids) > len(order):
+        order = [m['media_id'] for m in sorted(media.values(), key=_media_sort_key)]
+    else:
+        # usually just a few new sources, so slot each one into place rather than sorting the whole thing again
+        keys = [_media_sort_key(media[str(media_id)]) for media_id in order]
+        for media_id in sorted(changed_ids):
+            sort_key = _media_sort_key(media[str(media_id)])
+            position = bisect.bisect_right(keys, sort_key)
+            keys.insert(position, sort_key)
+            order.insert(position, media_id)
+    last_media_id = max([index['last_media_id']] + list(changed_ids))
+    return {'media': media, 'order': order, 'last_media_id': last_media_id}
+
+
+def _media_with_tag(tags_id) -> List[Dict]:
+    return sorted(_media_with_tag_pages(tags_id, 0), key=_media_sort_key)
+
+
+def _media_with_tag_pages(tags_id, max_media_id) -> List[Dict]:
+    # all the sources in the collection after max_media_id, in media_id order
     all_media = []
-    max_media_id = 0
+    more_media = True
     while more_media:
         logger.debug("last_media_id %s", str(max_media_id))
-        if cached:
-            media = cached_media_with_tag_page(tags_id, max_media_id)
-        else:
-            media = _media_with_tag_page(tags_id, max_media_id)
-        all_media = all_media + media
+        media = _media_with_tag_page(tags_id, max_media_id)
+        all_media.extend(media)
         if len(media) > 0:
             max_media_id = media[-1]['media_id']
         more_media = len(media) == 100
-    sorted_results = sorted(all_media, key=lambda t: t['name'].lower())
-    return sorted_results
+    return all_media
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(depends_on=['tags_id'])
 def cached_media_with_tag_page(tags_id, max_media_id, user_mc_key=None) -> List[Dict]:
     """
-    We have to do this on the page, not the full list because memcache has a 1MB cache upper limit,
-    and some of the collections have TONS of sources
+    Cached by page for things that stream through a collection (see collection_membership for the whole list)
     Ok to be a cross-user cache here
     """
     return _media_with_tag_page(tags_id, max_media_id, user_mc_key)
@@ -413,18 +752,6 @@ def _media_with_tag_page(tags_id, max_media_id, user_mc_key=None) -> List[Dict]:
     return user_mc.mediaList(tags_id=tags_id, last_media_id=max_media_id, rows=100)
 
 
-@cache.cache_on_arguments()
-def _cached_tag_list(**kwargs):
-    user_mc = user_mediacloud_client(user_mc_key=TOOL_API_KEY)
-    return user_mc.tagList(**kwargs)
-
-
-@cache.cache_on_arguments()
-def _cached_tag_set_list(**kwargs):
-    user_mc = user_mediacloud_client(user_mc_key=TOOL_API_KEY)
-    return user_mc.tagSetList(**kwargs)
-
-
 @cache.cache_on_arguments()
 def _cached_tag_set(tag_sets_id):
     user_mc = user_mediacloud_client(user_mc_key=TOOL_API_KEY)
@@ -0,0 +1,89 @@
+import concurrent.futures
+import threading
+import unittest
+
+import requests
+
+from server.util import deadline
+from server.util.fanout import fan_out, map_in_order
+from server.util.resilience import Upstream, CircuitBreaker
+
+
+class RecordingSession:
+
+    def __init__(self):
+        self.timeouts = []
+
+    def request(self, _method, _url, **kwargs):
+        self.timeouts.append(kwargs['timeout'])
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+class DeadlineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        deadline.clear()
+        self.pool.shutdown()
+
+    def testNoDeadline(self):
+        assert deadline.remaining() is None
+        assert deadline.cap_timeout((5, 30)) == (5, 30)
+        deadline.check()
+
+    def testCapTimeout(self):
+        deadline.start(10)
+        assert deadline.cap_timeout(3) == 3
+        connect, read = deadline.cap_timeout((5, 30))
+        assert connect == 5
+        assert 9 < read <= 10
+        assert 9 < deadline.cap_timeout(None) <= 10
+
+    def testSpentBudgetFailsFast(self):
+        deadline.start(0)
+        self.assertRaises(deadline.DeadlineExceededError, deadline.check)
+        self.assertRaises(requests.exceptions.Timeout, deadline.cap_timeout, (5, 30))
+        self.assertRaises(concurrent.futures.TimeoutError, deadline.cap_timeout, 5)
+
+    def testUpstreamTimeoutFitsInBudget(self):
+        session = RecordingSession()
+        api = Upstream('test', session=session, timeout=(5, 300), breaker=CircuitBreaker())
+        api.get('http://example.com')
+        assert session.timeouts[-1] == (5, 300)
+        deadline.start(20)
+        api.get('http://example.com')
+        assert session.timeouts[-1][1] <= 20
+        deadline.start(0)
+        self.assertRaises(deadline.DeadlineExceededError, api.get, 'http://example.com')
+        assert len(session.timeouts) == 2   # never called the upstream
+        assert api.stats()['failures'] == 0
+
+    def testCarriedToPoolThreads(self):
+        deadline.start(60)
+        results = fan_out(deadline.remaining, deadline.remaining, deadline.remaining, pool=self.pool)
+        assert all((r is not None) and (r <= 60) for r in results)
+        assert all((r is not None) and (r <= 60) for r in map_in_order(lambda _: deadline.remaining(), range(4),
+                                                                            max_workers=2, pool=self.pool))
+        assert deadline.remaining() is not None
+
+    def testFanOutStopsAtDeadline(self):
+        deadline.start(0.1)
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'slow'
+        try:
+            self.assertRaises(concurrent.futures.TimeoutError, fan_out, started.wait, slow, pool=self.pool)
+        finally:
+            release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
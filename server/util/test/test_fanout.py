@@ -0,0 +1,94 @@
+import concurrent.futures
+import threading
+import time
+import unittest
+
+from server.util.fanout import fan_out, map_in_order
+
+
+class FanOutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+
+    def testResultsInOrder(self):
+        results = fan_out(lambda: 'a', lambda: time.sleep(0.05) or 'b', lambda: 'c', pool=self.pool)
+        assert results == ['a', 'b', 'c']
+        assert fan_out(lambda: 'only', pool=self.pool) == ['only']
+        assert fan_out(pool=self.pool) == []
+
+    def testRunsConcurrently(self):
+        barrier = threading.Barrier(2, timeout=2)   # only passes if both calls are running at the same time
+        results = fan_out(lambda: barrier.wait() is not None, lambda: barrier.wait() is not None, pool=self.pool)
+        assert results == [True, True]
+
+    def testErrorPropagates(self):
+        def failing():
+            raise ValueError("upstream broke")
+        with self.assertRaises(ValueError):
+            fan_out(lambda: 1, failing, pool=self.pool)
+        with self.assertRaises(ValueError):
+            fan_out(failing, lambda: 1, pool=self.pool)
+
+    def testTimeout(self):
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            fan_out(lambda: 1, lambda: time.sleep(1), timeout=0.1, pool=self.pool)
+
+    def testBusyPoolDoesNotDeadlock(self):
+        # every worker is tied up waiting on fan_out calls of its own, so nothing submitted would ever get run
+        busy_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            outer = busy_pool.submit(lambda: fan_out(lambda: 1, lambda: 2, pool=busy_pool))
+            assert outer.result(timeout=2) == [1, 2]
+        finally:
+            busy_pool.shutdown(wait=True)
+
+
+class MapInOrderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+
+    def testOrderPreserved(self):
+        # later items finish first, but still come back in order
+        results = map_in_order(lambda i: time.sleep(0.01 * (5 - i)) or i * 10, range(5), max_workers=5,
+                               pool=self.pool)
+        assert list(results) == [0, 10, 20, 30, 40]
+        assert len(list(map_in_order(lambda i: i, [], pool=self.pool))) == 0
+
+    def testWorkerBudget(self):
+        lock = threading.Lock()
+        running = [0]
+        most_running = [0]
+
+        def work(i):
+            with lock:
+                running[0] += 1
+                most_running[0] = max(most_running[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return i
+        assert list(map_in_order(work, range(12), max_workers=3, pool=self.pool)) == list(range(12))
+        assert most_running[0] <= 3
+
+    def testErrorPropagates(self):
+        def work(i):
+            if i == 2:
+                raise ValueError("bad query")
+            return i
+        results = map_in_order(work, range(5), max_workers=2, pool=self.pool)
+        assert next(results) == 0
+        assert next(results) == 1
+        with self.assertRaises(ValueError):
+            next(results)
+
+
+if __name__ == "__main__":
+    unittest.main()
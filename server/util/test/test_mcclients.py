@@ -0,0 +1,88 @@
+# pylint: disable=protected-access
+
+import threading
+import types
+import unittest
+
+from server.util.mcclients import ClientPool, SessionRequests, share_connections, shared_session
+
+
+class FakeClient:
+
+    V2_API_URL = 'https://api.mediacloud.org/api/v2/'
+
+    def __init__(self, auth_token):
+        self.auth_token = auth_token
+
+
+class FakeAdminClient(FakeClient):
+    pass
+
+
+class ClientPoolTest(unittest.TestCase):
+
+    def testReuse(self):
+        pool = ClientPool(max_size=4, api_url='http://localhost/api/v2/')
+        client = pool.get(FakeClient, 'key-1')
+        assert client.auth_token == 'key-1'
+        assert client.V2_API_URL == 'http://localhost/api/v2/'
+        assert pool.get(FakeClient, 'key-1') is client
+        assert pool.get(FakeClient, 'key-2') is not client
+        assert pool.get(FakeAdminClient, 'key-1') is not client   # admin and regular clients are kept apart
+        stats = pool.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 3
+        assert stats['size'] == 3
+
+    def testLruEviction(self):
+        pool = ClientPool(max_size=2)
+        first = pool.get(FakeClient, 'key-1')
+        pool.get(FakeClient, 'key-2')
+        pool.get(FakeClient, 'key-1')       # now key-2 is the least recently used
+        pool.get(FakeClient, 'key-3')
+        assert pool.stats()['evictions'] == 1
+        assert pool.get(FakeClient, 'key-1') is first
+        assert pool.stats()['size'] == 2
+        misses = pool.stats()['misses']
+        pool.get(FakeClient, 'key-2')
+        assert pool.stats()['misses'] == misses + 1
+
+    def testDiscard(self):
+        pool = ClientPool()
+        client = pool.get(FakeClient, 'key-1')
+        pool.get(FakeAdminClient, 'key-1')
+        pool.get(FakeClient, 'key-2')
+        pool.discard('key-1')
+        assert pool.stats()['size'] == 1
+        assert pool.get(FakeClient, 'key-1') is not client
+
+    def testThreadSafety(self):
+        pool = ClientPool(max_size=5)
+
+        def worker(offset):
+            for i in range(200):
+                pool.get(FakeClient, 'key-{}'.format((i + offset) % 10))
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = pool.stats()
+        assert stats['size'] == 5
+        assert stats['hits'] + stats['misses'] == 8 * 200
+
+
+class SharedSessionTest(unittest.TestCase):
+
+    def testShareConnections(self):
+        session = shared_session(connections_per_host=8)
+        assert session.get_adapter('https://api.mediacloud.org/')._pool_maxsize == 8
+        client_module = types.SimpleNamespace(requests=None)
+        share_connections(client_module, session)
+        assert isinstance(client_module.requests, SessionRequests)
+        assert client_module.requests.session is session
+        assert client_module.requests.codes['ok'] == 200   # everything else still comes from `requests`
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+
+from server.util import deadline
+from server.util.prefetch import read_ahead
+
+
+class ReadAheadTest(unittest.TestCase):
+
+    def testAllPagesInOrder(self):
+        assert list(read_ahead(iter(range(20)), depth=2)) == list(range(20))
+        assert len(list(read_ahead(iter([])))) == 0
+
+    def testFetchesWhileCallerIsBusy(self):
+        fetched = []
+
+        def pages():
+            for i in range(3):
+                fetched.append(i)
+                yield i
+        results = read_ahead(pages(), depth=2)
+        assert next(results) == 0
+        time.sleep(0.1)     # ie. writing out the first page
+        assert fetched == [0, 1, 2]
+        assert list(results) == [1, 2]
+
+    def testBackpressure(self):
+        fetched = []
+
+        def pages():
+            for i in range(100):
+                fetched.append(i)
+                yield i
+        results = read_ahead(pages(), depth=2)
+        assert next(results) == 0
+        time.sleep(0.1)
+        # one handed out, two waiting in the buffer and one more waiting to get in
+        assert len(fetched) <= 4
+        results.close()
+
+    def testErrorRaisedInOrder(self):
+        def pages():
+            yield 'a'
+            yield 'b'
+            raise ValueError("api call failed")
+        results = read_ahead(pages())
+        assert next(results) == 'a'
+        assert next(results) == 'b'
+        with self.assertRaises(ValueError):
+            next(results)
+
+    def testStopsWhenCallerStops(self):
+        finished = threading.Event()
+
+        def pages():
+            try:
+                yield from range(1000)
+            finally:
+                finished.set()
+        results = read_ahead(pages(), depth=1)
+        assert next(results) == 0
+        results.close()
+        assert finished.wait(timeout=2)
+
+    def testCarriesDeadline(self):
+        deadline.start(60)
+        try:
+            remaining = list(read_ahead((deadline.remaining() for _ in range(2))))
+        finally:
+            deadline.clear()
+        assert all((r is not None) and (r <= 60) for r in remaining)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+from server.util.replay import ApiRecorder, ReplayMissError, canonical_request, MODE_RECORD, MODE_REPLAY
+
+
+def _prepared(url, method='GET', data=None):
+    return requests.Request(method, url, data=data).prepare()
+
+
+def _fake_send(_adapter, _request, *_args, **_kwargs):
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json'
+    response._content = b'{"count": 12}'    # pylint: disable=protected-access
+    response.encoding = 'utf-8'
+    return response
+
+
+class ApiRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fixture_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.fixture_dir)
+
+    def testCanonicalRequest(self):
+        a = _prepared('https://api.mediacloud.org/api/v2/stories_public/count?q=obama&fq=&key=abc')
+        b = _prepared('https://API.mediacloud.org/api/v2/stories_public/count?key=xyz&fq=&q=obama')
+        assert canonical_request(a) == canonical_request(b)
+        assert 'abc' not in canonical_request(a)
+        c = _prepared('https://api.mediacloud.org/api/v2/stories_public/count?q=trump&key=abc')
+        assert canonical_request(a) != canonical_request(c)
+
+    def testRecordThenReplay(self):
+        request = _prepared('https://api.mediacloud.org/api/v2/stories_public/count?q=obama&key=abc')
+        ApiRecorder(MODE_RECORD, self.fixture_dir).wrap(_fake_send)(None, request)
+        replayer = ApiRecorder(MODE_REPLAY, self.fixture_dir)
+        response = replayer.wrap(_fake_send)(None, _prepared(
+            'https://api.mediacloud.org/api/v2/stories_public/count?key=other&q=obama'))
+        assert response.status_code == 200
+        assert response.json() == {'count': 12}
+        assert replayer.stats()['replayed'] == 1
+
+    def testReplayMiss(self):
+        replayer = ApiRecorder(MODE_REPLAY, self.fixture_dir)
+        request = _prepared('https://api.mediacloud.org/api/v2/tags/single/1')
+        self.assertRaises(ReplayMissError, replayer.wrap(_fake_send), None, request)
+        assert replayer.stats()['misses'] == 1
+        # a miss isn't a network error, so it isn't retried or counted against the circuit breaker
+        assert not issubclass(ReplayMissError, requests.exceptions.ConnectionError)
+
+    def testUnknownMode(self):
+        self.assertRaises(ValueError, ApiRecorder, 'rewind', self.fixture_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
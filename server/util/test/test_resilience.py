@@ -0,0 +1,171 @@
+import unittest
+
+import requests
+
+from server.util.resilience import CircuitBreaker, Upstream, UpstreamUnavailableError, media_cloud_retry_if, \
+    upstream_stats_prometheus, STATE_CLOSED, STATE_OPEN, STATE_HALF_OPEN
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSession:
+    """
+    Plays back a list of outcomes: a status code to respond with, or an exception to raise.
+    """
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        return response
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=self.clock)
+
+    def testOpensAfterConsecutiveFailures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()   # resets the streak
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        assert self.breaker.state == STATE_CLOSED
+        self.breaker.record_failure()
+        assert self.breaker.state == STATE_OPEN
+        assert not self.breaker.allow()
+        assert self.breaker.stats()['fast_fails'] == 1
+
+    def testHalfOpenTrial(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+        self.clock.now += 31
+        assert self.breaker.state == STATE_HALF_OPEN
+        assert self.breaker.allow()         # one trial call
+        assert not self.breaker.allow()     # everyone else still fails fast
+        self.breaker.record_failure()
+        assert self.breaker.state == STATE_OPEN
+        self.clock.now += 31
+        assert self.breaker.allow()
+        self.breaker.record_success()
+        assert self.breaker.state == STATE_CLOSED
+        assert self.breaker.stats()['times_opened'] == 2
+
+
+class UpstreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.session = None
+        self.sleeps = []
+
+    def _upstream(self, outcomes, **kwargs):
+        self.session = FakeSession(outcomes)
+        self.sleeps = []
+        return Upstream('test', session=self.session, sleep=self.sleeps.append, **kwargs)
+
+    def testTimeoutApplied(self):
+        upstream = self._upstream([200], timeout=(2, 10))
+        assert upstream.get('http://example.com/', timeout=99).status_code == 200
+        assert self.session.calls[0][2]['timeout'] == (2, 10)
+
+    def testRetriesIdempotentCalls(self):
+        upstream = self._upstream([requests.exceptions.ConnectionError(), 503, 200], retries=2, backoff=1)
+        assert upstream.get('http://example.com/').status_code == 200
+        assert len(self.session.calls) == 3
+        assert len(self.sleeps) == 2
+        assert 0 <= self.sleeps[0] <= 1
+        assert 0 <= self.sleeps[1] <= 2     # jittered, and backing off
+        assert upstream.stats()['retried'] == 2
+
+    def testGivesUp(self):
+        upstream = self._upstream([503, 503, 503], retries=2)
+        assert upstream.get('http://example.com/').status_code == 503
+        upstream = self._upstream([requests.exceptions.ConnectionError()] * 3, retries=2)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            upstream.get('http://example.com/')
+
+    def testNoRetries(self):
+        # not idempotent
+        upstream = self._upstream([requests.exceptions.ConnectionError()], retries=2)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            upstream.post('http://example.com/create', data={'name': 'x'})
+        assert len(self.session.calls) == 1
+        # waited a long time for an answer already
+        upstream = self._upstream([requests.exceptions.ReadTimeout()], retries=2)
+        with self.assertRaises(requests.exceptions.Timeout):
+            upstream.get('http://example.com/')
+        assert len(self.session.calls) == 1
+
+    def testClientErrorsDontTripBreaker(self):
+        upstream = self._upstream([404] * 10, breaker=CircuitBreaker(failure_threshold=2))
+        for _ in range(10):
+            assert upstream.get('http://example.com/').status_code == 404
+        assert upstream.stats()['state'] == STATE_CLOSED
+
+    def testOnlyOutagesTripBreaker(self):
+        breaker = CircuitBreaker(failure_threshold=2)
+        upstream = self._upstream([requests.exceptions.ReadTimeout()] * 3 + [429, 500, 500], retries=0,
+                                  breaker=breaker)
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.Timeout):
+                upstream.get('http://example.com/')
+        assert upstream.get('http://example.com/').status_code == 429
+        assert breaker.state == STATE_CLOSED
+        assert upstream.get('http://example.com/').status_code == 500
+        assert upstream.get('http://example.com/').status_code == 500
+        assert breaker.state == STATE_OPEN
+        assert upstream.stats()['timeouts'] == 3
+        assert upstream.stats()['failures'] == 2
+
+    def testInterruptedTrialReleasesBreaker(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+        breaker.record_failure()
+        clock.now += 31
+        upstream = self._upstream([KeyboardInterrupt(), 200], breaker=breaker)
+        with self.assertRaises(KeyboardInterrupt):
+            upstream.get('http://example.com/')
+        assert upstream.get('http://example.com/').status_code == 200     # the next call gets to be the trial
+        assert breaker.state == STATE_CLOSED
+
+    def testFailsFastWhenOpen(self):
+        upstream = self._upstream([requests.exceptions.ConnectionError()] * 2, retries=0,
+                                  breaker=CircuitBreaker(failure_threshold=2))
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                upstream.get('http://example.com/')
+        with self.assertRaises(UpstreamUnavailableError):
+            upstream.get('http://example.com/')
+        assert len(self.session.calls) == 2     # never even tried the third time
+        assert upstream.stats()['state'] == STATE_OPEN
+
+    def testMediaCloudRetryIf(self):
+        assert media_cloud_retry_if('GET', 'https://api.mediacloud.org/api/v2/media/single/1?key=abc')
+        assert media_cloud_retry_if('POST', 'https://api.mediacloud.org/api/v2/stories_public/count?key=abc')
+        assert media_cloud_retry_if('POST', 'https://api.mediacloud.org/api/v2/topics/12/stories/list')
+        assert not media_cloud_retry_if('POST', 'https://api.mediacloud.org/api/v2/media/create?key=abc')
+        assert not media_cloud_retry_if('PUT', 'https://api.mediacloud.org/api/v2/stories/put_tags')
+
+    def testPrometheus(self):
+        text = upstream_stats_prometheus()
+        assert text.startswith('# TYPE webtools_upstream_circuit_open gauge')
+
+
+if __name__ == "__main__":
+    unittest.main()
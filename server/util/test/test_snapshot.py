@@ -0,0 +1,78 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from server.util.snapshot import VersionedSnapshot, RedisSnapshot
+
+
+def _validate(data):
+    if not isinstance(data.get('tags_id'), int):
+        raise ValueError("missing tags_id")
+
+
+class VersionedSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'snapshot.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def testRoundTrip(self):
+        snapshot = VersionedSnapshot(self.path, 1, _validate)
+        assert snapshot.load() == (None, None)
+        saved_at = snapshot.save({'tags_id': 1234})
+        assert snapshot.load() == ({'tags_id': 1234}, saved_at)
+        assert os.listdir(self.dir) == ['snapshot.json']   # no temp files left behind
+
+    def testIgnoresOtherVersions(self):
+        VersionedSnapshot(self.path, 1).save({'tags_id': 1234})
+        assert VersionedSnapshot(self.path, 2).load() == (None, None)
+
+    def testIgnoresBadSnapshots(self):
+        snapshot = VersionedSnapshot(self.path, 1, _validate)
+        self.assertRaises(ValueError, snapshot.save, {'tags_id': 'oops'})
+        VersionedSnapshot(self.path, 1).save({'tags_id': 'oops'})
+        assert snapshot.load() == (None, None)
+        with open(self.path, 'w') as f:
+            f.write('{"version": 1, "saved_at"')
+        assert snapshot.load() == (None, None)
+        with open(self.path, 'w') as f:
+            json.dump({'version': 1}, f)
+        assert snapshot.load() == (None, None)
+
+
+class _DictRedis:
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value.encode('utf-8')
+
+
+class RedisSnapshotTest(unittest.TestCase):
+
+    def testRoundTrip(self):
+        client = _DictRedis()
+        snapshot = RedisSnapshot(client, 'web-tools:test-snapshot', 1, _validate)
+        assert snapshot.load() == (None, None)
+        saved_at = snapshot.save({'tags_id': 1234})
+        assert list(client.values.keys()) == ['web-tools:test-snapshot']
+        assert RedisSnapshot(client, 'web-tools:test-snapshot', 1, _validate).load() == ({'tags_id': 1234}, saved_at)
+        assert RedisSnapshot(client, 'web-tools:test-snapshot', 2).load() == (None, None)
+
+    def testIgnoresBadSnapshots(self):
+        client = _DictRedis()
+        client.values['web-tools:test-snapshot'] = b'{"version": 1, "saved_at"'
+        assert RedisSnapshot(client, 'web-tools:test-snapshot', 1).load() == (None, None)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
+import os
+import shutil
+import tempfile
+import threading
 import unittest
 
-from server.util.tags import TagDiscoverer, TagSetDiscoverer
+from server.util.snapshot import VersionedSnapshot
+from server.util.tags import TagDiscoverer, TagSetDiscoverer, TagDiscovery, build_tag_set_index, \
+    build_membership_index, add_to_membership_index, compile_metadata_labelers, label_for_metadata_tag
 
 # in the "official" instance of Media Cloud
 TAG_SPIDERED_STORY = 8875452
@@ -61,5 +67,114 @@ class TagSetDiscovererTest(unittest.TestCase):
         assert discoverer.date_guess_methods_set == TAG_SET_DATE_GUESS_METHOD
 
 
+class TagDiscoveryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.snapshot = VersionedSnapshot(os.path.join(self.dir, 'discovery.json'), 1)
+        self.discovered = []
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def _discover(self):
+        self.discovered.append(True)
+        return {'tag_sets': {'collections_set': len(self.discovered)}, 'tags': {}}
+
+    def testLoadsFromSnapshot(self):
+        TagDiscovery(self.snapshot, 60, self._discover).data()
+        assert len(self.discovered) == 1
+        discovery = TagDiscovery(self.snapshot, 60, self._discover)     # ie. another worker starting up
+        assert discovery.data()['tag_sets']['collections_set'] == 1
+        discovery.refresh()
+        assert len(self.discovered) == 1
+
+    def testRefreshWhenStale(self):
+        discovery = TagDiscovery(self.snapshot, 0, self._discover)
+        assert discovery.data()['tag_sets']['collections_set'] == 1
+        discovery.refresh()
+        assert discovery.data()['tag_sets']['collections_set'] == 2
+
+    def testKeepsLastGoodIdsWhenDiscoveryFails(self):
+        broken = []
+
+        def discover():
+            if len(broken) > 0:
+                raise ValueError("Couldn't find the 'collection' tag set")
+            return self._discover()
+        discovery = TagDiscovery(self.snapshot, 0, discover)
+        discovery.data()
+        broken.append(True)
+        self.assertRaises(ValueError, discovery.refresh)
+        assert discovery.data()['tag_sets']['collections_set'] == 1
+
+    def testReadersDontWaitOnRefresh(self):
+        seen_during_refresh = []
+
+        def discover():
+            if len(self.discovered) > 0:   # ie. the background refresh, not the first lookup
+                reader = threading.Thread(target=lambda: seen_during_refresh.append(discovery.data()))
+                reader.start()
+                reader.join(5)
+            return self._discover()
+        discovery = TagDiscovery(self.snapshot, 0, discover)
+        discovery.data()
+        discovery.refresh()
+        assert seen_during_refresh[0]['tag_sets']['collections_set'] == 1     # the old ids, right away
+        assert discovery.data()['tag_sets']['collections_set'] == 2
+
+
+class MetadataLabelTest(unittest.TestCase):
+
+    def testCompiledLabelers(self):
+        labelers = compile_metadata_labelers({
+            'media_pub_country_set': TAG_SETS_ID_PUBLICATION_COUNTRY,
+            'media_pub_state_set': TAG_SETS_ID_PUBLICATION_STATE,
+            'media_type_set': TAG_SETS_ID_MEDIA_TYPE,
+            'collections_set': TAG_SETS_ID_COLLECTIONS,
+        })
+        assert label_for_metadata_tag({'tag_sets_id': TAG_SETS_ID_PUBLICATION_COUNTRY, 'tag': 'pub_USA'},
+                                      labelers) == 'USA'
+        assert label_for_metadata_tag({'tag_sets_id': TAG_SETS_ID_PUBLICATION_STATE, 'tag': 'pub_US-MA'},
+                                      labelers) == 'US-MA'
+        assert label_for_metadata_tag({'tag_sets_id': TAG_SETS_ID_MEDIA_TYPE, 'tag': 'blog'}, labelers) == 'blog'
+        assert label_for_metadata_tag({'tag_sets_id': TAG_SETS_ID_COLLECTIONS, 'tag': 'x'}, labelers) is None
+
+
+class TagSetIndexTest(unittest.TestCase):
+
+    def testBuildIndex(self):
+        tags = [
+            {'tags_id': 3, 'tag': 'pub_USA', 'label': 'United States', 'show_on_media': 1},
+            {'tags_id': 1, 'tag': 'zzz', 'label': None, 'show_on_media': 0},
+            {'tags_id': 2, 'tag': 'pub_AUS', 'label': 'australia', 'show_on_media': True},
+        ]
+        index = build_tag_set_index(tags)
+        assert [t['tags_id'] for t in index['tags']] == [2, 3, 1]    # by label, ignoring case, or tag if no label
+        assert index['tags'][index['positions_by_id']['3']]['tag'] == 'pub_USA'
+        assert index['tags'][index['positions_by_tag']['zzz']]['tags_id'] == 1
+        public_index = build_tag_set_index(tags, only_public_tags=True)
+        assert [t['tags_id'] for t in public_index['tags']] == [2, 3]
+        assert public_index['positions_by_tag'].get('zzz') is None
+
+
+class MembershipIndexTest(unittest.TestCase):
+
+    def testBuildIndex(self):
+        index = build_membership_index([{'media_id': 5, 'name': 'b'}, {'media_id': 2, 'name': 'C'},
+                                        {'media_id': 9, 'name': 'a'}])
+        assert index['order'] == [9, 5, 2]
+        assert index['media']['5']['name'] == 'b'
+        assert index['last_media_id'] == 9
+
+    def testAddToIndex(self):
+        index = build_membership_index([{'media_id': 5, 'name': 'b'}, {'media_id': 2, 'name': 'C'},
+                                        {'media_id': 9, 'name': 'a'}])
+        updated = add_to_membership_index(index, [{'media_id': 12, 'name': 'bb'}, {'media_id': 5, 'name': 'zz'}])
+        assert updated['order'] == [9, 12, 2, 5]
+        assert updated['last_media_id'] == 12
+        assert index['order'] == [9, 5, 2]  # left as it was
+
+
 if __name__ == "__main__":
     unittest.main()
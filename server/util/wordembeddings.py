@@ -1,7 +1,7 @@
-import requests
 import json
 
 from server import config
+from server.util.resilience import upstream
 
 # Helpers for accessing data from the Media Cloud Word Embeddings server
 
@@ -25,7 +25,7 @@ def topic_similar_words(topics_id, snapshots_id, words):
 
 
 def _query_for_json(endpoint, data):
-    response = requests.post("{}{}".format(config.get('WORD_EMBEDDINGS_SERVER_URL'), endpoint), data=data)
+    response = upstream('word-embeddings').post("{}{}".format(config.get('WORD_EMBEDDINGS_SERVER_URL'), endpoint), data=data)
     try:
         response_json = response.json()
         if 'results' in response_json:
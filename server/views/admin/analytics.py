@@ -15,20 +15,20 @@ logger = logging.getLogger(__name__)
 @api_error_handler
 @flask_login.login_required
 def api_admin_top_stats(the_type, the_action):
-    raw_results = analytics_db.top(the_type, the_action)
+    raw_results = [row for row in analytics_db.top(the_type, the_action) if the_action in row]
+    # look up all the items at once, rather than one by one
+    if the_type == analytics_db.TYPE_MEDIA:
+        items = apicache.media_many([row['id'] for row in raw_results])
+    elif the_type == analytics_db.TYPE_COLLECTION:
+        items = apicache.tags_many([row['id'] for row in raw_results])
+    else:
+        items = {}
     results = []
     for row in raw_results:
-        if the_action in row:
-            if the_type == analytics_db.TYPE_MEDIA:
-                results.append({
-                    'item': apicache.media(row['id']),
-                    'type': analytics_db.TYPE_MEDIA,
-                    'count': row[the_action]
-                })
-            elif the_type == analytics_db.TYPE_COLLECTION:
-                results.append({
-                    'item': apicache.collection(row['id']),
-                    'type': analytics_db.TYPE_COLLECTION,
-                    'count': row[the_action]
-                })
+        if row['id'] in items:
+            results.append({
+                'item': items[row['id']],
+                'type': the_type,
+                'count': row[the_action]
+            })
     return jsonify({'list': results})
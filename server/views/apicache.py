@@ -4,40 +4,97 @@ to the user (ie. it is a cross-user cache). This is because we don't have visibi
 like stories, sources, etc.
 """
 
+import logging
+from dogpile.cache.api import NO_VALUE
+
 from server import TOOL_API_KEY
-from server.cache import cache
+from server.cache import cache, EXPIRE_IMMUTABLE, EXPIRE_LIVE
 import server.util.wordembeddings as wordembeddings
+from server.util.fanout import fan_out, map_in_order
 from server.auth import user_mediacloud_client, user_admin_mediacloud_client, user_is_admin
 from server.util.tags import is_bad_theme, TagSetDiscoverer
 
+logger = logging.getLogger(__name__)
+
+# how many uncached lookups to make at once (per request) when resolving a batch of ids
+BATCH_LOOKUP_WORKERS = 8
+
+_FAILED = object()
+
 
 def media(media_id):
-    return _cached_media(None, media_id)
+    return media_many([media_id])[media_id]
 
 
 def get_media_with_key(mc_api_key, media_id):
     # in Response contexts we can't automatically fetch the user_key from the session, so we have to support
     # a way to pass it in intentionally
-    return _cached_media(mc_api_key, media_id)
+    return media_many([media_id], mc_api_key)[media_id]
 
 
-@cache.cache_on_arguments()
+def media_many(media_ids, mc_api_key=None, skip_errors=False):
+    """
+    Look up a batch of media at once (ie. all the sources on a page of stories).
+    :param mc_api_key: pass this in when there is no current user to get it from (ie. while streaming a download)
+    :return: a dict of media_id to media, one for each distinct id
+    """
+    return lookup_many(_cached_media, media_ids, leading_args=(mc_api_key,), skip_errors=skip_errors)
+
+
+@cache.cache_on_arguments(depends_on=['media_id'])
 def _cached_media(mc_api_key, media_id):
     # api_key passed in just to make this a user-level cache
     user_mc = user_mediacloud_client(mc_api_key)
     return user_mc.media(media_id)
 
 
+def lookup_many(cached_fn, ids, leading_args=(), skip_errors=False):
+    """
+    Call a function decorated with `cache_on_arguments` as `cached_fn(*leading_args, an_id)` for each distinct id.
+    Everything already cached comes back from one multi-get, and only the misses get fetched (a few at a time).
+    :param skip_errors: leave out the ids whose lookup failed (ie. a deleted source), instead of raising the error
+    :return: a dict of id to result, in the same order as `ids`
+    """
+    ids = list(dict.fromkeys(ids))  # distinct, in order
+    calls = [tuple(leading_args) + (an_id,) for an_id in ids]
+
+    def fetch(idx):
+        try:
+            return cached_fn(*calls[idx])
+        except Exception as e:
+            if not skip_errors:
+                raise
+            logger.warning("Skipping {} lookup for {}: {}".format(cached_fn.__name__, ids[idx], e))
+            return _FAILED
+
+    if len(calls) == 1:
+        values = [fetch(0)]  # no need for a multi-get
+    else:
+        values = cache.get_cached_each(cached_fn, calls)
+        missing = [idx for idx, value in enumerate(values) if value is NO_VALUE]
+        for idx, value in zip(missing, map_in_order(fetch, missing, max_workers=BATCH_LOOKUP_WORKERS)):
+            values[idx] = value
+    return {an_id: value for an_id, value in zip(ids, values) if value is not _FAILED}
+
+
 def collection(tags_id):
     # Yes collections are just tags, but this is a helpful convenience method included to make the code more readable
-    return _cached_tag(tags_id)
+    return tag(tags_id)
 
 
 def tag(tags_id):
-    return _cached_tag(tags_id)
+    return tags_many([tags_id])[tags_id]
 
 
-@cache.cache_on_arguments()
+def tags_many(tags_ids, skip_errors=False):
+    """
+    Look up a batch of tags (or collections) at once.
+    :return: a dict of tags_id to tag, one for each distinct id
+    """
+    return lookup_many(_cached_tag, tags_ids, skip_errors=skip_errors)
+
+
+@cache.cache_on_arguments(depends_on=['tags_id'])
 def _cached_tag(tags_id):
     user_mc = user_mediacloud_client()
     return user_mc.tag(tags_id)
@@ -86,7 +143,7 @@ def word2vec_google_2d(words):
     return _cached_word2vec_google_2d(words)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_IMMUTABLE)
 def _cached_word2vec_google_2d(words):
     # don't need to be user-level cache here - can be app-wide because results are from another service that doesn't
     # have any concept of permissioning
@@ -135,9 +192,10 @@ def _cached_story_list(api_key, q, fq, **kwargs):
 
 
 def tag_set_coverage(total_q, subset_q, fq):
+    totals, counts = fan_out(lambda: story_count(total_q, fq), lambda: story_count(subset_q, fq))
     coverage = {
-        'totals': story_count(total_q, fq)['count'],
-        'counts': story_count(subset_q, fq)['count'],
+        'totals': totals['count'],
+        'counts': counts['count'],
     }
     coverage['coverage_percentage'] = 0 if coverage['totals'] == 0 else float(coverage['counts'])/float(coverage['totals'])
     return coverage
@@ -157,7 +215,7 @@ def stats():
     return cached_stats()
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE)
 def cached_stats():
     user_mc = user_mediacloud_client()
     return user_mc.stats()
@@ -1,11 +1,15 @@
 import logging
-from flask import jsonify
+from flask import jsonify, request, Response
+import flask_login
 import os
 import json
 
-from server import app, data_dir
+from server import app, data_dir, mc_clients
+from server.util.resilience import upstream_stats, upstream_stats_prometheus
 import server.views.apicache as base_apicache
-from server.util.request import api_error_handler
+from server.auth import user_is_admin
+from server.cache import cache_stats, cache_namespace_stats, cache_namespace_stats_prometheus
+from server.util.request import api_error_handler, json_error_response
 from server.util.tags import TagSetDiscoverer, TagDiscoverer
 
 logger = logging.getLogger(__name__)
@@ -17,6 +21,24 @@ def stats():
     return jsonify({'stats': base_apicache.stats()})
 
 
+@app.route('/api/admin/cache-stats', methods=['GET'])
+@api_error_handler
+@flask_login.login_required
+def cache_stats_for_admins():
+    # per-process numbers, so they reflect whichever worker handles the request
+    if not user_is_admin():
+        return json_error_response("You must be an admin to see cache stats", 403)
+    if request.args.get('format') == 'prometheus':
+        return Response(cache_namespace_stats_prometheus() + upstream_stats_prometheus(),
+                        mimetype='text/plain; version=0.0.4')
+    return jsonify({
+        'namespaces': cache_namespace_stats(),
+        'totals': cache_stats(),
+        'mc_clients': mc_clients.stats(),
+        'upstreams': upstream_stats(),
+    })
+
+
 @app.route('/api/release-notes', methods=['GET'])
 @api_error_handler
 def release_notes():
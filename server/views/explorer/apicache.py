@@ -2,6 +2,7 @@ from server import mc, TOOL_API_KEY
 from server.cache import cache
 from server.auth import user_admin_mediacloud_client
 from server.views.explorer import dates_as_filter_query
+from server.util.fanout import fan_out
 from server.util.api_helper import combined_split_and_normalized_counts, add_missing_dates_to_split_story_counts
 from server.util.tags import processed_for_entities_query_clause, processed_for_themes_query_clause, \
     TagSetDiscoverer
@@ -10,17 +11,20 @@ from server.views import TAG_SAMPLE_SIZE, TAG_COUNT_SAMPLE_SIZE
 
 
 def normalized_and_story_count(q, fq, open_q):
+    # the query and its baseline are independent, so ask for both at once
+    matching, total = fan_out(lambda: base_apicache.story_count(q, fq),
+                              lambda: base_apicache.story_count(open_q, fq))
     return {
-        'total': base_apicache.story_count(q, fq)['count'],
-        'normalized_total': base_apicache.story_count(open_q, fq)['count'],
+        'total': matching['count'],
+        'normalized_total': total['count'],
     }
 
 
 def normalized_and_story_split_count(q, open_q, start_date, end_date):
     fq = dates_as_filter_query(start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d"))
-    matching = base_apicache.story_count(q, fq, split=True)
+    matching, total = fan_out(lambda: base_apicache.story_count(q, fq, split=True),
+                              lambda: base_apicache.story_count(open_q, fq, split=True))
     matching = add_missing_dates_to_split_story_counts(matching['counts'], start_date, end_date)
-    total = base_apicache.story_count(open_q, fq, split=True)
     total = add_missing_dates_to_split_story_counts(total['counts'], start_date, end_date)
     return {
         'counts': combined_split_and_normalized_counts(matching, total),
@@ -1,4 +1,5 @@
 import logging
+import itertools
 from flask import jsonify, request
 import flask_login
 import json
@@ -7,6 +8,7 @@ from server import app
 import server.util.csv as csv
 from server.platforms.reddit_pushshift import RedditPushshiftProvider,  NEWS_SUBREDDITS
 from server.util.request import api_error_handler
+from server.util.fanout import map_in_order
 from server.views import WILDCARD_ASTERISK
 from server.views.explorer import parse_query_with_keywords, file_name_for_download, only_queries_reddit, parse_query_dates
 from server.views.media_picker import concatenate_query_for_solr
@@ -15,6 +17,31 @@ import server.views.explorer.apicache as apicache
 logger = logging.getLogger(__name__)
 
 
+# how many of the queries in a comparison to evaluate at once, per export request
+QUERY_WORKERS_PER_EXPORT = 4
+
+
+def _story_count_row(q):
+    if (len(q['collections']) == 0) and only_queries_reddit(q['sources']):
+        start_date, end_date = parse_query_dates(q)
+        provider = RedditPushshiftProvider()
+        story_counts = provider.normalized_count_over_time(query=q['q'],
+                                                           start_date=start_date,
+                                                           end_date=end_date,
+                                                           subreddits=NEWS_SUBREDDITS)
+    else:
+        solr_q, solr_fq = parse_query_with_keywords(q)
+        solr_open_query = concatenate_query_for_solr(solr_seed_query=WILDCARD_ASTERISK, media_ids=q['sources'],
+                                                     tags_ids=q['collections'])
+        story_counts = apicache.normalized_and_story_count(solr_q, solr_fq, solr_open_query)
+    return {
+        'query': q['label'],
+        'matching_stories': story_counts['total'],
+        'total_stories': story_counts['normalized_total'],
+        'ratio': float(story_counts['total']) / float(story_counts['normalized_total'])
+    }
+
+
 @app.route('/api/explorer/stories/count.csv', methods=['POST'])
 @flask_login.login_required
 @api_error_handler
@@ -24,29 +51,12 @@ def explorer_story_count_csv():
     queries = json.loads(data['queries'])
     label = " ".join([q['label'] for q in queries])
     filename = file_name_for_download(label, filename)
-    # now compute total attention for all results
-    story_count_results = []
-    for q in queries:
-        if (len(q['collections']) == 0) and only_queries_reddit(q['sources']):
-            start_date, end_date = parse_query_dates(q)
-            provider = RedditPushshiftProvider()
-            story_counts = provider.normalized_count_over_time(query=q['q'],
-                                                               start_date=start_date,
-                                                               end_date=end_date,
-                                                               subreddits=NEWS_SUBREDDITS)
-        else:
-            solr_q, solr_fq = parse_query_with_keywords(q)
-            solr_open_query = concatenate_query_for_solr(solr_seed_query=WILDCARD_ASTERISK, media_ids=q['sources'],
-                                                         tags_ids=q['collections'])
-            story_counts = apicache.normalized_and_story_count(solr_q, solr_fq, solr_open_query)
-        story_count_results.append({
-            'query': q['label'],
-            'matching_stories': story_counts['total'],
-            'total_stories': story_counts['normalized_total'],
-            'ratio': float(story_counts['total']) / float(story_counts['normalized_total'])
-        })
+    # now compute total attention for all results, a few queries at a time, streaming each row out once it's ready
+    rows = map_in_order(_story_count_row, queries, max_workers=QUERY_WORKERS_PER_EXPORT)
+    # wait for the first one here, so a bad query still comes back as a regular error response
+    first_row = list(itertools.islice(rows, 1))
     props = ['query', 'matching_stories', 'total_stories', 'ratio']
-    return csv.stream_response(story_count_results, props, filename)
+    return csv.stream_rows_response(itertools.chain(first_row, rows), props, filename)
 
 
 @app.route('/api/explorer/stories/split-count', methods=['POST'])
@@ -98,6 +108,21 @@ def api_explorer_story_split_count_csv():
     return csv.stream_response(story_counts['counts'], props, filename)
 
 
+def _story_split_counts(q):
+    start_date, end_date = parse_query_dates(q)
+    if (len(q['collections']) == 0) and only_queries_reddit(q['sources']):
+        provider = RedditPushshiftProvider()
+        return provider.normalized_count_over_time(query=q['q'],
+                                                   start_date=start_date,
+                                                   end_date=end_date,
+                                                   subreddits=NEWS_SUBREDDITS)
+    solr_q, _solr_fq = parse_query_with_keywords(q)
+    solr_open_query = concatenate_query_for_solr(solr_seed_query=WILDCARD_ASTERISK, media_ids=q['sources'],
+                                                 tags_ids=q['collections'],
+                                                 custom_collection=q['searches'])
+    return apicache.normalized_and_story_split_count(solr_q, solr_open_query, start_date, end_date)
+
+
 @app.route('/api/explorer/stories/split-count-all.csv', methods=['POST'])
 @flask_login.login_required
 @api_error_handler
@@ -107,22 +132,10 @@ def api_explorer_combined_story_split_count_csv():
     queries = json.loads(data['queries'])
     label = " ".join([q['label'] for q in queries])
     filename = file_name_for_download(label, filename)
-    # now compute total attention for all results
+    # now compute total attention for all results, a few queries at a time (we need them all before writing rows)
     story_count_results = []
-    for q in queries:
-        start_date, end_date = parse_query_dates(q)
-        if (len(q['collections']) == 0) and only_queries_reddit(q['sources']):
-            provider = RedditPushshiftProvider()
-            story_counts = provider.normalized_count_over_time(query=q['q'],
-                                                               start_date=start_date,
-                                                               end_date=end_date,
-                                                               subreddits=NEWS_SUBREDDITS)
-        else:
-            solr_q, _solr_fq = parse_query_with_keywords(q)
-            solr_open_query = concatenate_query_for_solr(solr_seed_query=WILDCARD_ASTERISK, media_ids=q['sources'],
-                                                         tags_ids=q['collections'],
-                                                     custom_collection=q['searches'])
-            story_counts = apicache.normalized_and_story_split_count(solr_q, solr_open_query, start_date, end_date)
+    for q, story_counts in zip(queries, map_in_order(_story_split_counts, queries,
+                                                     max_workers=QUERY_WORKERS_PER_EXPORT)):
         story_count_results.append({
             'label': q['label'],
             'by_date': story_counts['counts'],
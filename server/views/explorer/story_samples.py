@@ -11,6 +11,7 @@ import server.util.tags as tag_util
 from server.auth import user_mediacloud_key
 from server.platforms.reddit_pushshift import RedditPushshiftProvider,  NEWS_SUBREDDITS
 from server.util.request import api_error_handler
+from server.util.prefetch import read_ahead
 from server.views.explorer import only_queries_reddit, parse_query_dates, \
     parse_query_with_keywords, file_name_for_download
 
@@ -34,8 +35,10 @@ def api_explorer_story_sample():
         solr_q, solr_fq = parse_query_with_keywords(request.form)
         results = base_cache.story_list(None, solr_q, solr_fq, rows=SAMPLE_STORY_COUNT,
                                         sort=MediaCloud.SORT_RANDOM)
-        for story in results:  # add in media info so we can show it to user if they click into the drill-down
-            story["media"] = base_cache.media(story["media_id"])
+        # add in media info so we can show it to user if they click into the drill-down
+        media_lookup = base_cache.media_many([story["media_id"] for story in results])
+        for story in results:
+            story["media"] = media_lookup[story["media_id"]]
     return jsonify({"results": results})
 
 
@@ -82,7 +85,8 @@ def _stream_story_list_csv(filename, q, fq, stories_per_page=500, sort=MediaClou
 # generator you can use to handle a long list of stories row by row (one row per story)
 def _story_list_by_page_as_csv_row(api_key, q, fq, stories_per_page, sort, page_limit, props):
     yield ','.join(props) + '\n'  # first send the column names
-    for page in _story_list_by_page(api_key, q, fq, stories_per_page, sort, page_limit):
+    # fetch the next pages in the background while this one is written out
+    for page in read_ahead(_story_list_by_page(api_key, q, fq, stories_per_page, sort, page_limit)):
         for story in page:
             cleaned_row = csv.dict2row(props, story)
             row_string = ','.join(cleaned_row) + '\n'
@@ -100,12 +104,15 @@ def _story_list_by_page(api_key, q, fq, stories_per_page, sort, page_limit=None)
                                            last_processed_stories_id=last_processed_stories_id)
         if len(story_page) == 0:  # this is the last page so bail out
             break
+        media_lookup = {}
+        if INCLUDE_MEDIA_METADATA_IN_CSV:
+            # look up all the distinct media on this page in one go (they're mostly already cached)
+            # need to call internal helper because we are in response context and can't automatically fetch current_user
+            media_lookup = base_cache.media_many([s['media_id'] for s in story_page], api_key)
         for s in story_page:
             if INCLUDE_MEDIA_METADATA_IN_CSV:
-                # add in media metadata to the story (from lazy cache)
-                media_id = s['media_id']
-                # need to call internal helper because we are in response context and can't automatically fetch current_user
-                media = base_cache.get_media_with_key(api_key, media_id)
+                # add in media metadata to the story (from the page-level lookup)
+                media = media_lookup[s['media_id']]
                 for k, v in media['metadata'].items():
                     s['media_{}'.format(k)] = v['label'] if v is not None else None
             # and add in the story metadata too
@@ -126,8 +126,11 @@ def api_mediapicker_collection_search():
 @flask_login.login_required
 @api_error_handler
 def api_explorer_featured_collections():
-    featured_collections = _cached_featured_collection_list(TagDiscoverer().featured_collection_tags)
-    return jsonify({'list': featured_collections})
+    return jsonify({'list': featured_collection_list()})
+
+
+def featured_collection_list():
+    return _cached_featured_collection_list(TagDiscoverer().featured_collection_tags)
 
 
 @cache.cache_on_arguments()
@@ -4,7 +4,7 @@ import operator
 import server.util.tags as tags
 from server import mc
 from server.auth import user_mediacloud_client
-from server.cache import cache
+from server.cache import cache, ids_in_query, EXPIRE_LIVE, EXPIRE_USER
 from server.util.api_helper import add_missing_dates_to_split_story_counts
 from server.views.stories import QUERY_LAST_MONTH
 
@@ -34,11 +34,24 @@ def collection_source_representation(mc_api_key, collection_id, sample_size, fq)
     return _cached_collection_source_representation(mc_api_key, collection_id, sample_size, fq)
 
 
-def invalidate_collection_source_representation_cache(mc_api_key, collection_id):
-    _cached_collection_source_representation.invalidate(mc_api_key, collection_id)
+def invalidate_collection_caches(collection_id, media_ids=None):
+    # clear out everything we've cached about this collection, and about any sources that moved in or out of it
+    return cache.invalidate_dependents(tags_id=collection_id, media_id=media_ids or [])
 
 
-@cache.cache_on_arguments()
+def invalidate_source_caches(media_ids, collection_ids=None):
+    # clear out everything we've cached about these sources, and about any collections they joined or left
+    return cache.invalidate_dependents(media_id=media_ids, tags_id=collection_ids or [])
+
+
+# story counts for a source or collection are queries like "media_id:1234" or "tags_id_media:5678"
+COUNT_QUERY_DEPENDENCIES = {
+    'media_id': ids_in_query('q', 'media_id'),
+    'tags_id': ids_in_query('q', 'tags_id_media'),
+}
+
+
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, depends_on={'tags_id': 'collection_id'})
 def _cached_collection_source_representation(mc_api_key, collection_id, sample_size=1000, fq=''):
     # have to respect the api here here because only some folks can see private collections
     user_mc = user_mediacloud_client(mc_api_key)
@@ -64,7 +77,7 @@ def timeperiod_story_count(query, time_period):
     return _cached_timeperiod_story_count(query, time_period)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE, soft_ttl=60*60, depends_on=COUNT_QUERY_DEPENDENCIES)
 def _cached_timeperiod_story_count(q='*', time_period=QUERY_LAST_MONTH):
     # sources are open to everyone, so no need for user-specific cache
     # Helper to fetch split story counts over a timeframe for an arbitrary query
@@ -99,7 +112,7 @@ def split_story_count(q='*', last_n_days=None):
     return results
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE, soft_ttl=60*60, depends_on=COUNT_QUERY_DEPENDENCIES)
 def _cached_split_story_counts(q='*', fq=''):
     # sources are open to everyone, so no need for user-specific cache
     # Helper to fetch split story counts over a timeframe for an arbitrary query
@@ -112,7 +125,10 @@ def source_story_count(query):
     return cached_source_story_count(query)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE, depends_on={
+    'media_id': ids_in_query('query', 'media_id'),
+    'tags_id': ids_in_query('query', 'tags_id_media'),
+})
 def cached_source_story_count(query):
     # sources are open to everyone, so no need for user-specific cache
     user_mc = user_mediacloud_client()
@@ -125,7 +141,7 @@ def tag_coverage_pct(query, tag_sets_id):
     return _cached_tag_coverage_pct(query, tag_sets_id)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE)
 def _cached_tag_coverage_pct(query, tag_sets_id):
     user_mc = user_mediacloud_client()
     story_count = source_story_count(query)
@@ -1,5 +1,4 @@
 import logging
-from operator import itemgetter
 import flask_login
 import os
 from flask import jsonify, request, Response
@@ -25,7 +24,7 @@ logger = logging.getLogger(__name__)
 @flask_login.login_required
 @api_error_handler
 def api_metadata_download(collection_id):
-    all_media = tags.media_with_tag(collection_id)
+    all_media = tags.media_with_tag(collection_id)  # not cached, so downloads always have every source
 
     metadata_counts = {}  # from tag_sets_id to info
     for media_source in all_media:
@@ -71,10 +70,8 @@ def api_collection_set(tag_sets_id):
         info = apicache.tag_set_with_public_collections(user_mediacloud_key(), tag_sets_id)
 
     add_user_favorite_flag_to_collections(info['tags'])
-    # rename to make more sense here
-    for t in info['tags']:
-        t['sort_key'] = t['label'] if t['label'] else t['tag']
-    info['collections'] = sorted(info['tags'], key=itemgetter('sort_key'))
+    # rename to make more sense here (they're already sorted by label)
+    info['collections'] = info['tags']
     del info['tags']
     return jsonify(info)
 
@@ -88,7 +85,7 @@ def api_collections_by_ids():
     collection_ids = request.args['coll[]'].split(',')
     sources_list = []
     for tags_id in collection_ids:
-        all_media = tags.media_with_tag(tags_id)
+        all_media = tags.media_with_tag(tags_id, cached=True)
         info = [{'media_id': m['media_id'], 'name': m['name'], 'url': m['url'], 'public_notes': m['public_notes']} for m
                 in all_media]
         add_user_favorite_flag_to_sources(info)
@@ -131,7 +128,7 @@ def api_collection_details(collection_id):
     info['id'] = collection_id
     info['tag_set'] = _tag_set_info(info['tag_sets_id'])
     if add_in_sources:
-        media_in_collection = tags.media_with_tag(collection_id)
+        media_in_collection = tags.media_with_tag(collection_id, cached=True)
         info['sources'] = media_in_collection
     analytics_db.increment_count(analytics_db.TYPE_COLLECTION, collection_id, analytics_db.ACTION_SOURCE_MGR_VIEW)
     return jsonify({'results': info})
@@ -145,7 +142,14 @@ def api_collection_sources(collection_id):
     results = {
         'tags_id': collection_id
     }
-    media_in_collection = tags.media_with_tag(collection_id)
+    if 'limit' in request.args:
+        # just one page of them (sorted by name), for big collections
+        media_slice = tags.media_with_tag_slice(collection_id, int(request.args.get('offset', 0)),
+                                                int(request.args['limit']))
+        media_in_collection = media_slice['media']
+        results['total'] = media_slice['total']
+    else:
+        media_in_collection = tags.media_with_tag(collection_id, cached=True)
     add_user_favorite_flag_to_sources(media_in_collection)
     results['sources'] = media_in_collection
     return jsonify(results)
@@ -192,7 +196,7 @@ def api_collection_sources_feed_status_csv(collection_id, source_type):
     user_mc = user_mediacloud_client()
     collection = user_mc.tag(collection_id)
     list_type = str(source_type).lower()
-    media_in_collection = tags.media_with_tag(collection_id)
+    media_in_collection = tags.media_with_tag(collection_id)  # not cached, so downloads always have every source
     media_info_in_collection = _media_list_edit_job.map(media_in_collection)
     if list_type == 'review':
         filtered_media = [m for m in media_info_in_collection
@@ -248,7 +252,7 @@ def collection_source_story_split_historical_counts(collection_id):
 @flask_login.login_required
 @api_error_handler
 def collection_source_story_split_historical_counts_csv(collection_id):
-    results = _collection_source_story_split_historical_counts(collection_id)
+    results = _collection_source_story_split_historical_counts(collection_id, cached=False)
     date_cols = None
 
     source_list = []
@@ -281,8 +285,8 @@ def _source_story_split_count_job(info):
     return source_data
 
 
-def _collection_source_story_split_historical_counts(collection_id):
-    media_list = tags.media_with_tag(collection_id)
+def _collection_source_story_split_historical_counts(collection_id, cached=True):
+    media_list = tags.media_with_tag(collection_id, cached=cached)
     jobs = [{'media': m} for m in media_list]
     # fetch in parallel to make things faster
     #return [_source_story_split_count_job(j) for j in jobs]
@@ -6,7 +6,7 @@ from mediacloud.tags import MediaTag, TAG_ACTION_ADD, TAG_ACTION_REMOVE
 import csv as pycsv
 
 from server import app, config, TOOL_API_KEY, executor
-from server.auth import user_admin_mediacloud_client, user_mediacloud_key, user_name
+from server.auth import user_admin_mediacloud_client, user_name
 from server.util.config import ConfigException
 from server.util.csv import SOURCE_LIST_CSV_METADATA_PROPS
 from server.util.file import save_file_to_upload_folder
@@ -55,7 +55,8 @@ def collection_update(collection_id):
     tags = tags_to_add + tags_to_remove
     if len(tags) > 0:
         user_mc.tagMedia(tags)
-        apicache.invalidate_collection_source_representation_cache(user_mediacloud_key(), collection_id)
+    # the name or description may have changed too, so clear the collection's caches either way
+    apicache.invalidate_collection_caches(collection_id, source_ids_to_add + source_ids_to_remove)
     return jsonify(updated_collection['tag'])
 
 
@@ -80,7 +81,7 @@ def remove_sources_from_collection(collection_id):
     if len(current_media) > 0:
         results = user_mc.tagMedia(current_media)
 
-    apicache.invalidate_collection_source_representation_cache(user_mediacloud_key(), collection_id)
+    apicache.invalidate_collection_caches(collection_id, source_ids_to_remove)
     return jsonify(results)
 
 
@@ -126,6 +127,7 @@ def upload_file():
             if 'media_id' in media:
                 media['media_id'] = int(
                     media['media_id'])  # make sure they are ints so no-dupes logic works on front end
+        apicache.invalidate_source_caches([m['media_id'] for m in all_results if 'media_id' in m])
         time_end = time.time()
         logger.debug("upload_file: {}".format(time_end - time_start))
         logger.debug("  save file: {}".format(time_file_saved - time_start))
@@ -327,19 +329,19 @@ def update_metadata_for_sources(source_list):
     }
     for tags_id in TagSetDiscoverer().media_metadata_sets():
         col_name = tag_sets_id_2_name_lookup[tags_id]
-        tag_codes = tags_in_tag_set(TOOL_API_KEY, tags_id)
+        tag_codes = {t['tag']: t for t in tags_in_tag_set(TOOL_API_KEY, tags_id)}  # tag names are unique in a set
         for source in source_list:
             if col_name in source:
                 metadata_tag_name = source[col_name]
                 if metadata_tag_name not in ['', None]:
                     # hack until we have a better match check
                     if col_name == 'pub_country':  # template pub_###
-                        matching = [t for t in tag_codes if t['tag'] == 'pub_' + metadata_tag_name]
+                        matching = tag_codes.get('pub_' + metadata_tag_name)
                     else:
-                        matching = [t for t in tag_codes if t['tag'] == metadata_tag_name]
+                        matching = tag_codes.get(metadata_tag_name)
 
-                    if matching and matching not in ['', None]:
-                        metadata_tag_id = matching[0]['tags_id']
+                    if matching is not None:
+                        metadata_tag_id = matching['tags_id']
                         logger.debug('found metadata to add %s', metadata_tag_id)
                         tags.append(MediaTag(source['media_id'], tags_id=metadata_tag_id, action=TAG_ACTION_ADD))
     # now do all the tags in parallel batches so it happens quickly
@@ -1,7 +1,7 @@
 import logging
 
 from server.util.tags import TagSetDiscoverer
-from server.cache import cache
+from server.cache import cache, EXPIRE_LIVE
 from server.auth import user_admin_mediacloud_client
 import server.views.sources.apicache as apicache
 from server.views.stories import QUERY_LAST_MONTH, QUERY_ENGLISH_LANGUAGE
@@ -9,7 +9,7 @@ from server.views.stories import QUERY_LAST_MONTH, QUERY_ENGLISH_LANGUAGE
 logger = logging.getLogger(__name__)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE)
 def cached_geotag_count(query):
     user_mc = user_admin_mediacloud_client()
     res = user_mc.storyTagCount(query, [QUERY_LAST_MONTH, QUERY_ENGLISH_LANGUAGE],
@@ -3,10 +3,11 @@ from flask import request, jsonify
 import flask_login
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
+from mediacloud.error import MCException
 from mediacloud.tags import MediaTag, TAG_ACTION_ADD, TAG_ACTION_REMOVE
 
 from server import app, user_db, analytics_db
-from server.cache import cache
+from server.cache import cache, EXPIRE_LIVE
 from server.auth import user_mediacloud_key, user_admin_mediacloud_client, user_name, user_has_auth_role, ROLE_MEDIA_EDIT
 from server.util.request import arguments_required, form_fields_required, api_error_handler
 from server.util.tags import TagSetDiscoverer, is_metadata_tag_set
@@ -57,7 +58,7 @@ def source_stats(media_id):
     source_specific_story_count = apicache.source_story_count(media_query)
     results['story_count'] = source_specific_story_count
     # health
-    media_health = _cached_media_source_health(username, media_id)
+    media_health = media_source_health(username, media_id) or {}
     results['num_stories_90'] = media_health['num_stories_90'] if 'num_stories_90' in media_health else None
     results['start_date'] = media_health['start_date'] if 'start_date' in media_health else None
     info = _media_source_details(media_id)
@@ -75,15 +76,18 @@ def source_stats(media_id):
     return jsonify(results)
 
 
-@cache.cache_on_arguments()
-def _cached_media_source_health(_user_mc_key, media_id):
-    user_mc = user_admin_mediacloud_client()
-    results = None
+def media_source_health(user_mc_key, media_id):
     try:
-        results = user_mc.mediaHealth(media_id)
+        return _cached_media_source_health(user_mc_key, media_id)
     except Exception as e:
         logger.exception(e)
-    return results
+        return None
+
+
+@cache.cache_on_arguments(expiration_class=EXPIRE_LIVE, depends_on=['media_id'], cache_errors=[MCException])
+def _cached_media_source_health(_user_mc_key, media_id):
+    user_mc = user_admin_mediacloud_client()
+    return user_mc.mediaHealth(media_id)
 
 
 def _media_source_details(media_id):
@@ -121,7 +125,7 @@ def _safely_get_health_end_date(health):
 @flask_login.login_required
 @api_error_handler
 def api_media_source_details(media_id):
-    health = _cached_media_source_health(user_mediacloud_key(), media_id)
+    health = media_source_health(user_mediacloud_key(), media_id)
     info = _media_source_details(media_id)
     info['health'] = health
     user_mc = user_admin_mediacloud_client()
@@ -247,6 +251,7 @@ def source_update(media_id):
             # need to add it and clear out the other
             tag = MediaTag(media_id, tags_id=metadata_tag_id, action=TAG_ACTION_ADD)
             user_mc.tagMedia([tag], clear_others=True)
+    apicache.invalidate_source_caches([media_id], tag_ids_to_add + tag_ids_to_remove)
     # result the success of the media update call - would be better to catch errors in any of these calls...
     return jsonify(result)
 
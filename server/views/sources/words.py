@@ -3,7 +3,7 @@ import logging
 from server import mc
 from server.views import WORD_COUNT_SAMPLE_SIZE, WORD_COUNT_UI_NUM_WORDS, WORD_COUNT_DOWNLOAD_NUM_WORDS
 import server.util.csv as csv
-from server.cache import cache
+from server.cache import cache, EXPIRE_USER
 from server.auth import user_admin_mediacloud_client
 import server.views.apicache as base_apicache
 
@@ -20,7 +20,7 @@ def word_count(user_mc_key, q, fq, num_words=WORD_COUNT_UI_NUM_WORDS, sample_siz
     return _cached_word_count(user_mc_key, q, fq, num_words, sample_size)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER)
 def _cached_word_count(user_mc_key, q, fq, num_words, sample_size=WORD_COUNT_SAMPLE_SIZE):
     api_client = mc if user_mc_key is None else user_admin_mediacloud_client()
     word_data = api_client.wordCount(q, fq, num_words=num_words, sample_size=sample_size)
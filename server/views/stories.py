@@ -11,7 +11,7 @@ from server import app, mc, TOOL_API_KEY, cliff
 from server.auth import user_mediacloud_key, user_admin_mediacloud_client
 from server.util.request import api_error_handler
 import server.util.csv as csv
-from server.cache import cache
+from server.cache import cache, EXPIRE_IMMUTABLE
 import server.views.apicache as apicache
 import server.util.corenlp as corenlp
 import server.util.news_labels as news_labels
@@ -170,7 +170,7 @@ def entities_from_mc_or_cliff(stories_id):
     return unique_entities
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_IMMUTABLE)
 def cached_story_raw_cliff_results(stories_id):
     # need to pull story results with the tool key, so we don't need to cache on user key here
     themes = mc.storyRawCliffResults([stories_id])
@@ -212,7 +212,7 @@ def nyt_themes_from_mc_or_labeller(stories_id):
     return results
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_IMMUTABLE)
 def cached_story_raw_theme_results(stories_id):
     # have to use internal tool admin client here to fetch these (permissions)
     themes = mc.storyRawNytThemeResults([stories_id])[0]
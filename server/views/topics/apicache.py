@@ -5,12 +5,13 @@ import mediacloud.error
 
 from server import mc, TOOL_API_KEY
 from server.views import WORD_COUNT_SAMPLE_SIZE, WORD_COUNT_UI_NUM_WORDS
-from server.cache import cache
+from server.cache import cache, EXPIRE_IMMUTABLE, EXPIRE_SNAPSHOT, EXPIRE_USER
 from server.util.tags import TagDiscoverer
 import server.util.wordembeddings as wordembeddings
 from server.auth import user_mediacloud_client, user_admin_mediacloud_client, user_mediacloud_key
 from server.util.request import filters_from_args
 from server.util.api_helper import add_missing_dates_to_split_story_counts
+from server.util.fanout import fan_out
 from server.views.topics import stories_args_from_request
 from server.views.topics.foci.focalsets import is_url_sharing_focal_set
 import server.views.apicache as base_apicache
@@ -27,6 +28,32 @@ TOPIC_STORY_LIST_API_PARAMS = [
 ]
 
 
+def topics_many(user_mc_key, topics_ids, skip_errors=False):
+    """
+    Look up a batch of topics at once (ie. a user's favorites).
+    :return: a dict of topics_id to topic, one for each distinct id
+    """
+    return base_apicache.lookup_many(_cached_topic, topics_ids, leading_args=(user_mc_key,), skip_errors=skip_errors)
+
+
+# topics change state while they run, so don't show one that is more than a minute old without refreshing it
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, soft_ttl=60, depends_on=['topics_id'])
+def _cached_topic(user_mc_key, topics_id):
+    # api_key passed in to make this a user-level cache, because permissions on topics are per-user
+    local_mc = user_mediacloud_client(user_mc_key)
+    return local_mc.topic(topics_id)
+
+
+def invalidate_topic_caches(topics_id):
+    # clear out everything we've cached about this topic (including all its snapshots), for all users
+    return cache.invalidate_dependents(topics_id=topics_id)
+
+
+def invalidate_snapshot_caches(snapshots_id):
+    # clear out everything we've cached about one snapshot, ie. when it is being generated again
+    return cache.invalidate_dependents(snapshots_id=snapshots_id)
+
+
 def topic_media_list_page(user_mc_key, topics_id, **kwargs):
     return _cached_topic_media(user_mc_key, topics_id, **kwargs)
 
@@ -49,7 +76,7 @@ def topic_media_list(user_mc_key, topics_id, **kwargs):
     return _cached_topic_media(user_mc_key, topics_id, **merged_args)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, depends_on=['topics_id', 'snapshots_id'])
 def _cached_topic_media(user_mc_key, topics_id, **kwargs):
     """
     Internal helper - don't call this; call topic_media_list instead. This needs user_mc_key in the
@@ -75,10 +102,15 @@ def topic_story_count(user_mc_key, topics_id, **kwargs):
     }
     merged_args.update(kwargs)    # passed in args override anything pulled form the request.args
     # logger.info("!!!!!"+str(merged_args['timespans_id']))
-    return _cached_topic_story_count(user_mc_key, topics_id, **merged_args)
+    try:
+        return _cached_topic_story_count(user_mc_key, topics_id, **merged_args)
+    except mediacloud.error.MCException:
+        # when there is no timespan (ie. an ungenerated version you are adding subtopics to)
+        return {'count': 0}
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, depends_on=['topics_id', 'snapshots_id'],
+                          cache_errors=[mediacloud.error.MCException])
 def _cached_topic_story_count(user_mc_key, topics_id, **kwargs):
     """
     Internal helper - don't call this; call topic_story_count instead. This needs user_mc_key in the
@@ -88,19 +120,14 @@ def _cached_topic_story_count(user_mc_key, topics_id, **kwargs):
         local_mc = mc
     else:
         local_mc = user_mediacloud_client()
-    try:
-        results = local_mc.topicStoryCount(topics_id, **kwargs)
-    except mediacloud.error.MCException:
-        # when there is no timespan (ie. an ungenerated version you are adding subtopics to)
-        return {'count': 0}
-    return results
+    return local_mc.topicStoryCount(topics_id, **kwargs)
 
 
 def story_list(user_mc_key, q, rows):
     return _cached_story_list(user_mc_key, q, rows)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER)
 def _cached_story_list(user_mc_key, q, rows):
     if user_mc_key == TOOL_API_KEY:
         local_mc = mc
@@ -122,7 +149,7 @@ def topic_story_list(user_mc_key, topics_id, **kwargs):
     return results
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, depends_on=['topics_id', 'snapshots_id'])
 def _cached_topic_story_list(user_mc_key, topics_id, **kwargs):
     """
     Internal helper - don't call this; call topic_story_list instead. This needs user_mc_key in the
@@ -132,11 +159,15 @@ def _cached_topic_story_list(user_mc_key, topics_id, **kwargs):
     return local_mc.topicStoryList(topics_id, **kwargs)
 
 
+# Topic story downloads stay cached one page at a time on purpose, even though big values can be chunked now: a big
+# snapshot can have hundreds of thousands of stories, and caching them all as one value would mean fetching and holding
+# every page before the first CSV row goes out, instead of streaming pages as they arrive. The on-screen story list
+# above is one value already, and gets chunked if it is big.
 def topic_story_list_by_page(user_mc_key, topics_id, link_id, **kwargs):
     return _cached_topic_story_list_page(user_mc_key, topics_id, link_id, **kwargs)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_SNAPSHOT, depends_on=['topics_id', 'snapshots_id'])
 def _cached_topic_story_list_page(user_mc_key, topics_id, link_id, **kwargs):
     # be user-specific in this cache to be careful about permissions on stories
     # api_key passed in just to make this a user-level cache
@@ -148,7 +179,7 @@ def topic_story_link_list_by_page(user_mc_key, topics_id, link_id, **kwargs):
     return _cached_topic_story_link_list_page(user_mc_key, topics_id, link_id, **kwargs)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_SNAPSHOT, depends_on=['topics_id', 'snapshots_id'])
 def _cached_topic_story_link_list_page(user_mc_key, topics_id, link_id, **kwargs):
     # api_key passed in just to make this a user-level cache
     local_mc = user_mediacloud_client(user_mc_key)
@@ -159,7 +190,7 @@ def topic_media_link_list_by_page(user_mc_key, topics_id, link_id, **kwargs):
     return _cached_topic_media_link_list_page(user_mc_key, topics_id, link_id, **kwargs)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_SNAPSHOT, depends_on=['topics_id', 'snapshots_id'])
 def _cached_topic_media_link_list_page(user_mc_key, topics_id, link_id, **kwargs):
     # api_key passed in just to make this a user-level cache
     local_mc = user_mediacloud_client(user_mc_key)
@@ -224,7 +255,7 @@ def _word2vec_topic_similar_words(topics_id, snapshots_id, words):
     return word2vec_results
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, soft_ttl=60*60*6, depends_on=['topics_id', 'snapshots_id'])
 def cached_topic_word_counts(user_mc_key, topics_id, **kwargs):
     """
     Internal helper - don't call this; call topic_word_counts instead. This needs user_mc_key in the
@@ -263,7 +294,7 @@ def topic_split_story_counts(user_mc_key, topics_id, **kwargs):
     return results
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, soft_ttl=60*60*6, depends_on=['topics_id', 'snapshots_id'])
 def _cached_topic_split_story_counts(user_mc_key, topics_id, **kwargs):
     """
     Internal helper - don't call this; call topic_split_story_counts instead. This needs user_mc_key in the
@@ -282,7 +313,7 @@ def _cached_topic_split_story_counts(user_mc_key, topics_id, **kwargs):
     return results
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, depends_on=['topics_id'])
 def topic_foci_list(user_mc_key, topics_id, focal_sets_id):
     # This needs user_mc_key in the function signature to make sure the caching is keyed correctly.
     user_mc = user_mediacloud_client(user_mc_key)
@@ -302,7 +333,7 @@ def topic_focal_sets_list(user_mc_key, topics_id, snapshots_id):
     return response
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, depends_on=['topics_id', 'snapshots_id'])
 def topic_focal_set(user_mc_key, topics_id, snapshots_id, focal_sets_id):
     all_focal_sets = topic_focal_sets_list(user_mc_key, topics_id, snapshots_id)
     for fs in all_focal_sets:
@@ -327,8 +358,9 @@ def topic_tag_coverage(topics_id, tags_id):
     # respect any query filter the user has set
     query_with_tag = add_to_user_query("tags_id_stories:{}".format(tags_id_str))
     # now get the counts
-    total = topic_story_count(user_mediacloud_key(), topics_id)
-    tagged = topic_story_count(user_mediacloud_key(), topics_id, q=query_with_tag)  # force a count with just the query
+    user_mc_key = user_mediacloud_key()
+    total, tagged = fan_out(lambda: topic_story_count(user_mc_key, topics_id),
+                            lambda: topic_story_count(user_mc_key, topics_id, q=query_with_tag))  # just the query
     return {'counts': {'count': tagged['count'], 'total': total['count']}}
 
 
@@ -347,7 +379,7 @@ def topic_tag_counts(user_mc_key, topics_id, tag_sets_id):
     return _cached_topic_tag_counts(user_mc_key, topics_id, tag_sets_id, query)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_USER, depends_on={'topics_id': '_topics_id'})
 def _cached_topic_tag_counts(_user_mc_key, _topics_id, tag_sets_id, query):
     # even though we call base_apicache under the hood here, we want to make sure the cache is keyed by
     # API key, because topics have user-level permissioning
@@ -370,7 +402,7 @@ def topic_sentence_sample(user_mc_key, sample_size=1000, **kwargs):
     return _cached_topic_sentence_sample(user_mc_key, sample_size, **merged_args)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_SNAPSHOT)
 def _cached_topic_sentence_sample(user_mc_key, sample_size=1000, **kwargs):
     """
     Internal helper - don't call this; call topic_sentence_sample instead. This needs user_mc_key in the
@@ -463,7 +495,7 @@ def topic_media_map_list(topics_id, timespans_id):
     return _cached_topic_media_map_list(user_mediacloud_key(), topics_id, timespans_id)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(depends_on=['topics_id'])
 def _cached_topic_media_map_list(user_mc_key, topics_id, timespans_id):
     user_mc = user_mediacloud_client(user_mc_key)
     return user_mc.topicMediaMapList(topics_id, timespans_id=timespans_id)
@@ -473,7 +505,7 @@ def topic_media_map(topics_id, timespan_maps_id, file_format):
     return _cached_topic_media_map(user_mediacloud_key(), topics_id, timespan_maps_id, file_format)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_IMMUTABLE, depends_on=['topics_id'])
 def _cached_topic_media_map(user_mc_key, topics_id, timespan_maps_id, file_format):
     user_mc = user_mediacloud_client(user_mc_key)
     return user_mc.topicMediaMapDownload(topics_id, timespan_maps_id, file_format)
@@ -495,7 +527,7 @@ def topic_timespan_files_list(topics_id, timespans_id):
     return _cached_topic_timespan_files_list(user_mediacloud_key(), topics_id, timespans_id)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_IMMUTABLE, depends_on=['topics_id'])
 def _cached_topic_timespan_files_list(user_mc_key, topics_id, timespans_id):
     user_mc = user_mediacloud_client(user_mc_key)
     return user_mc.topicTimespanFiles(topics_id, timespans_id=timespans_id)
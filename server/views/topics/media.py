@@ -85,8 +85,8 @@ def _stream_media_by_page(user_mc_key, topics_id, props, metadata_fields, **kwar
         page = apicache.topic_media_list_page(user_mc_key, topics_id, **kwargs)
         page_media = page['media']
         for m in page_media:
+            metadata = m['metadata']
             for meta_field in metadata_fields:
-                metadata = m['metadata']
                 m[meta_field] = metadata[meta_field]['label'] if metadata[meta_field] is not None else None
             row = csv.dict2row(props, m)
             row_string = ','.join(row) + '\n'
@@ -109,6 +109,7 @@ def topic_add_platform(topics_id):
             'success': 1 if 'topic_seed_query' in result else 0,
             'id': result['topic_seed_query']['topic_seed_queries_id'],
         })
+    apicache.invalidate_topic_caches(topics_id)
     return jsonify(result)  # topic_seed_queries_id
 
 
@@ -136,7 +137,7 @@ def topic_update_platform(topics_id, platform_id):
 
         result['success'] = 1 if 'topic_seed_query' in result else 0
         result['id'] = result['topic_seed_query']['topic_seed_queries_id']
-
+    apicache.invalidate_topic_caches(topics_id)
     return result  # topic_seed_queries_id
 
 
@@ -147,6 +148,7 @@ def topic_remove_platform(topics_id, topic_seed_queries_id):
     user_mc = user_mediacloud_client()
     # Note: you can't delete the web/mediacloud type of platform
     result = user_mc.topicRemoveSeedQuery(topics_id, topic_seed_queries_id=topic_seed_queries_id)
+    apicache.invalidate_topic_caches(topics_id)
     return jsonify(result)
 
 
@@ -3,7 +3,6 @@ import flask_login
 from flask import jsonify, request, Response
 import mediacloud
 import mediacloud.error
-import concurrent.futures
 
 import server.util.csv as csv
 import server.util.tags as tag_util
@@ -11,14 +10,15 @@ import server.views.topics.apicache as apicache
 import server.views.apicache as base_apicache
 from server import app, cliff
 from server.auth import user_mediacloud_key, user_mediacloud_client
-from server.cache import cache
+from server.cache import cache, EXPIRE_IMMUTABLE
 from server.util.request import api_error_handler
+from server.util.prefetch import read_ahead
 from server.views.topics import stories_args_from_request, concatenate_query_for_solr, _parse_collection_ids, _parse_media_ids
 
 logger = logging.getLogger(__name__)
 
 
-@cache.cache_on_arguments()
+@cache.cache_on_arguments(expiration_class=EXPIRE_IMMUTABLE)
 def _cached_geoname(geonames_id):
     return cliff.geonames_lookup(geonames_id)
 
@@ -112,18 +112,8 @@ def stream_story_list_csv(user_key, filename, topic, **kwargs):
 def _topic_story_list_by_page_as_csv_row(user_key, topics_id, props, **kwargs):
     yield ','.join(props) + '\n'  # first send the column names
     include_all_url_shares = kwargs['include_all_url_shares'] if 'include_all_url_shares' in kwargs else False
-    story_count = 0
-    link_id = 0
-    more_pages = True
-    yet_to_hit_story_limit = True
-    has_story_limit = ('story_limit' in kwargs) and (kwargs['story_limit'] is not None)
-    # page through the story list results, until we run out or we hit the user's desired limit
-    while more_pages and ((not has_story_limit) or (has_story_limit and yet_to_hit_story_limit)):
-        page = _topic_story_page_with_media(user_key, topics_id, link_id, **kwargs)
-        if 'next' in page['link_ids']:
-            link_id = page['link_ids']['next']
-        else:
-            more_pages = False
+    # fetch the next pages in the background while this one is written out
+    for page in read_ahead(_topic_story_pages_with_media(user_key, topics_id, **kwargs)):
         for s in page['stories']:
             if include_all_url_shares:
                 topic_seed_queries = kwargs['topic_seed_queries']
@@ -139,12 +129,25 @@ def _topic_story_list_by_page_as_csv_row(user_key, topics_id, props, **kwargs):
             cleaned_row = csv.dict2row(props, s)
             row_string = ','.join(cleaned_row) + '\n'
             yield row_string
-        story_count += len(page['stories'])
-        yet_to_hit_story_limit = has_story_limit and (story_count < int(kwargs['story_limit']))
 
 
-def _media_info_worker(info):
-    return base_apicache.get_media_with_key(info['user_key'], info['media_id'])
+# generator you can use to do something for each page of story results
+def _topic_story_pages_with_media(user_key, topics_id, **kwargs):
+    story_count = 0
+    link_id = 0
+    more_pages = True
+    yet_to_hit_story_limit = True
+    has_story_limit = ('story_limit' in kwargs) and (kwargs['story_limit'] is not None)
+    # page through the story list results, until we run out or we hit the user's desired limit
+    while more_pages and ((not has_story_limit) or (has_story_limit and yet_to_hit_story_limit)):
+        page = _topic_story_page_with_media(user_key, topics_id, link_id, **kwargs)
+        if 'next' in page['link_ids']:
+            link_id = page['link_ids']['next']
+        else:
+            more_pages = False
+        yield page
+        story_count += len(page['stories'])
+        yet_to_hit_story_limit = has_story_limit and (story_count < int(kwargs['story_limit']))
 
 
 # generator you can use to do something for each page of story results
@@ -160,13 +163,9 @@ def _topic_story_page_with_media(user_key, topics_id, link_id, **kwargs):
 
     if len(story_page['stories']) > 0:  # be careful to not construct malformed query if no story ids
 
-        # build a media lookup table in parallel so it is faster
+        # build a media lookup table for the distinct media on this page in one go (they're mostly already cached)
         if include_media_metadata:
-            with concurrent.futures.ProcessPoolExecutor() as executor:
-                media_ids = set([s['media_id'] for s in story_page['stories']])
-                jobs = [{'user_key': user_key, 'media_id': mid} for mid in media_ids]
-                job_results = executor.map(_media_info_worker, jobs)  # blocks until they are all done
-                media_lookup = {j['media_id']: j for j in job_results}
+            media_lookup = base_apicache.media_many([s['media_id'] for s in story_page['stories']], user_key)
 
         if include_story_tags:
             story_ids = [str(s['stories_id']) for s in story_page['stories']]
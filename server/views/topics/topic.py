@@ -149,6 +149,7 @@ def topic_update_settings(topics_id):
         'max_stories': _safe_member_of_dict('max_topic_stories', request.form),
     }
     result = user_mc.topicUpdate(topics_id, **args)
+    apicache.invalidate_topic_caches(topics_id)
     return topic_summary(result['topics'][0]['topics_id'])  # give them back new data, so they can update the client
 
 
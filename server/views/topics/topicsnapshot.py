@@ -7,6 +7,7 @@ from server import app
 from server.auth import user_mediacloud_client
 from server.util.request import api_error_handler, form_fields_required
 from server.util.stringutil import ids_from_comma_separated_str
+import server.views.topics.apicache as apicache
 from server.views.topics.topic import topic_summary
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,7 @@ def topic_update(topics_id):
     # update the seed query (the client will start the spider themselves
     user_mc = user_mediacloud_client()
     user_mc.topicUpdate(topics_id, media_ids=media_ids_to_add, media_tags_ids=tag_ids_to_add, **args)
+    apicache.invalidate_topic_caches(topics_id)
     return topic_summary(topics_id)  # give them back new data, so they can update the client
 
 
@@ -61,6 +63,7 @@ def topic_snapshot_create(topics_id):
     user_mc = user_mediacloud_client()
     # make a new snapshot
     user_mc.topicCreateSnapshot(topics_id, note=_next_snapshot_number(topics_id))
+    apicache.invalidate_topic_caches(topics_id)
     return topic_summary(topics_id)
 
 
@@ -79,6 +82,8 @@ def topic_snapshot_spider(topics_id):
     if request.form['snapshotId'] is not None and request.form['snapshotId'] != "null":
         # generate into the one passed in
         snapshots_id = request.form['snapshotId'] if 'snapshotId' in request.form else None
+        # anything cached from the old version of this snapshot is about to be out of date
+        apicache.invalidate_snapshot_caches(snapshots_id)
     else:
         # make a new snapshot
         new_snapshot = user_mc.topicCreateSnapshot(topics_id, note=_next_snapshot_number(topics_id))['snapshot']
@@ -10,7 +10,7 @@ import io
 import zipfile
 
 from server import app, auth, mc, user_db
-from server.auth import user_mediacloud_client, user_name, user_is_admin
+from server.auth import user_mediacloud_client, user_mediacloud_key, user_name, user_is_admin
 from server.util.request import api_error_handler, form_fields_required, arguments_required, json_error_response
 from server.views.topics.topiclist import topics_user_can_access
 
@@ -162,8 +162,10 @@ def change_password():
 @flask_login.login_required
 @api_error_handler
 def reset_api_key():
+    old_key = user_mediacloud_key()
     user_mc = user_mediacloud_client()
     results = user_mc.authResetApiKey()
+    auth.forget_mediacloud_clients(old_key)
     flask_login.current_user.update_profile(results['profile'])   # update server api key too
     return jsonify(results)
 